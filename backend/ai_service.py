@@ -1,25 +1,69 @@
 """AI Service for handling tutoring conversations"""
 import os
+import time
+import asyncio
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 import openai
+from openai.types import CompletionUsage
 from conversation_manager import ConversationManager
-from pdf_utils import extract_texts_from_pdfs, format_pdf_context
-from prompts import TUTOR_SYSTEM_PROMPT, EVALUATION_SYSTEM_PROMPT
+from pdf_utils import extract_texts_from_pdfs, extract_texts_from_pdfs_async, format_pdf_context
+from session_store import SessionStore, create_session_store
+from reading_index import select_reading_context
+from token_utils import estimate_tokens
+from prompts import TUTOR_SYSTEM_PROMPT, EVALUATION_SYSTEM_PROMPT, SUMMARY_COMPACTION_PROMPT
+from evaluation_cache import create_evaluation_cache, evaluation_cache_key
+from metrics import metrics
+from resilience import VendorUnavailableError, openai_chat
 
 logger = logging.getLogger(__name__)
 
+# GPT-4o-mini for cost efficiency
+TUTOR_MODEL = "gpt-4o-mini"
+EVALUATION_MODEL = "gpt-4o-mini"
+EVALUATION_TEMPERATURE = 0.3
+EVALUATION_MAX_TOKENS = 200
+
+# Identical evaluations (retries, double submits) reuse the earlier LLM output
+evaluation_cache = create_evaluation_cache()
+
+def cached_prompt_tokens(usage) -> int:
+    """Prompt tokens served from the provider's prefix cache (0 if not reported)"""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return (details.cached_tokens or 0) if details else 0
+
+def transcript_to_history(transcript: List[Dict]) -> List[Dict]:
+    """Convert a stored Session.full_transcript ({'speaker', 'text'}) to conversation_history format"""
+    conversation_history = []
+    for turn in transcript:
+        if turn['speaker'] == 'student':
+            conversation_history.append({'role': 'user', 'content': turn['text']})
+        elif turn['speaker'] == 'ai':
+            conversation_history.append({'role': 'assistant', 'content': turn['text']})
+    return conversation_history
+
+
 class AITutorService:
     """Service for managing AI tutoring sessions
 
-    IMPORTANT: Sessions are stored in memory. For production with multiple workers,
-    consider using Redis or database storage to share sessions across workers.
-    Currently requires single worker mode (--workers 1) to maintain session state.
+    Sessions live in a pluggable SessionStore (see session_store.py). The default
+    in-memory store requires single worker mode (--workers 1); set
+    SESSION_STORE_BACKEND=sql to share sessions across workers through the database.
     """
 
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.sessions = {}  # Store conversation managers by session_id (in-memory)
+    def __init__(self, session_store: Optional[SessionStore] = None):
+        # Retries happen in resilience.openai_chat (call_sync), so the SDK's are off
+        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0,
+                                    timeout=openai_chat.timeout_seconds)
+        self.sessions = session_store or create_session_store()  # Store conversation managers by session_id
+        metrics.register_gauge('openai.prompt_cache_hit_ratio', self.prompt_cache_hit_ratio)
+
+    def prompt_cache_hit_ratio(self) -> float:
+        """Share of tutor prompt tokens served from the provider's prefix cache"""
+        prompt_tokens = metrics.get('openai.prompt_tokens')
+        if not prompt_tokens:
+            return 0.0
+        return round(metrics.get('openai.cached_prompt_tokens') / prompt_tokens, 3)
         
     def initialize_session_with_text(self, session_id: str, reading_text: str, tutor_prompt: str = None, evaluation_prompt: str = None) -> Dict:
         """Initialize a new tutoring session with direct text content (faster than PDF extraction)"""
@@ -58,73 +102,92 @@ class AITutorService:
                 'error': str(e)
             }
 
-    def initialize_session(self, session_id: str, pdf_paths: List[str], tutor_prompt: str = None, evaluation_prompt: str = None) -> Dict:
-        """Initialize a new tutoring session with PDF context"""
-        try:
-            from datetime import datetime
-
-            # Extract text from PDFs
-            pdf_texts = extract_texts_from_pdfs(pdf_paths)
-            pdf_context = format_pdf_context(pdf_texts)
+    def initialize_session(self, session_id: str, pdf_paths: List[str], tutor_prompt: str = None, evaluation_prompt: str = None, db_session=None) -> Dict:
+        """Initialize a new tutoring session with PDF context
 
-            # Create conversation manager for this session
-            conv_manager = ConversationManager()
-
-            # Store session data with start time and class-specific prompts
-            self.sessions[session_id] = {
-                'manager': conv_manager,
-                'pdf_context': pdf_context,
-                'conversation_history': [],
-                'pdf_paths': pdf_paths,
-                'start_time': datetime.now(),
-                'tutor_prompt': tutor_prompt or TUTOR_SYSTEM_PROMPT,  # Use class prompt or default
-                'evaluation_prompt': evaluation_prompt or EVALUATION_SYSTEM_PROMPT  # Use class prompt or default
-            }
+        With a db_session, readings come from the pre-extracted reading_pages rows
+        (see reading_ingest.py); PDFs are only extracted here if they haven't been ingested.
+        """
+        try:
+            # Use ingested pages if available, otherwise extract text from PDFs
+            pdf_texts = self._load_ingested_texts(session_id, pdf_paths, db_session)
+            ingested = pdf_texts is not None
+            if not ingested:
+                pdf_texts = extract_texts_from_pdfs(pdf_paths)
+            return self._store_pdf_session(session_id, pdf_paths, pdf_texts, ingested, tutor_prompt, evaluation_prompt)
 
-            logger.info(f"Initialized session {session_id} with {len(pdf_paths)} PDFs")
-            return {
-                'success': True,
-                'message': 'Session initialized',
-                'pdf_count': len(pdf_texts)
-            }
-            
         except Exception as e:
             logger.error(f"Error initializing session {session_id}: {str(e)}")
             return {
                 'success': False,
                 'error': str(e)
             }
+
+    def _load_ingested_texts(self, session_id: str, pdf_paths: List[str], db_session=None) -> Optional[Dict[str, str]]:
+        """Reading texts from reading_pages, or None if they still need extracting"""
+        pdf_texts = None
+        if db_session is not None:
+            from reading_ingest import load_ingested_texts
+            pdf_texts = load_ingested_texts(db_session, pdf_paths)
+        if pdf_texts is None:
+            logger.warning(f"Readings for session {session_id} not ingested yet, extracting from PDFs")
+        return pdf_texts
+
+    def _store_pdf_session(self, session_id: str, pdf_paths: List[str], pdf_texts: Dict[str, str], ingested: bool,
+                           tutor_prompt: str = None, evaluation_prompt: str = None) -> Dict:
+        """Create and save the session for already-extracted reading texts"""
+        from datetime import datetime
+
+        pdf_context = format_pdf_context(pdf_texts)
+
+        # Create conversation manager for this session
+        conv_manager = ConversationManager()
+
+        # Store session data with start time and class-specific prompts
+        self.sessions[session_id] = {
+            'manager': conv_manager,
+            'pdf_context': pdf_context,
+            'conversation_history': [],
+            'pdf_paths': pdf_paths,
+            'start_time': datetime.now(),
+            'tutor_prompt': tutor_prompt or TUTOR_SYSTEM_PROMPT,  # Use class prompt or default
+            'evaluation_prompt': evaluation_prompt or EVALUATION_SYSTEM_PROMPT  # Use class prompt or default
+        }
+
+        logger.info(f"Initialized session {session_id} with {len(pdf_paths)} PDFs")
+        return {
+            'success': True,
+            'message': 'Session initialized',
+            'pdf_count': len(pdf_texts),
+            'ingested': ingested
+        }
     
-    def get_ai_response(self, session_id: str, user_message: str) -> Tuple[str, Dict]:
-        """Get AI response for a user message in a session"""
+    def _begin_turn(self, session_id: str, user_message: str) -> Dict:
+        """Load the session and work out the timing for a tutor turn
+
+        Returns a turn dict. If no LLM call is needed (missing session or auto-end)
+        the turn carries the final (response, metadata) under 'result'.
+        """
         from datetime import datetime
         
-        # Get or create session - try to auto-initialize if missing
-        if session_id not in self.sessions:
-            # Try to extract assignment_id from session_id format: session_{student_id}_{assignment_id}_{timestamp}
-            try:
-                parts = session_id.split('_')
-                if len(parts) >= 3:
-                    assignment_id = int(parts[2])
-                    # Auto-initialize session with default PDFs
-                    default_pdfs = ["week1/reading1.pdf", "week1/reading2.pdf"]
-                    init_result = self.initialize_session(session_id, default_pdfs)
-                    if not init_result['success']:
-                        return "Could not initialize session. Please start a new assessment.", {'error': 'Auto-init failed'}
-                else:
-                    return "Session not found. Please start a new assessment.", {'error': 'Session not found'}
-            except:
-                return "Session not found. Please start a new assessment.", {'error': 'Session not found'}
+        session_data = self.sessions.get(session_id)
+        if session_data is None:
+            return {'result': ("Session not found. Please start a new assessment.", {'error': 'Session not found'})}
         
-        session_data = self.sessions[session_id]
         conv_manager = session_data['manager']
-        pdf_context = session_data['pdf_context']
-        conversation_history = session_data['conversation_history']
         
         # Calculate elapsed time and remaining time
         start_time = session_data.get('start_time', datetime.now())
         elapsed_seconds = int((datetime.now() - start_time).total_seconds())
         remaining_seconds = max(0, 600 - elapsed_seconds)  # 10-minute session
+
+        turn = {
+            'session_id': session_id,
+            'session_data': session_data,
+            'user_message': user_message,
+            'elapsed_seconds': elapsed_seconds,
+            'remaining_seconds': remaining_seconds
+        }
         
         # Check for auto-end condition (≤20 seconds remaining)
         if remaining_seconds <= 20:
@@ -132,8 +195,12 @@ class AITutorService:
             
             # Add farewell message to conversation history
             farewell_message = "Thank you for a good conversation. Let's wrap up here."
-            conversation_history.append({"role": "user", "content": user_message})
-            conversation_history.append({"role": "assistant", "content": farewell_message})
+
+            def record_farewell(latest: Dict):
+                latest['conversation_history'].append({"role": "user", "content": user_message})
+                latest['conversation_history'].append({"role": "assistant", "content": farewell_message})
+            session_data = self.sessions.update(session_id, record_farewell) or session_data
+            conv_manager = session_data['manager']
             
             metadata = {
                 'question_count': conv_manager.question_count,
@@ -143,89 +210,147 @@ class AITutorService:
                 'elapsed_seconds': elapsed_seconds,
                 'minutes_elapsed': round(elapsed_seconds / 60.0, 1),
                 'remaining_seconds': remaining_seconds,
-                'token_usage': {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0}
+                'token_usage': {'input_tokens': 0, 'cached_tokens': 0, 'output_tokens': 0, 'total_tokens': 0}
             }
             
-            return farewell_message, metadata
+            turn['result'] = (farewell_message, metadata)
+        
+        return turn
+
+    def _build_turn_messages(self, turn: Dict) -> List[Dict]:
+        """Format the OpenAI messages for a tutor turn"""
+        session_data = turn['session_data']
+
+        # Check if this should be the final question
+        final_question = turn['remaining_seconds'] <= 45
+
+        # Get tutor prompt from session (use default if not set)
+        tutor_prompt = session_data.get('tutor_prompt', TUTOR_SYSTEM_PROMPT)
+
+        # Long readings: only send the chunks relevant to this turn
+        pdf_context = session_data['pdf_context']
+        excerpts = select_reading_context(
+            pdf_context, turn['user_message'], session_data['conversation_history'][-4:]
+        )
+        if excerpts is None:
+            turn['reading_context'] = {'mode': 'full', 'tokens': estimate_tokens(pdf_context)}
+        else:
+            turn['reading_context'] = {'mode': 'retrieval', 'chunks': excerpts['chunks'], 'tokens': excerpts['tokens']}
+
+        # Format messages for API with time context, packed under the model's token budget
+        messages, turn['token_breakdown'] = session_data['manager'].pack_messages(
+            system_prompt=tutor_prompt,
+            pdf_context=pdf_context,
+            conversation_history=session_data['conversation_history'],
+            new_message=turn['user_message'],
+            elapsed_seconds=turn['elapsed_seconds'],
+            final_question=final_question,
+            reading_excerpts=excerpts['text'] if excerpts else None,
+            model=TUTOR_MODEL
+        )
+        return messages
+
+    def _finish_turn(self, turn: Dict, ai_response: str, usage) -> Tuple[str, Dict]:
+        """Record the tutor reply in the session and build the turn metadata"""
+        session_id = turn['session_id']
+        elapsed_seconds = turn['elapsed_seconds']
+        remaining_seconds = turn['remaining_seconds']
+
+        def record_turn(session_data: Dict):
+            # Update conversation history
+            session_data['conversation_history'].append({"role": "user", "content": turn['user_message']})
+            session_data['conversation_history'].append({"role": "assistant", "content": ai_response})
+
+            # Update phase and question count based on elapsed time
+            session_data['manager'].update_phase(elapsed_seconds)
+
+        # Applied to the latest copy, so a turn saved meanwhile by another worker isn't lost
+        session_data = self.sessions.update(session_id, record_turn)
+        if session_data is None:  # Deleted mid-turn: keep the in-flight copy
+            session_data = turn['session_data']
+            record_turn(session_data)
+            self.sessions.save(session_id, session_data)
+        turn['session_data'] = session_data
+        conv_manager = session_data['manager']
+        
+        # Calculate token usage for monitoring (cached prompt tokens bill at half price)
+        cached_tokens = cached_prompt_tokens(usage)
+        token_usage = {
+            'input_tokens': usage.prompt_tokens,
+            'cached_tokens': cached_tokens,
+            'output_tokens': usage.completion_tokens,
+            'total_tokens': usage.total_tokens,
+            'estimated_cost': ((usage.prompt_tokens - cached_tokens) * 0.00015 +
+                             cached_tokens * 0.000075 +
+                             usage.completion_tokens * 0.0006) / 1000
+        }
+        metrics.incr('openai.prompt_tokens', usage.prompt_tokens)
+        metrics.incr('openai.cached_prompt_tokens', cached_tokens)
+        
+        # Check timing thresholds
+        minutes_elapsed = elapsed_seconds / 60.0
+        should_wrap_up = minutes_elapsed >= 9.5  # Wrap up in final 30 seconds
+        final_question = remaining_seconds <= 45  # One more question only
+        
+        metadata = {
+            'question_count': conv_manager.question_count,
+            'phase': conv_manager.phase,
+            'should_wrap_up': should_wrap_up,
+            'final_question': final_question,
+            'auto_end': False,
+            'elapsed_seconds': elapsed_seconds,
+            'minutes_elapsed': round(minutes_elapsed, 1),
+            'remaining_seconds': remaining_seconds,
+            'token_usage': token_usage,
+            'reading_context': turn.get('reading_context'),
+            'token_breakdown': turn.get('token_breakdown')
+        }
+        
+        logger.info(f"Session {session_id} - Q{conv_manager.question_count} - Tokens: {token_usage['total_tokens']} "
+                    f"({cached_tokens} cached)")
+        
+        return ai_response, metadata
+
+    def get_ai_response(self, session_id: str, user_message: str) -> Tuple[str, Dict]:
+        """Get AI response for a user message in a session"""
+        turn = self._begin_turn(session_id, user_message)
+        if 'result' in turn:
+            return turn['result']
         
         try:
-            # Check if this should be the final question
-            final_question = remaining_seconds <= 45
-
-            # Get tutor prompt from session (use default if not set)
-            tutor_prompt = session_data.get('tutor_prompt', TUTOR_SYSTEM_PROMPT)
-
-            # Format messages for API with time context
-            messages = conv_manager.format_for_api(
-                system_prompt=tutor_prompt,
-                pdf_context=pdf_context,
-                conversation_history=conversation_history,
-                new_message=user_message,
-                elapsed_seconds=elapsed_seconds,
-                final_question=final_question
-            )
+            messages = self._build_turn_messages(turn)
             
-            # Call OpenAI API with GPT-4o-mini for cost efficiency
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            # Call OpenAI API
+            response = openai_chat.call_sync(
+                self.client.chat.completions.create,
+                model=TUTOR_MODEL,
                 messages=messages,
                 temperature=0.7,
                 max_tokens=300  # Keep responses concise
             )
             
-            ai_response = response.choices[0].message.content
-            
-            # Update conversation history
-            conversation_history.append({"role": "user", "content": user_message})
-            conversation_history.append({"role": "assistant", "content": ai_response})
-            
-            # Update phase and question count based on elapsed time
-            conv_manager.update_phase(elapsed_seconds)
-            
-            # Calculate token usage for monitoring
-            token_usage = {
-                'input_tokens': response.usage.prompt_tokens,
-                'output_tokens': response.usage.completion_tokens,
-                'total_tokens': response.usage.total_tokens,
-                'estimated_cost': (response.usage.prompt_tokens * 0.00015 + 
-                                 response.usage.completion_tokens * 0.0006) / 1000
-            }
-            
-            # Check timing thresholds
-            minutes_elapsed = elapsed_seconds / 60.0
-            should_wrap_up = minutes_elapsed >= 9.5  # Wrap up in final 30 seconds
-            final_question = remaining_seconds <= 45  # One more question only
-            
-            metadata = {
-                'question_count': conv_manager.question_count,
-                'phase': conv_manager.phase,
-                'should_wrap_up': should_wrap_up,
-                'final_question': final_question,
-                'auto_end': False,
-                'elapsed_seconds': elapsed_seconds,
-                'minutes_elapsed': round(minutes_elapsed, 1),
-                'remaining_seconds': remaining_seconds,
-                'token_usage': token_usage
-            }
-            
-            logger.info(f"Session {session_id} - Q{conv_manager.question_count} - Tokens: {token_usage['total_tokens']}")
-            
-            return ai_response, metadata
+            return self._finish_turn(turn, response.choices[0].message.content, response.usage)
             
+        except VendorUnavailableError:
+            raise  # Surfaced as a 503; never spoken to the student
         except Exception as e:
             logger.error(f"Error getting AI response for session {session_id}: {str(e)}")
             return f"I apologize, but I encountered an error. Let's continue: {str(e)}", {'error': str(e)}
     
-    def evaluate_session(self, session_id: str, db_session=None) -> Dict:
-        """Evaluate the complete session performance"""
+    def _begin_evaluation(self, session_id: str, db_session=None) -> Dict:
+        """Collect the conversation and evaluation prompt for a session
+
+        Returns a dict with the conversation, or with the final evaluation under
+        'result' when no LLM call is needed (session missing, too little participation).
+        """
 
         conversation_history = None
         question_count = 0
 
-        # First try to get from memory
-        if session_id in self.sessions:
-            logger.info(f"Evaluating session {session_id} from memory")
-            session_data = self.sessions[session_id]
+        # First try to get from the session store
+        session_data = self.sessions.get(session_id)
+        if session_data is not None:
+            logger.info(f"Evaluating session {session_id} from session store")
             conversation_history = session_data['conversation_history']
             question_count = session_data['manager'].question_count
         # Otherwise try to recover from database if available
@@ -246,13 +371,7 @@ class AITutorService:
                     ).first()
 
                     if existing_session and existing_session.full_transcript:
-                        # Convert database transcript format to conversation_history format
-                        conversation_history = []
-                        for turn in existing_session.full_transcript:
-                            if turn['speaker'] == 'student':
-                                conversation_history.append({'role': 'user', 'content': turn['text']})
-                            elif turn['speaker'] == 'ai':
-                                conversation_history.append({'role': 'assistant', 'content': turn['text']})
+                        conversation_history = transcript_to_history(existing_session.full_transcript)
 
                         # Count AI questions
                         question_count = len([msg for msg in conversation_history if msg['role'] == 'assistant'])
@@ -262,98 +381,136 @@ class AITutorService:
 
         if not conversation_history:
             logger.error(f"Session {session_id} not found in memory or database")
-            return {'error': 'Session not found'}
+            return {'result': {'error': 'Session not found'}}
 
         # Get evaluation prompt from session if available, otherwise use default
         evaluation_prompt = EVALUATION_SYSTEM_PROMPT
-        if session_id in self.sessions:
-            evaluation_prompt = self.sessions[session_id].get('evaluation_prompt', EVALUATION_SYSTEM_PROMPT)
+        if session_data is not None:
+            evaluation_prompt = session_data.get('evaluation_prompt', EVALUATION_SYSTEM_PROMPT)
+
+        return self._prepare_evaluation(session_id, conversation_history, question_count, evaluation_prompt)
+
+    def _prepare_evaluation(self, session_id: str, conversation_history: List[Dict], question_count: int,
+                            evaluation_prompt: str) -> Dict:
+        """Evaluation inputs for a conversation, with 'result' set if participation was too low to grade"""
+        evaluation = {
+            'conversation_history': conversation_history,
+            'question_count': question_count,
+            'evaluation_prompt': evaluation_prompt
+        }
+
+        # Check student participation levels before evaluation
+        student_messages = [msg for msg in conversation_history if msg['role'] == 'user']
+        total_student_chars = sum(len(msg['content'].strip()) for msg in student_messages)
+        
+        # If insufficient student participation, return appropriate feedback
+        if len(student_messages) <= 1 or total_student_chars < 50:
+            logger.warning(f"Insufficient student participation in session {session_id}: {len(student_messages)} messages, {total_student_chars} chars")
+            evaluation['result'] = {
+                'score': 40,
+                'category': 'red',
+                'feedback': 'Explain and Apply Institutions & Principles: [Red] - Student did not provide sufficient responses to demonstrate understanding of institutional concepts.\n\nInterpret and Compare Theories & Justifications: [Red] - Minimal student participation prevented assessment of theoretical analysis skills.\n\nEvaluate Effectiveness & Fairness: [Red] - Student did not engage enough to show critical evaluation abilities.\n\nPropose and Justify Reforms: [Red] - No meaningful reform proposals were offered by the student.\n\nOverall: [Red] - Session ended with insufficient student participation to assess learning objectives.',
+                'question_count': question_count
+            }
+
+        return evaluation
+
+    def _evaluation_cache_key(self, evaluation: Dict) -> str:
+        return evaluation_cache_key(evaluation['conversation_history'], evaluation['evaluation_prompt'],
+                                    EVALUATION_MODEL, EVALUATION_TEMPERATURE, EVALUATION_MAX_TOKENS)
+
+    def _build_evaluation_messages(self, evaluation: Dict) -> List[Dict]:
+        """Format the conversation for evaluation with clear speaker labels"""
+        conversation_text = "\n".join([
+            f"{'STUDENT' if msg['role'] == 'user' else 'AI PROFESSOR'}: {msg['content']}" 
+            for msg in evaluation['conversation_history']
+        ])
+
+        # Use class-specific evaluation prompt
+        return [
+            {"role": "system", "content": evaluation['evaluation_prompt']},
+            {"role": "user", "content": f"Evaluate this student assessment:\n\n{conversation_text}"}
+        ]
+
+    def _score_evaluation(self, session_id: str, evaluation: str, question_count: int) -> Dict:
+        """Determine overall score/category from the evaluation text"""
+        # Look for Green/Yellow/Red indicators to determine overall performance
+        evaluation_lower = evaluation.lower()
+        green_count = evaluation_lower.count('green')
+        yellow_count = evaluation_lower.count('yellow')
+        red_count = evaluation_lower.count('red')
+
+        # Log color counts for debugging
+        logger.info(f"Session {session_id} evaluation colors - Green: {green_count}, Yellow: {yellow_count}, Red: {red_count}")
+
+        # Apply 50% majority rule (2 or more out of 4 categories = majority)
+        if green_count >= 2:  # 50% or more green (2+ out of 4)
+            category = "green"
+            score = 90 if green_count >= 3 else 85  # Higher score for 3-4 greens
+        elif yellow_count >= 2:  # 50% or more yellow (2+ out of 4)
+            category = "yellow"
+            score = 75
+        elif red_count >= 2:  # 50% or more red (2+ out of 4)
+            category = "red"
+            score = 60
+        else:  # No majority (mixed 1-1-1-1 type results), default to yellow
+            category = "yellow"
+            score = 70
+
+        # Validate: Check if the AI's "Overall:" line matches our calculation
+        overall_line_match = None
+        for line in evaluation.split('\n'):
+            if line.strip().lower().startswith('overall:'):
+                if 'green' in line.lower():
+                    overall_line_match = 'green'
+                elif 'yellow' in line.lower():
+                    overall_line_match = 'yellow'
+                elif 'red' in line.lower():
+                    overall_line_match = 'red'
+                break
+
+        # Log validation results
+        if overall_line_match and overall_line_match != category:
+            logger.warning(f"Session {session_id}: Color mismatch! AI said Overall: {overall_line_match}, but our calculation: {category}")
+        else:
+            logger.info(f"Session {session_id}: Color validation passed - {category}")
+
+        # Use our calculated category (don't trust the AI's "Overall" line)
+        
+        return {
+            'score': score,
+            'category': category,
+            'feedback': evaluation,
+            'question_count': question_count
+        }
+
+    def evaluate_session(self, session_id: str, db_session=None) -> Dict:
+        """Evaluate the complete session performance"""
+        evaluation = self._begin_evaluation(session_id, db_session)
+        if 'result' in evaluation:
+            return evaluation['result']
+
+        cache_key = self._evaluation_cache_key(evaluation)
+        cached = evaluation_cache.get(cache_key)
+        if cached is not None:
+            return self._score_evaluation(session_id, cached, evaluation['question_count'])
 
         try:
-            # Check student participation levels before evaluation
-            student_messages = [msg for msg in conversation_history if msg['role'] == 'user']
-            total_student_chars = sum(len(msg['content'].strip()) for msg in student_messages)
-            
-            # If insufficient student participation, return appropriate feedback
-            if len(student_messages) <= 1 or total_student_chars < 50:
-                logger.warning(f"Insufficient student participation in session {session_id}: {len(student_messages)} messages, {total_student_chars} chars")
-                return {
-                    'score': 40,
-                    'category': 'red',
-                    'feedback': 'Explain and Apply Institutions & Principles: [Red] - Student did not provide sufficient responses to demonstrate understanding of institutional concepts.\n\nInterpret and Compare Theories & Justifications: [Red] - Minimal student participation prevented assessment of theoretical analysis skills.\n\nEvaluate Effectiveness & Fairness: [Red] - Student did not engage enough to show critical evaluation abilities.\n\nPropose and Justify Reforms: [Red] - No meaningful reform proposals were offered by the student.\n\nOverall: [Red] - Session ended with insufficient student participation to assess learning objectives.',
-                    'question_count': question_count
-                }
-            
-            # Format conversation for evaluation with clear speaker labels
-            conversation_text = "\n".join([
-                f"{'STUDENT' if msg['role'] == 'user' else 'AI PROFESSOR'}: {msg['content']}" 
-                for msg in conversation_history
-            ])
-            
             # Call OpenAI for evaluation using class-specific evaluation prompt
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": evaluation_prompt},
-                    {"role": "user", "content": f"Evaluate this student assessment:\n\n{conversation_text}"}
-                ],
-                temperature=0.3,
-                max_tokens=200
+            response = openai_chat.call_sync(
+                self.client.chat.completions.create,
+                model=EVALUATION_MODEL,
+                messages=self._build_evaluation_messages(evaluation),
+                temperature=EVALUATION_TEMPERATURE,
+                max_tokens=EVALUATION_MAX_TOKENS
             )
+            content = response.choices[0].message.content
+            evaluation_cache.set(cache_key, content)
+
+            return self._score_evaluation(session_id, content, evaluation['question_count'])
             
-            evaluation = response.choices[0].message.content
-            
-            # Determine overall score/category from the evaluation text
-            # Look for Green/Yellow/Red indicators to determine overall performance
-            evaluation_lower = evaluation.lower()
-            green_count = evaluation_lower.count('green')
-            yellow_count = evaluation_lower.count('yellow')
-            red_count = evaluation_lower.count('red')
-
-            # Log color counts for debugging
-            logger.info(f"Session {session_id} evaluation colors - Green: {green_count}, Yellow: {yellow_count}, Red: {red_count}")
-
-            # Apply 50% majority rule (2 or more out of 4 categories = majority)
-            if green_count >= 2:  # 50% or more green (2+ out of 4)
-                category = "green"
-                score = 90 if green_count >= 3 else 85  # Higher score for 3-4 greens
-            elif yellow_count >= 2:  # 50% or more yellow (2+ out of 4)
-                category = "yellow"
-                score = 75
-            elif red_count >= 2:  # 50% or more red (2+ out of 4)
-                category = "red"
-                score = 60
-            else:  # No majority (mixed 1-1-1-1 type results), default to yellow
-                category = "yellow"
-                score = 70
-
-            # Validate: Check if the AI's "Overall:" line matches our calculation
-            overall_line_match = None
-            for line in evaluation.split('\n'):
-                if line.strip().lower().startswith('overall:'):
-                    if 'green' in line.lower():
-                        overall_line_match = 'green'
-                    elif 'yellow' in line.lower():
-                        overall_line_match = 'yellow'
-                    elif 'red' in line.lower():
-                        overall_line_match = 'red'
-                    break
-
-            # Log validation results
-            if overall_line_match and overall_line_match != category:
-                logger.warning(f"Session {session_id}: Color mismatch! AI said Overall: {overall_line_match}, but our calculation: {category}")
-            else:
-                logger.info(f"Session {session_id}: Color validation passed - {category}")
-
-            # Use our calculated category (don't trust the AI's "Overall" line)
-            
-            return {
-                'score': score,
-                'category': category,
-                'feedback': evaluation,
-                'question_count': question_count
-            }
-            
+        except VendorUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error evaluating session {session_id}: {str(e)}")
             return {'error': str(e)}
@@ -361,10 +518,10 @@ class AITutorService:
     def get_session_stats(self, session_id: str) -> Dict:
         """Get statistics for a session"""
         
-        if session_id not in self.sessions:
+        session_data = self.sessions.get(session_id)
+        if session_data is None:
             return {'error': 'Session not found'}
         
-        session_data = self.sessions[session_id]
         conv_manager = session_data['manager']
         
         return {
@@ -378,10 +535,10 @@ class AITutorService:
     def get_formatted_transcript(self, session_id: str) -> List[Dict]:
         """Get conversation history formatted for database storage"""
         
-        if session_id not in self.sessions:
+        session_data = self.sessions.get(session_id)
+        if session_data is None:
             return []
         
-        session_data = self.sessions[session_id]
         conversation_history = session_data['conversation_history']
         
         # Transform AI service format to expected transcript format
@@ -402,10 +559,271 @@ class AITutorService:
     
     def cleanup_session(self, session_id: str):
         """Clean up session data to free memory"""
-        if session_id in self.sessions:
-            session_data = self.sessions[session_id]
+        session_data = self.sessions.get(session_id)
+        if session_data is not None:
             message_count = len(session_data.get('conversation_history', []))
-            del self.sessions[session_id]
-            logger.info(f"Cleaned up session {session_id} from memory (had {message_count} messages)")
+            self.sessions.delete(session_id)
+            logger.info(f"Cleaned up session {session_id} from session store (had {message_count} messages)")
         else:
-            logger.warning(f"Attempted to cleanup non-existent session {session_id}")
\ No newline at end of file
+            logger.warning(f"Attempted to cleanup non-existent session {session_id}")
+
+
+class LLMSlots:
+    """Per-worker cap on concurrent OpenAI calls, taken per attempt by resilience.openai_chat"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self):
+        await self._semaphore.acquire()
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+        metrics.incr('openai.chat_completions')
+
+
+class AsyncAITutorService(AITutorService):
+    """AITutorService variant for async endpoints, built on AsyncOpenAI
+
+    LLM round-trips are awaited instead of blocking the event loop, so one worker can
+    multiplex many in-flight tutor turns. At most max_concurrency OpenAI calls run at
+    once per worker (OPENAI_MAX_CONCURRENCY); the rest wait their turn. Session store
+    access and prompt building run in a thread: the SQL backend does blocking database
+    I/O and retrieval/token counting are CPU-bound. The awaitable methods carry an
+    _async suffix, so the inherited blocking ones still work as documented.
+
+    With SUMMARY_COMPACTION_ENABLED=true, the rolling conversation summary is
+    condensed by the LLM in a background task after a turn completes; it never
+    delays a reply and is skipped while the worker is busy.
+    """
+
+    def __init__(self, session_store: Optional[SessionStore] = None, max_concurrency: Optional[int] = None):
+        super().__init__(session_store)
+        # Retries happen in resilience.openai_chat, outside the concurrency slot
+        self.async_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0,
+                                               timeout=openai_chat.timeout_seconds)
+        self.max_concurrency = max_concurrency or int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+        self.llm_slots = LLMSlots(self.max_concurrency)
+        metrics.register_gauge('openai.in_flight', lambda: self.llm_slots.in_flight)
+        metrics.register_gauge('openai.max_concurrency', lambda: self.max_concurrency)
+        self.summary_compaction = os.getenv("SUMMARY_COMPACTION_ENABLED", "false").lower() == "true"
+        self._compacting = set()  # Session ids with a compaction in flight
+        self._background_tasks = set()  # Strong references so tasks aren't garbage collected
+
+    def _schedule_compaction(self, turn: Dict):
+        """Start a background summary compaction for the turn's session if one is due"""
+        session_id = turn['session_id']
+        if not self.summary_compaction or session_id in self._compacting:
+            return
+        if self.llm_slots.in_flight >= self.max_concurrency // 2:
+            return  # Leave the slots to tutor turns; retried after the next turn
+        compaction = turn['session_data']['manager'].compaction_input()
+        if compaction is None:
+            return
+
+        self._compacting.add(session_id)
+        task = asyncio.create_task(self._compact_summary(session_id, *compaction))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _compact_summary(self, session_id: str, summary_input: str, through: int):
+        try:
+            response = await self._chat_completion(
+                model=TUTOR_MODEL,
+                messages=[
+                    {"role": "system", "content": SUMMARY_COMPACTION_PROMPT},
+                    {"role": "user", "content": summary_input}
+                ],
+                temperature=0.3,
+                max_tokens=200
+            )
+            summary_text = response.choices[0].message.content.strip()
+            session_data = await asyncio.to_thread(
+                self.sessions.update, session_id, lambda latest: latest['manager'].apply_compaction(summary_text, through)
+            )
+            if session_data is None:
+                return
+            metrics.incr('summary.compactions')
+        except Exception as e:
+            logger.warning(f"Summary compaction failed for session {session_id}: {str(e)}")
+            metrics.incr('summary.compaction_errors')
+        finally:
+            self._compacting.discard(session_id)
+
+    async def _chat_completion(self, **params):
+        """Run a chat completion under the per-worker concurrency limit, retrying transient failures
+
+        Each attempt holds a slot; backoff between attempts doesn't.
+        """
+        return await openai_chat.call(self.async_client.chat.completions.create, slot=self.llm_slots, **params)
+
+    async def initialize_session_async(self, session_id: str, pdf_paths: List[str], tutor_prompt: str = None,
+                                       evaluation_prompt: str = None, db_session=None) -> Dict:
+        """initialize_session without blocking the event loop
+
+        Un-ingested PDFs are extracted page-range-parallel in the pdf_utils process pool.
+        """
+        try:
+            pdf_texts = await asyncio.to_thread(self._load_ingested_texts, session_id, pdf_paths, db_session)
+            ingested = pdf_texts is not None
+            if not ingested:
+                pdf_texts = await extract_texts_from_pdfs_async(pdf_paths)
+            return await asyncio.to_thread(
+                self._store_pdf_session, session_id, pdf_paths, pdf_texts, ingested, tutor_prompt, evaluation_prompt
+            )
+
+        except Exception as e:
+            logger.error(f"Error initializing session {session_id}: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    async def get_ai_response_async(self, session_id: str, user_message: str) -> Tuple[str, Dict]:
+        """get_ai_response without blocking the event loop"""
+        turn = await asyncio.to_thread(self._begin_turn, session_id, user_message)
+        if 'result' in turn:
+            return turn['result']
+
+        try:
+            # Retrieval and token counting are CPU-bound
+            messages = await asyncio.to_thread(self._build_turn_messages, turn)
+
+            started = time.perf_counter()
+            response = await self._chat_completion(
+                model=TUTOR_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=300  # Keep responses concise
+            )
+            generation_ms = (time.perf_counter() - started) * 1000
+            metrics.observe('ai_chat.generation_ms', generation_ms)
+
+            ai_response, metadata = await asyncio.to_thread(
+                self._finish_turn, turn, response.choices[0].message.content, response.usage
+            )
+            metadata['timing'] = {'ttft_ms': None, 'generation_ms': round(generation_ms, 1)}
+            self._schedule_compaction(turn)
+            return ai_response, metadata
+
+        except VendorUnavailableError:
+            raise  # Surfaced as a 503 by /ai-chat; never spoken to the student
+        except Exception as e:
+            logger.error(f"Error getting AI response for session {session_id}: {str(e)}")
+            return f"I apologize, but I encountered an error. Let's continue: {str(e)}", {'error': str(e)}
+
+    async def stream_ai_response(self, session_id: str, user_message: str) -> AsyncIterator[Dict]:
+        """Stream the AI response for a user message as it is generated
+
+        Yields {'type': 'token', 'text': ...} events as tokens arrive, then one
+        {'type': 'done', 'response': ..., 'metadata': ...} event with the same metadata
+        as get_ai_response_async plus time-to-first-token and total generation time.
+        """
+        parts = []
+        usage = None
+        first_token_at = None
+        try:
+            turn = await asyncio.to_thread(self._begin_turn, session_id, user_message)
+            if 'result' in turn:
+                ai_response, metadata = turn['result']
+                yield {'type': 'token', 'text': ai_response}
+                yield {'type': 'done', 'response': ai_response, 'metadata': metadata}
+                return
+
+            messages = await asyncio.to_thread(self._build_turn_messages, turn)
+
+            started = time.perf_counter()
+            # Only opening the stream is retried; the slot is kept while the reply is read
+            stream = await openai_chat.call(
+                self.async_client.chat.completions.create,
+                slot=self.llm_slots,
+                hold_slot=True,
+                model=TUTOR_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=300,  # Keep responses concise
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(chunk.choices[0].delta.content)
+                    yield {'type': 'token', 'text': chunk.choices[0].delta.content}
+            finally:
+                self.llm_slots.release()
+            finished = time.perf_counter()
+
+            ttft_ms = ((first_token_at or finished) - started) * 1000
+            generation_ms = (finished - started) * 1000
+            metrics.observe('ai_chat.ttft_ms', ttft_ms)
+            metrics.observe('ai_chat.generation_ms', generation_ms)
+
+            usage = usage or CompletionUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+            ai_response, metadata = await asyncio.to_thread(self._finish_turn, turn, "".join(parts), usage)
+            metadata['timing'] = {'ttft_ms': round(ttft_ms, 1), 'generation_ms': round(generation_ms, 1)}
+
+        except Exception as e:
+            if isinstance(e, VendorUnavailableError) and not parts:
+                raise  # Nothing streamed yet: /ai-chat-stream answers 503
+            # Tokens may already be out: always close the stream with a done event
+            logger.error(f"Error streaming AI response for session {session_id}: {str(e)}")
+            ai_response = f"I apologize, but I encountered an error. Let's continue: {str(e)}"
+            if not parts:
+                yield {'type': 'token', 'text': ai_response}
+            yield {'type': 'done', 'response': ai_response, 'metadata': {'error': str(e)}}
+            return
+
+        logger.info(f"Session {session_id} - streamed reply, TTFT {ttft_ms:.0f}ms, total {generation_ms:.0f}ms")
+        self._schedule_compaction(turn)
+
+        yield {'type': 'done', 'response': ai_response, 'metadata': metadata}
+
+    async def evaluate_session_async(self, session_id: str, db_session=None) -> Dict:
+        """evaluate_session without blocking the event loop"""
+        evaluation = await asyncio.to_thread(self._begin_evaluation, session_id, db_session)
+        return await self._run_evaluation(session_id, evaluation)
+
+    async def evaluate_transcript_async(self, session_id: str, transcript: List[Dict], evaluation_prompt: Optional[str] = None) -> Dict:
+        """Evaluate a stored Session.full_transcript (used for batch re-evaluation)"""
+        conversation_history = transcript_to_history(transcript)
+        question_count = len([msg for msg in conversation_history if msg['role'] == 'assistant'])
+        evaluation = self._prepare_evaluation(session_id, conversation_history, question_count,
+                                              evaluation_prompt or EVALUATION_SYSTEM_PROMPT)
+        return await self._run_evaluation(session_id, evaluation)
+
+    async def _run_evaluation(self, session_id: str, evaluation: Dict) -> Dict:
+        if 'result' in evaluation:
+            return evaluation['result']
+
+        cache_key = self._evaluation_cache_key(evaluation)
+        cached = await asyncio.to_thread(evaluation_cache.get, cache_key)  # May read the disk tier
+        if cached is not None:
+            return self._score_evaluation(session_id, cached, evaluation['question_count'])
+
+        try:
+            response = await self._chat_completion(
+                model=EVALUATION_MODEL,
+                messages=self._build_evaluation_messages(evaluation),
+                temperature=EVALUATION_TEMPERATURE,
+                max_tokens=EVALUATION_MAX_TOKENS
+            )
+            content = response.choices[0].message.content
+            await asyncio.to_thread(evaluation_cache.set, cache_key, content)
+
+            return self._score_evaluation(session_id, content, evaluation['question_count'])
+
+        except VendorUnavailableError:
+            raise  # Jobs retry it; /evaluate-ai-session answers 503
+        except Exception as e:
+            logger.error(f"Error evaluating session {session_id}: {str(e)}")
+            return {'error': str(e)}
@@ -0,0 +1,42 @@
+"""create_evaluation_jobs_table
+
+Revision ID: 5f0b7c3e2a91
+Revises: e8c4a1d97b20
+Create Date: 2026-10-17 17:20:44.902175
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f0b7c3e2a91'
+down_revision: Union[str, None] = 'e8c4a1d97b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Queued evaluations so /evaluation-jobs can answer immediately and workers write results once
+    op.create_table('evaluation_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('idempotency_key', sa.String(), nullable=False),
+    sa.Column('session_id', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index('ix_evaluation_jobs_status_created_at', 'evaluation_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_evaluation_jobs_status_created_at', table_name='evaluation_jobs')
+    op.drop_table('evaluation_jobs')
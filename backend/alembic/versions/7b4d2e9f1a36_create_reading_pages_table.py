@@ -0,0 +1,40 @@
+"""create_reading_pages_table
+
+Revision ID: 7b4d2e9f1a36
+Revises: c3e1f0a8b2d4
+Create Date: 2026-10-17 11:03:18.552907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b4d2e9f1a36'
+down_revision: Union[str, None] = 'c3e1f0a8b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Pre-extracted PDF pages so sessions never run PyPDF2 on the request path
+    op.create_table('reading_pages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('pdf_path', sa.String(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('page_number', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('char_count', sa.Integer(), nullable=False),
+    sa.Column('token_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('pdf_path', 'content_hash', 'page_number', name='_reading_page_path_hash_page_uc')
+    )
+    op.create_index(op.f('ix_reading_pages_id'), 'reading_pages', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reading_pages_id'), table_name='reading_pages')
+    op.drop_table('reading_pages')
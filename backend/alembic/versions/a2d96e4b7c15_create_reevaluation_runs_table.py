@@ -0,0 +1,44 @@
+"""create_reevaluation_runs_table
+
+Revision ID: a2d96e4b7c15
+Revises: 5f0b7c3e2a91
+Create Date: 2026-10-17 19:05:31.417620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2d96e4b7c15'
+down_revision: Union[str, None] = '5f0b7c3e2a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Checkpoints for resumable batch re-evaluation of stored sessions
+    op.create_table('reevaluation_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('class_id', sa.Integer(), nullable=True),
+    sa.Column('assignment_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('failed_session_ids', sa.JSON(), nullable=False),
+    sa.Column('last_session_id', sa.Integer(), nullable=False),
+    sa.Column('sessions_per_minute', sa.Float(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reevaluation_runs_id'), 'reevaluation_runs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reevaluation_runs_id'), table_name='reevaluation_runs')
+    op.drop_table('reevaluation_runs')
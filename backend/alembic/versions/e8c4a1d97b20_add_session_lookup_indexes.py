@@ -0,0 +1,37 @@
+"""add_session_lookup_indexes
+
+Revision ID: e8c4a1d97b20
+Revises: 7b4d2e9f1a36
+Create Date: 2026-10-17 15:42:09.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c4a1d97b20'
+down_revision: Union[str, None] = '7b4d2e9f1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPLETED = sa.text("status = 'completed'")
+
+
+def upgrade() -> None:
+    # Composite indexes for the instructor listing (bench_session_indexes.py has the plans).
+    # (class_id, id) supersedes the single-column class_id index.
+    op.create_index('ix_sessions_class_id_id', 'sessions', ['class_id', 'id'], unique=False)
+    op.create_index('ix_sessions_class_id_completed_at', 'sessions', ['class_id', 'completed_at'], unique=False)
+    op.create_index('ix_sessions_assignment_id_id_completed', 'sessions', ['assignment_id', 'id'], unique=False,
+                    postgresql_where=COMPLETED, sqlite_where=COMPLETED)
+    op.drop_index(op.f('ix_sessions_class_id'), table_name='sessions')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_sessions_class_id'), 'sessions', ['class_id'], unique=False)
+    op.drop_index('ix_sessions_assignment_id_id_completed', table_name='sessions')
+    op.drop_index('ix_sessions_class_id_completed_at', table_name='sessions')
+    op.drop_index('ix_sessions_class_id_id', table_name='sessions')
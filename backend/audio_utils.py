@@ -0,0 +1,135 @@
+"""Audio preprocessing for speech-to-text uploads
+
+Browser recordings arrive as high-bitrate WebM/Opus or WAV. Before they are
+sent to the STT vendor they are spooled to a temp file (never held whole in
+memory) and transcoded with ffmpeg to 16 kHz mono Opus, which is all speech
+recognition needs and typically a fraction of the upload size.
+
+If ffmpeg is not installed, fails, or produces a larger file, the original
+upload is sent unchanged.
+"""
+import os
+import time
+import shutil
+import asyncio
+import logging
+import tempfile
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional
+from fastapi import UploadFile
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STT_SAMPLE_RATE = 16000
+STT_OPUS_BITRATE = os.getenv("STT_OPUS_BITRATE", "24k")
+TRANSCODE_TIMEOUT_SECONDS = float(os.getenv("AUDIO_TRANSCODE_TIMEOUT_SECONDS", "20"))
+MAX_UPLOAD_BYTES = int(os.getenv("STT_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))  # Whisper's own limit
+SPOOL_CHUNK_BYTES = 256 * 1024
+
+
+class AudioTooLargeError(Exception):
+    """Raised when an upload exceeds STT_MAX_UPLOAD_BYTES"""
+    pass
+
+
+@lru_cache(maxsize=1)
+def ffmpeg_path() -> Optional[str]:
+    """Resolved ffmpeg binary (FFMPEG_PATH or ffmpeg on PATH), None if unavailable"""
+    return shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+
+
+def _spool(source, suffix: str) -> str:
+    """Copy an upload's file object to a temp file in chunks; returns the path"""
+    size = 0
+    with tempfile.NamedTemporaryFile(prefix="stt_upload_", suffix=suffix, delete=False) as target:
+        try:
+            while True:
+                chunk = source.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise AudioTooLargeError(f"Audio upload exceeds {MAX_UPLOAD_BYTES} bytes")
+                target.write(chunk)
+        except Exception:
+            os.remove(target.name)
+            raise
+    return target.name
+
+
+async def transcode_for_stt(input_path: str, output_path: str) -> bool:
+    """Transcode to 16 kHz mono Opus in an Ogg container; False if it couldn't be done"""
+    binary = ffmpeg_path()
+    if binary is None:
+        return False
+
+    process = await asyncio.create_subprocess_exec(
+        binary, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", input_path,
+        "-vn", "-ac", "1", "-ar", str(STT_SAMPLE_RATE),
+        "-c:a", "libopus", "-b:a", STT_OPUS_BITRATE, "-application", "voip",
+        output_path,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), TRANSCODE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        logger.warning(f"ffmpeg timed out after {TRANSCODE_TIMEOUT_SECONDS}s, sending original audio")
+        return False
+
+    if process.returncode != 0:
+        logger.warning(f"ffmpeg failed ({process.returncode}), sending original audio: {stderr.decode(errors='replace')[-300:]}")
+        return False
+    return True
+
+
+@asynccontextmanager
+async def prepared_audio(upload: UploadFile) -> AsyncIterator[Dict]:
+    """Spool and transcode an upload; yields the file to send and its stats
+
+    Yields {'path', 'filename', 'upload_bytes', 'bytes', 'transcoded', 'preprocess_ms'}.
+    Temp files are removed on exit.
+    """
+    started = time.perf_counter()
+    filename = upload.filename or "audio.webm"
+    suffix = os.path.splitext(filename)[1] or ".webm"
+    paths = [await asyncio.to_thread(_spool, upload.file, suffix)]
+
+    try:
+        audio = {
+            'path': paths[0],
+            'filename': filename,
+            'upload_bytes': os.path.getsize(paths[0]),
+            'transcoded': False
+        }
+
+        output_path = os.path.splitext(paths[0])[0] + ".ogg"
+        paths.append(output_path)
+        if await transcode_for_stt(paths[0], output_path):
+            transcoded_bytes = os.path.getsize(output_path)
+            if transcoded_bytes < audio['upload_bytes']:
+                audio.update({
+                    'path': output_path,
+                    'filename': os.path.splitext(filename)[0] + ".ogg",
+                    'transcoded': True
+                })
+        else:
+            metrics.incr('stt.transcode_skipped')
+
+        audio['bytes'] = os.path.getsize(audio['path'])
+        audio['preprocess_ms'] = (time.perf_counter() - started) * 1000
+        metrics.incr('stt.upload_bytes', audio['upload_bytes'])
+        metrics.incr('stt.sent_bytes', audio['bytes'])
+        metrics.observe('stt.preprocess_ms', audio['preprocess_ms'])
+        logger.info(f"STT audio {filename}: {audio['upload_bytes']} bytes uploaded, {audio['bytes']} bytes to send "
+                    f"({'transcoded' if audio['transcoded'] else 'original'}), preprocessing {audio['preprocess_ms']:.0f}ms")
+        yield audio
+    finally:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Benchmark serial vs process-pool PDF extraction (bypasses the text cache)
+
+Usage:
+    python bench_pdf_extraction.py [repeats]
+"""
+
+import os
+import sys
+import time
+import asyncio
+from pdf_utils import (ASSIGNMENTS_DIR, extract_pages_from_pdf, extract_pages_async,
+                       process_pool_workers, shutdown_process_pool)
+
+PDF_PATHS = ["week1/reading1.pdf", "week1/reading2.pdf"]
+
+def bench_serial(full_paths):
+    return [extract_pages_from_pdf(full_path) for full_path in full_paths]
+
+async def bench_parallel(full_paths):
+    return await asyncio.gather(*[extract_pages_async(full_path) for full_path in full_paths])
+
+async def bench_event_loop_lag(full_paths):
+    """Largest gap between 10ms ticks on the event loop while parallel extraction runs"""
+    max_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal max_lag
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            max_lag = max(max_lag, time.perf_counter() - started - 0.01)
+
+    tick_task = asyncio.create_task(ticker())
+    await bench_parallel(full_paths)
+    done = True
+    await tick_task
+    return max_lag
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    full_paths = [os.path.join(ASSIGNMENTS_DIR, pdf_path) for pdf_path in PDF_PATHS]
+    print(f"📄 {len(full_paths)} PDFs, {process_pool_workers()} pool workers, {repeats} repeats")
+
+    # Warm up the pool so process spawn time isn't counted
+    asyncio.run(bench_parallel(full_paths))
+
+    serial_times, parallel_times = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        serial = bench_serial(full_paths)
+        serial_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        parallel = asyncio.run(bench_parallel(full_paths))
+        parallel_times.append(time.perf_counter() - started)
+
+    print(f"   Serial:   best {min(serial_times):.2f}s")
+    print(f"   Parallel: best {min(parallel_times):.2f}s ({min(serial_times) / min(parallel_times):.2f}x)")
+    print(f"   {'✅' if serial == parallel else '❌'} Identical page text")
+
+    lag = asyncio.run(bench_event_loop_lag(full_paths))
+    print(f"   Max event loop lag during parallel extraction: {lag * 1000:.1f}ms")
+
+    shutdown_process_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Benchmark the session lookup paths before and after the composite indexes
+
+Seeds a throwaway SQLite database with N sessions (default 100,000), then runs
+each lookup with the pre-migration indexes (single-column class_id) and with the
+indexes from models.Session.__table_args__, printing the EXPLAIN plan and median
+latency for both.
+
+Usage:
+    python bench_session_indexes.py [session_count]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import statistics
+from datetime import datetime, timedelta, timezone
+
+# database.py requires a URL; the bench itself uses its own throwaway engine
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/bench_unused.db")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database import Base
+from models import Class, Session
+from session_queries import session_listing_query
+from bench_test_data import populate
+
+NEW_INDEXES = ("ix_sessions_class_id_id", "ix_sessions_class_id_completed_at", "ix_sessions_assignment_id_id_completed")
+RUNS = 50
+
+def lookups(db):
+    """(label, query) for each session lookup path the app uses"""
+    class_id = db.query(Class.id).order_by(Class.id).first().id
+    sample = db.query(Session).filter(Session.class_id == class_id).order_by(Session.id).first()
+    middle_id = db.query(Session.id).filter(Session.class_id == class_id).order_by(Session.id) \
+        .offset(db.query(Session).filter(Session.class_id == class_id).count() // 2).first().id
+    now = datetime.now(timezone.utc)
+
+    return [
+        ("/check-session (student, assignment, status)", db.query(Session).filter(
+            Session.student_id == sample.student_id, Session.assignment_id == sample.assignment_id,
+            Session.status == "completed").limit(1)),
+        ("evaluate recovery (student, assignment)", db.query(Session).filter(
+            Session.student_id == sample.student_id, Session.assignment_id == sample.assignment_id).limit(1)),
+        ("/test-data first page (class)", session_listing_query(db, class_id=class_id).limit(101)),
+        ("/test-data mid cursor (class, id <)", session_listing_query(db, class_id=class_id)
+            .filter(Session.id < middle_id).limit(101)),
+        ("/test-data last 7 days (class, completed_at)", session_listing_query(
+            db, class_id=class_id, completed_after=now - timedelta(days=7)).limit(101)),
+        ("/test-data week a month ago (class, completed_at)", session_listing_query(
+            db, class_id=class_id, completed_after=now - timedelta(days=35),
+            completed_before=now - timedelta(days=28)).limit(101)),
+        ("completed for assignment (partial)", session_listing_query(
+            db, assignment_id=sample.assignment_id, status="completed").limit(101)),
+    ]
+
+def explain(db, query):
+    compiled = query.statement.compile(db.get_bind())
+    params = tuple(compiled.params[name] for name in compiled.positiontup) if compiled.positional else compiled.params
+    prefix = "EXPLAIN QUERY PLAN " if db.get_bind().dialect.name == "sqlite" else "EXPLAIN "
+    rows = db.connection().exec_driver_sql(prefix + str(compiled), params).fetchall()
+    return [row[-1] for row in rows]
+
+def median_ms(query):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        query.all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def measure(db, label):
+    print(f"\n=== {label} ===")
+    results = {}
+    for name, query in lookups(db):
+        elapsed = median_ms(query)
+        results[name] = elapsed
+        print(f"\n{name}: {elapsed:.3f}ms median over {RUNS} runs")
+        for line in explain(db, query):
+            print(f"   {line}")
+    return results
+
+def main():
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    print(f"📊 Populating {session_count} sessions...")
+    populate(db, session_count)
+
+    # Roll back to the pre-migration index set
+    for index in Session.__table__.indexes:
+        if index.name in NEW_INDEXES:
+            index.drop(engine)
+    db.execute(text("CREATE INDEX ix_sessions_class_id ON sessions (class_id)"))
+    db.execute(text("ANALYZE"))
+    db.commit()
+    before = measure(db, "Before (single-column indexes)")
+
+    db.execute(text("DROP INDEX ix_sessions_class_id"))
+    db.commit()
+    for index in Session.__table__.indexes:
+        if index.name in NEW_INDEXES:
+            index.create(engine)
+    db.execute(text("ANALYZE"))
+    db.commit()
+    after = measure(db, "After (composite + partial indexes)")
+
+    print("\n=== Summary ===")
+    for name in before:
+        print(f"   {name:<50} {before[name]:>8.3f}ms -> {after[name]:>8.3f}ms")
+
+    db.close()
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
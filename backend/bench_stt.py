@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark speech-to-text backends over a set of recorded clips
+
+Each clip is preprocessed the way /speech-to-text does it (16 kHz mono Opus when
+ffmpeg is available), then transcribed by each backend. Reports latency and
+real-time factor per clip plus p50/p95 latency and aggregate RTF per backend.
+The local backend's model load is timed separately from the clips.
+
+Usage:
+    python bench_stt.py <clip or directory>... [--backends openai,local]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import statistics
+from dotenv import load_dotenv
+from audio_utils import transcode_for_stt
+from stt_service import LocalWhisperBackend, OpenAISTTBackend, WhisperModel
+
+AUDIO_EXTENSIONS = ('.webm', '.wav', '.mp3', '.m4a', '.ogg', '.flac', '.mp4')
+
+def find_clips(paths):
+    clips = []
+    for path in paths:
+        if os.path.isdir(path):
+            clips += sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            clips.append(path)
+    return clips
+
+def build_backends(names):
+    backends = []
+    for name in names:
+        if name == "openai":
+            import openai
+            backends.append(OpenAISTTBackend(openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))))
+        elif name == "local":
+            if WhisperModel is None:
+                print("⚠️  Skipping local backend: pip install faster-whisper")
+                continue
+            backends.append(LocalWhisperBackend())
+        else:
+            print(f"⚠️  Unknown backend '{name}'")
+    return backends
+
+async def prepare(clip, workdir):
+    """(path, filename, bytes) to send, transcoded when ffmpeg is available"""
+    output = os.path.join(workdir, os.path.splitext(os.path.basename(clip))[0] + ".ogg")
+    if await transcode_for_stt(clip, output) and os.path.getsize(output) < os.path.getsize(clip):
+        return output, os.path.basename(output), os.path.getsize(output)
+    return clip, os.path.basename(clip), os.path.getsize(clip)
+
+async def run(clips, backends):
+    workdir = tempfile.mkdtemp()
+    prepared = [await prepare(clip, workdir) for clip in clips]
+
+    for backend in backends:
+        print(f"\n=== {backend.name} {backend.stats()} ===")
+        started = time.perf_counter()
+        await backend.start()
+        print(f"   start(): {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        latencies, audio_total, latency_total = [], 0.0, 0.0
+        for clip, (path, filename, size) in zip(clips, prepared):
+            try:
+                result = await backend.transcribe(path, filename)
+            except Exception as e:
+                print(f"   ❌ {os.path.basename(clip)}: {e}")
+                continue
+            latencies.append(result['latency_ms'])
+            if result['audio_seconds']:
+                audio_total += result['audio_seconds']
+                latency_total += result['latency_ms'] / 1000
+            rtf = f"{result['rtf']:.2f}" if result['rtf'] is not None else "n/a"
+            audio = f"{result['audio_seconds']:.1f}s" if result['audio_seconds'] else "?"
+            print(f"   {os.path.basename(clip):<28} {size:>9} bytes  {audio:>7} audio  "
+                  f"{result['latency_ms']:>8.0f}ms  RTF {rtf:>5}  {result['text'][:50]!r}")
+
+        if latencies:
+            ordered = sorted(latencies)
+            p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            aggregate_rtf = f"{latency_total / audio_total:.2f}" if audio_total else "n/a"
+            print(f"   {len(latencies)} clips: p50 {statistics.median(latencies):.0f}ms, p95 {p95:.0f}ms, "
+                  f"aggregate RTF {aggregate_rtf}")
+
+def main():
+    load_dotenv()
+    args = sys.argv[1:]
+    names = ["openai", "local"]
+    if "--backends" in args:
+        index = args.index("--backends")
+        names = args[index + 1].split(",")
+        del args[index:index + 2]
+
+    clips = find_clips(args)
+    if not clips:
+        print(__doc__)
+        sys.exit(1)
+
+    print(f"📊 {len(clips)} clips")
+    asyncio.run(run(clips, build_backends(names)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark /test-data: per-row lookups vs the joined keyset query
+
+Builds a throwaway SQLite database with N sessions (default 10,000) and reports
+query count and latency for the old N+1 listing and the new paginated one.
+
+Usage:
+    python bench_test_data.py [session_count]
+"""
+
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# database.py requires a URL; the bench itself uses its own throwaway engine
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/bench_unused.db")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from database import Base
+from models import Assignment, Class, Session, Student
+from session_queries import list_sessions_page
+
+TRANSCRIPT = [{"speaker": "ai" if i % 2 else "student", "text": "A reasonably long turn of conversation. " * 8}
+              for i in range(20)]
+
+def populate(db, session_count: int):
+    classes = [Class(class_name=f"Class {i}", professor_name=f"Prof {i}", access_code=f"C{i:05d}",
+                     professor_password=f"pw{i}") for i in range(5)]
+    db.add_all(classes)
+    db.flush()
+    assignments = [Assignment(title=f"Week {w}", description="", class_id=c.id, week_number=w)
+                   for c in classes for w in range(1, 11)]
+    students = [Student(name=f"Student {i}", class_id=classes[i % 5].id) for i in range(session_count // 10 + 1)]
+    db.add_all(assignments + students)
+    db.flush()
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(session_count):
+        student = students[i // 10]
+        assignment = assignments[(student.class_id - classes[0].id) * 10 + i % 10]
+        rows.append({
+            "student_id": student.id, "assignment_id": assignment.id, "class_id": student.class_id,
+            "status": "completed", "started_at": now - timedelta(minutes=session_count - i + 10),
+            "completed_at": now - timedelta(minutes=session_count - i),
+            "full_transcript": TRANSCRIPT, "final_score": i % 3, "score_category": ["red", "yellow", "green"][i % 3],
+            "ai_feedback": "Overall: Yellow"
+        })
+    db.bulk_insert_mappings(Session, rows)
+    db.commit()
+
+def legacy_listing(db, class_id):
+    """The original /test-data implementation: one query per session for each related row"""
+    result = []
+    for session in db.query(Session).filter(Session.class_id == class_id).all():
+        student = db.query(Student).filter(Student.id == session.student_id).first()
+        assignment = db.query(Assignment).filter(Assignment.id == session.assignment_id).first()
+        class_obj = db.query(Class).filter(Class.id == session.class_id).first()
+        result.append({
+            "session_id": session.id,
+            "student_name": student.name if student else "Unknown",
+            "assignment_title": assignment.title if assignment else "Unknown",
+            "class_name": class_obj.class_name if class_obj else "Unknown",
+            "transcript": session.full_transcript
+        })
+    return result
+
+def all_pages(db, class_id):
+    sessions, cursor = list_sessions_page(db, class_id=class_id, limit=500)
+    while cursor is not None:
+        page, cursor = list_sessions_page(db, cursor=cursor, class_id=class_id, limit=500)
+        sessions += page
+    return sessions
+
+def measure(label, engine, func):
+    queries = []
+    listener = lambda *args: queries.append(1)
+    event.listen(engine, "before_cursor_execute", listener)
+    started = time.perf_counter()
+    rows = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    event.remove(engine, "before_cursor_execute", listener)
+    print(f"   {label:<34} {len(rows):>6} rows  {len(queries):>6} queries  {elapsed:>9.1f}ms")
+
+def main():
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    print(f"📊 Populating {session_count} sessions...")
+    populate(db, session_count)
+    class_id = db.query(Class.id).first().id
+    db.expire_all()
+
+    print(f"\nClass {class_id} listing:")
+    measure("Legacy N+1 (with transcripts)", engine, lambda: legacy_listing(db, class_id))
+    db.expire_all()
+    measure("Joined, first page (100)", engine, lambda: list_sessions_page(db, class_id=class_id)[0])
+    measure("Joined, all pages (500/page)", engine, lambda: all_pages(db, class_id))
+    measure("Joined, first page + transcripts", engine,
+            lambda: list_sessions_page(db, class_id=class_id, include_transcripts=True)[0])
+
+    db.close()
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Small caching helpers shared by the backend services"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different strings share one cache entry"""
+    return " ".join(text.split())
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by entry count (and optionally bytes)
+
+    Entries idle for longer than ttl_seconds are expired lazily on access.
+    When max_bytes is set, sizeof(value) is charged per entry and the least
+    recently used entries are dropped until the total fits.
+    on_evict(key, value, reason) is called outside the lock for every entry
+    dropped because of capacity ('capacity') or idleness ('expired').
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: Optional[float] = None,
+                 on_evict: Optional[Callable[[Hashable, Any, str], None]] = None,
+                 max_bytes: Optional[int] = None, sizeof: Callable[[Any], int] = len):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._sizes = {}
+        self._data = OrderedDict()  # key -> (value, last_access)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _collect_expired(self, now: float) -> List[Tuple[Hashable, Any, str]]:
+        """Pop idle entries from the LRU end. Caller must hold the lock"""
+        evicted = []
+        if self.ttl_seconds is None:
+            return evicted
+        while self._data:
+            key, (value, last_access) = next(iter(self._data.items()))
+            if now - last_access < self.ttl_seconds:
+                break
+            self._data.popitem(last=False)
+            self.bytes -= self._sizes.pop(key, 0)
+            self.expirations += 1
+            evicted.append((key, value, 'expired'))
+        return evicted
+
+    def _over_capacity(self) -> bool:
+        if len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.bytes > self.max_bytes and len(self._data) > 1
+
+    def _notify(self, evicted: List[Tuple[Hashable, Any, str]]):
+        if self.on_evict:
+            for key, value, reason in evicted:
+                self.on_evict(key, value, reason)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._collect_expired(now)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                value = default
+            else:
+                self._data[key] = (entry[0], now)
+                self._data.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+        self._notify(evicted)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._collect_expired(now)
+            self._data[key] = (value, now)
+            self._data.move_to_end(key)
+            if self.max_bytes is not None:
+                self.bytes += self.sizeof(value) - self._sizes.get(key, 0)
+                self._sizes[key] = self.sizeof(value)
+            while self._over_capacity():
+                old_key, (old_value, _) = self._data.popitem(last=False)
+                self.bytes -= self._sizes.pop(old_key, 0)
+                self.evictions += 1
+                evicted.append((old_key, old_value, 'capacity'))
+        self._notify(evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            self.bytes -= self._sizes.pop(key, 0)
+        return default if entry is None else entry[0]
+
+    def expire(self):
+        """Evict idle entries now instead of waiting for the next access"""
+        with self._lock:
+            evicted = self._collect_expired(time.monotonic())
+        self._notify(evicted)
+
+    def values(self) -> List[Any]:
+        with self._lock:
+            return [value for value, _ in self._data.values()]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self._data),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+class DiskCache:
+    """Size-bounded on-disk LRU for bytes values, shared by all workers on a host
+
+    Keys must be filesystem-safe (e.g. hex digests). Reads refresh the file's
+    mtime, and when the directory grows past max_bytes the least recently used
+    files are deleted. Writes go through a temp file and os.replace, so readers
+    never see partial values.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self.bytes = sum(size for _, size, _ in self._scan())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) for every cached file, oldest first"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(self.suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # Removed by another worker
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(files)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(value)
+        with self._lock:
+            try:
+                replaced = os.path.getsize(path)  # Overwriting a key frees the old file
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self.bytes += len(value) - replaced
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        try:
+            size = os.path.getsize(self._path(key))
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.bytes -= size
+
+    def _evict(self):
+        """Delete least recently used files until under max_bytes. Caller holds the lock"""
+        # Other workers write to the same directory, so recount from disk
+        files = self._scan()
+        self.bytes = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self.bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self.bytes -= size
+            self.evictions += 1
+        logger.info(f"Disk cache {self.directory} trimmed to {self.bytes} bytes")
+
+    def stats(self) -> Dict:
+        return {
+            'directory': self.directory,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+class TieredCache:
+    """In-memory LRU in front of a disk LRU, for values addressed by hex digest
+
+    Disk hits are promoted to memory. encode/decode, if given, convert values to
+    and from the bytes stored on disk. Hits per tier and misses are counted under
+    <name>.hits.memory, <name>.hits.disk and <name>.misses. The disk tier does
+    blocking file I/O, so async callers should go through asyncio.to_thread.
+    """
+
+    def __init__(self, name: str, memory: LRUCache, disk: DiskCache,
+                 encode: Optional[Callable[[Any], bytes]] = None, decode: Optional[Callable[[bytes], Any]] = None):
+        self.name = name
+        self.memory = memory
+        self.disk = disk
+        self.encode = encode
+        self.decode = decode
+        metrics.register_gauge(f'{name}.hit_rate', self.hit_rate)
+        metrics.register_gauge(f'{name}.memory_bytes', lambda: self.memory.bytes)
+        metrics.register_gauge(f'{name}.disk_bytes', lambda: self.disk.bytes)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            metrics.incr(f'{self.name}.hits.memory')
+            return value
+
+        data = self.disk.get(key)
+        if data is not None:
+            metrics.incr(f'{self.name}.hits.disk')
+            value = self.decode(data) if self.decode else data
+            self.memory.set(key, value)
+            return value
+
+        metrics.incr(f'{self.name}.misses')
+        return None
+
+    def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        self.disk.set(key, self.encode(value) if self.encode else value)
+
+    def hit_rate(self) -> float:
+        hits = metrics.get(f'{self.name}.hits.memory') + metrics.get(f'{self.name}.hits.disk')
+        total = hits + metrics.get(f'{self.name}.misses')
+        return round(hits / total, 3) if total else 0.0
+
+    def stats(self) -> Dict:
+        return {
+            'hit_rate': self.hit_rate(),
+            'memory': self.memory.stats(),
+            'disk': self.disk.stats()
+        }
@@ -1,18 +1,38 @@
-"""Conversation management with smart truncation"""
-from typing import List, Dict, Optional
+"""Conversation management with token-budgeted history"""
+from typing import List, Dict, Optional, Tuple
 import logging
+from token_utils import (MESSAGE_OVERHEAD_TOKENS, count_message_tokens, count_tokens, prompt_token_budget,
+                         token_counter_name)
 
 logger = logging.getLogger(__name__)
 
+# Most recent exchanges kept verbatim in the rolling summary
+SUMMARY_MAX_TOPICS = 12
+# Older topics are merged into the summary text, shortened, up to a total length
+SUMMARY_MERGED_TOPIC_CHARS = 100
+SUMMARY_TEXT_MAX_CHARS = 4000
+# Topics that accumulate before a (background) LLM compaction is worthwhile
+SUMMARY_COMPACT_AFTER_TOPICS = 6
+
 class ConversationManager:
-    """Manages conversation history with smart truncation to optimize token usage"""
+    """Manages conversation history, packing each request under a per-model token budget"""
     
-    def __init__(self, max_recent_messages: int = 8, total_session_minutes: int = 10):
-        self.max_recent_messages = max_recent_messages
+    def __init__(self, total_session_minutes: int = 10):
         self.question_count = 0
         self.total_session_minutes = total_session_minutes
         self.phase = "opening"  # opening, exploration, synthesis, wrap_up
         
+        # Rolling summary of history that has aged out of the recent window
+        self.summarized_count = 0  # Messages of the history folded into the summary
+        self.summary_text = ""  # Compacted prose summary (from the optional LLM compaction)
+        self.summary_topics = []  # One line per folded exchange, not yet compacted
+        self.topic_offset = 0  # Sequence number of summary_topics[0]
+        
+        # Running token count of the recent window (not serialized, rebuilt on demand)
+        self._counted_until = 0
+        self._window_tokens = 0
+        self._count_model = None
+        
     def update_phase(self, elapsed_seconds: int):
         """Update conversation phase based on elapsed time"""
         self.question_count += 1
@@ -31,77 +51,133 @@ class ConversationManager:
         else:
             # Final 30 seconds: Wrap up
             self.phase = "wrap_up"
+
+    def to_dict(self) -> Dict:
+        """Serialize manager state so a session can be stored outside this process"""
+        return {
+            'question_count': self.question_count,
+            'total_session_minutes': self.total_session_minutes,
+            'phase': self.phase,
+            'summarized_count': self.summarized_count,
+            'summary_text': self.summary_text,
+            'summary_topics': self.summary_topics,
+            'topic_offset': self.topic_offset
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ConversationManager":
+        """Rebuild a manager from the output of to_dict"""
+        manager = cls(total_session_minutes=data.get('total_session_minutes', 10))
+        manager.question_count = data.get('question_count', 0)
+        manager.phase = data.get('phase', "opening")
+        manager.summarized_count = data.get('summarized_count', 0)
+        manager.summary_text = data.get('summary_text', "")
+        manager.summary_topics = list(data.get('summary_topics', []))
+        manager.topic_offset = data.get('topic_offset', 0)
+        manager._counted_until = manager.summarized_count
+        return manager
     
-    def get_truncated_history(self, full_history: List[Dict]) -> List[Dict]:
+    def pack_history(self, full_history: List[Dict], token_budget: int,
+                     model: Optional[str] = None) -> Tuple[Optional[Dict], List[Dict], int]:
         """
-        Intelligently truncate conversation history to manage tokens while preventing repetition
+        Fit the recent window of history in token_budget, folding older exchanges into the rolling summary
         
         Strategy:
-        - Questions 1-4: Send full history (critical for coherence)
-        - Questions 5-6: Keep last 8-10 messages in full, summarize older ones
-        - Always preserve complete recent exchanges (user + assistant pairs)
+        - While the whole history fits, send everything
+        - Otherwise fold the oldest complete exchanges (user + assistant pairs) into the
+          summary until the rest fits; the last exchange is always kept
+        
+        Folding is permanent, and only messages added since the last call are counted,
+        so per-turn work does not grow with conversation length.
+        Returns (summary message or None, recent messages, tokens used by both).
         """
+        if len(full_history) < self._counted_until or model != self._count_model:
+            # History replaced or different tokenizer: recount the recent window
+            self.summarized_count = min(self.summarized_count, len(full_history))
+            self._counted_until = self.summarized_count
+            self._window_tokens = 0
+            self._count_model = model
         
-        if self.question_count <= 4:
-            # Early conversation: send everything to maintain coherence
-            return full_history
+        for message in full_history[self._counted_until:]:
+            self._window_tokens += count_message_tokens(message, model)
+        self._counted_until = len(full_history)
         
-        else:
-            # Mid/Late conversation: preserve recent exchanges
-            if len(full_history) <= self.max_recent_messages:
-                return full_history
-            
-            # Keep recent complete exchanges
-            recent_messages = full_history[-self.max_recent_messages:]
-            early_messages = full_history[:-self.max_recent_messages]
-            
-            # Only summarize if there are enough early messages to warrant it
-            if len(early_messages) >= 4:
-                summary = self._create_summary(early_messages)
-                return [summary] + recent_messages
-            else:
-                # If not many early messages, just keep everything
-                return full_history
+        summary = self.summary_message()
+        summary_tokens = count_message_tokens(summary, model) if summary else 0
+        while len(full_history) - self.summarized_count > 2 and summary_tokens + self._window_tokens > token_budget:
+            self._fold_exchange(full_history, model)
+            summary = self.summary_message()
+            summary_tokens = count_message_tokens(summary, model)
+        
+        return summary, full_history[self.summarized_count:], summary_tokens + self._window_tokens
     
-    def _create_summary(self, messages: List[Dict]) -> Dict:
-        """Create a summary of conversation messages"""
-        # Group messages into Q&A pairs and extract themes discussed
-        topics_covered = []
-
-        for i, msg in enumerate(messages):
-            if msg['role'] == 'assistant':
-                # Dynamically track actual concepts from the conversation
-                # Instead of looking for specific philosophers, extract what was actually discussed
-                content = msg.get('content', '')
-
-                # Extract topics discussed based on actual conversation
-                if i > 0 and messages[i-1]['role'] == 'user':
-                    user_response = messages[i-1]['content'][:80]
-                    ai_question = msg['content'][:80]
-                    topics_covered.append(f"Discussed: {user_response.strip()}")
+    def _fold_exchange(self, full_history: List[Dict], model: Optional[str] = None):
+        """Move the oldest exchange of the recent window into the summary"""
+        start = self.summarized_count
+        end = start + 2 if full_history[start]['role'] == 'user' and start + 2 <= len(full_history) else start + 1
+        exchange = full_history[start:end]
+        
+        for message in exchange:
+            self._window_tokens -= count_message_tokens(message, model)
+        self.summarized_count = end
+        
+        user_text = " ".join(m['content'] for m in exchange if m['role'] == 'user')[:120].strip()
+        tutor_text = " ".join(m['content'] for m in exchange if m['role'] == 'assistant')[:120].strip()
+        if user_text:
+            self.summary_topics.append(f"Discussed: {user_text}" + (f" (tutor followed up: {tutor_text})" if tutor_text else ""))
+        if len(self.summary_topics) > SUMMARY_MAX_TOPICS:
+            # Without an LLM compaction the oldest topic is merged into the summary text rather than lost
+            oldest = self.summary_topics.pop(0)[:SUMMARY_MERGED_TOPIC_CHARS].strip()
+            merged = f"{self.summary_text}\n- {oldest}" if self.summary_text else f"- {oldest}"
+            self.summary_text = merged[:SUMMARY_TEXT_MAX_CHARS]
+            self.topic_offset += 1
+    
+    def summary_message(self) -> Optional[Dict]:
+        """System message with the rolling summary, or None if nothing has been folded yet"""
+        if not self.summary_text and not self.summary_topics:
+            return None
         
-        # Create concise summary with repetition prevention
         summary_parts = []
-        if topics_covered:
-            summary_parts.append("Topics already covered: " + "; ".join(topics_covered[-3:]))
-
-        summary_text = "\n".join(summary_parts) if summary_parts else "Early conversation about the readings"
-
+        if self.summary_text:
+            summary_parts.append(self.summary_text)
+        if self.summary_topics:
+            summary_parts.append("Topics already covered:\n" + "\n".join(f"- {topic}" for topic in self.summary_topics))
+        summary_text = "\n".join(summary_parts)
+        
         return {
             "role": "system",
             "content": f"[SUMMARY OF EARLIER CONVERSATION]\n{summary_text}\nBuild on what was already discussed without repeating the same questions.\n[END SUMMARY]"
         }
     
-    def format_for_api(self, system_prompt: str, pdf_context: str, 
-                       conversation_history: List[Dict], new_message: str,
-                       elapsed_seconds: int = 0, final_question: bool = False) -> List[Dict]:
-        """Format the complete message list for OpenAI API"""
+    def compaction_input(self) -> Optional[Tuple[str, int]]:
+        """Text for an LLM to condense the summary, and the topic sequence number it covers up to
+        
+        None until enough topics have accumulated to be worth a compaction call.
+        """
+        if len(self.summary_topics) < SUMMARY_COMPACT_AFTER_TOPICS:
+            return None
+        parts = []
+        if self.summary_text:
+            parts.append(f"Summary so far:\n{self.summary_text}")
+        parts.append("Newer exchanges:\n" + "\n".join(f"- {topic}" for topic in self.summary_topics))
+        return "\n\n".join(parts), self.topic_offset + len(self.summary_topics)
+    
+    def apply_compaction(self, summary_text: str, through: int):
+        """Replace the summary text and drop the topics it now covers"""
+        covered = through - self.topic_offset
+        if covered <= 0:
+            return
+        self.summary_text = summary_text
+        self.summary_topics = self.summary_topics[covered:]
+        self.topic_offset = through
+    
+    def format_session_status(self, elapsed_seconds: int = 0, final_question: bool = False) -> str:
+        """Per-turn status (time, phase, question count) for the trailing system message"""
         
         minutes_elapsed = elapsed_seconds / 60.0
         remaining_minutes = max(0, self.total_session_minutes - minutes_elapsed)
         
-        # Add time context to system prompt
-        time_context = f"\n\n## CURRENT SESSION STATUS:\n"
+        time_context = f"## CURRENT SESSION STATUS:\n"
         time_context += f"- Time elapsed: {minutes_elapsed:.1f} minutes\n"
         time_context += f"- Time remaining: {remaining_minutes:.1f} minutes\n"
         time_context += f"- Current phase: {self.phase}\n"
@@ -121,21 +197,95 @@ class ConversationManager:
         elif self.phase == "wrap_up":
             time_context += "\nFocus: Provide a brief reflective synthesis (no new questions)."
         
-        # Combine system prompt with PDF context and time context
-        full_system_prompt = f"{system_prompt}\n\n## READING MATERIALS:\n{pdf_context}{time_context}"
+        return time_context
+    
+    def format_for_api(self, system_prompt: str, pdf_context: str, 
+                       conversation_history: List[Dict], new_message: str,
+                       elapsed_seconds: int = 0, final_question: bool = False,
+                       reading_excerpts: Optional[str] = None) -> List[Dict]:
+        """Format the complete message list for OpenAI API"""
+        return self.pack_messages(
+            system_prompt, pdf_context, conversation_history, new_message,
+            elapsed_seconds=elapsed_seconds, final_question=final_question,
+            reading_excerpts=reading_excerpts
+        )[0]
+    
+    def pack_messages(self, system_prompt: str, pdf_context: str,
+                      conversation_history: List[Dict], new_message: str,
+                      elapsed_seconds: int = 0, final_question: bool = False,
+                      reading_excerpts: Optional[str] = None, model: Optional[str] = None,
+                      token_budget: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+        """Build the OpenAI message list under the model's prompt token budget
         
-        messages = [
-            {"role": "system", "content": full_system_prompt}
-        ]
+        Returns (messages, token breakdown). The system prompt, readings, new
+        message and status are always sent; history fills whatever budget is left.
         
-        # Add truncated conversation history
-        truncated_history = self.get_truncated_history(conversation_history)
-        messages.extend(truncated_history)
+        Layout is ordered for the provider's prompt prefix cache: the first system
+        message (tutor prompt + readings) is byte-identical on every turn of a session
+        and the history only grows at the end. The per-turn session status goes in a
+        trailing system message after the new user message, so it never breaks the
+        cached prefix.
         
-        # Add the new user message
-        messages.append({"role": "user", "content": new_message})
+        With reading_excerpts (retrieved per turn for long readings, see
+        reading_index.py) the full text is left out and the excerpts are sent in
+        the trailing message instead.
+        """
+        
+        # Stable prefix: system prompt with PDF context only
+        if reading_excerpts is None:
+            full_system_prompt = f"{system_prompt}\n\n## READING MATERIALS:\n{pdf_context}"
+        else:
+            full_system_prompt = (f"{system_prompt}\n\n## READING MATERIALS:\n"
+                                  "The reading is long, so the passages most relevant to the current "
+                                  "discussion are provided with each turn under RELEVANT READING EXCERPTS.")
+        system_message = {"role": "system", "content": full_system_prompt}
+        user_message = {"role": "user", "content": new_message}
+        
+        # Dynamic status (and this turn's excerpts) last
+        session_status = self.format_session_status(elapsed_seconds, final_question)
+        status = session_status
+        if reading_excerpts is not None:
+            status = f"## RELEVANT READING EXCERPTS:\n{reading_excerpts}\n\n{session_status}"
+        status_message = {"role": "system", "content": status}
+        
+        # History gets whatever the fixed messages leave of the budget
+        budget = token_budget or prompt_token_budget(model)
+        system_tokens = count_message_tokens(system_message, model)
+        status_tokens = count_message_tokens(status_message, model)
+        fixed_tokens = system_tokens + count_message_tokens(user_message, model) + status_tokens
+        summary, history, history_tokens = self.pack_history(conversation_history, budget - fixed_tokens, model)
+        
+        messages = [system_message]
+        if summary:
+            messages.append(summary)
+        messages.extend(history)
+        messages.append(user_message)
+        messages.append(status_message)
+        
+        summary_tokens = count_message_tokens(summary, model) if summary else 0
+        system_prompt_tokens = count_tokens(system_prompt, model)
+        session_status_tokens = count_tokens(session_status, model)
+        # Readings are whatever their message holds beyond the prompt or status, so they are never counted twice
+        if reading_excerpts is None:
+            readings_tokens = system_tokens - MESSAGE_OVERHEAD_TOKENS - system_prompt_tokens
+        else:
+            readings_tokens = status_tokens - MESSAGE_OVERHEAD_TOKENS - session_status_tokens
+        breakdown = {
+            'model': model,
+            'counter': token_counter_name(model),
+            'budget': budget,
+            'system_prompt': system_prompt_tokens,
+            'readings': readings_tokens,
+            'summary': summary_tokens,
+            'history': history_tokens - summary_tokens,
+            'history_messages': len(history),
+            'dropped_messages': len(conversation_history) - len(history),
+            'user_message': count_tokens(new_message, model),
+            'session_status': session_status_tokens,
+            'total': fixed_tokens + history_tokens
+        }
         
-        return messages
+        return messages, breakdown
     
     def should_wrap_up(self) -> bool:
         """Check if conversation should wrap up"""
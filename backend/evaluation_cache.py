@@ -0,0 +1,55 @@
+"""Content-addressed cache for evaluation LLM output
+
+A retried or double-submitted evaluation of the same conversation costs nothing.
+Keys hash the whitespace-normalized transcript, the evaluation prompt and the
+generation settings (model, temperature, max_tokens), so a changed rubric or
+model never reuses an old grade. The cached value is the raw evaluation text;
+scoring still runs on every call. Entries live in an in-memory LRU backed by a
+size-bounded on-disk LRU shared by all workers on the host.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from typing import Dict, List
+from caching import DiskCache, LRUCache, TieredCache, normalize_text
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def evaluation_cache_key(conversation_history: List[Dict], evaluation_prompt: str, model: str,
+                         temperature: float, max_tokens: int) -> str:
+    """Stable hex digest for one evaluation request"""
+    transcript = json.dumps([[msg['role'], normalize_text(msg['content'])] for msg in conversation_history])
+    payload = json.dumps({
+        'transcript': _digest(transcript),
+        'prompt': _digest(normalize_text(evaluation_prompt)),
+        'model': model,
+        'temperature': temperature,
+        'max_tokens': max_tokens
+    }, sort_keys=True)
+    return _digest(payload)
+
+
+class EvaluationCache(TieredCache):
+    """Evaluation text cache: in-memory LRU in front of a disk LRU"""
+
+    def __init__(self, memory_max_entries: int, disk_dir: str, disk_max_bytes: int):
+        super().__init__(
+            'evaluation_cache',
+            LRUCache(max_entries=memory_max_entries),
+            DiskCache(disk_dir, max_bytes=disk_max_bytes, suffix=".txt"),
+            encode=lambda text: text.encode('utf-8'),
+            decode=lambda data: data.decode('utf-8')
+        )
+
+
+def create_evaluation_cache() -> EvaluationCache:
+    """Build the evaluation cache from EVALUATION_CACHE_* environment variables"""
+    return EvaluationCache(
+        memory_max_entries=int(os.getenv("EVALUATION_CACHE_MEMORY_ENTRIES", "2048")),
+        disk_dir=os.getenv("EVALUATION_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "professr_evaluation_cache"),
+        disk_max_bytes=int(os.getenv("EVALUATION_CACHE_DISK_MB", "64")) * 1024 * 1024
+    )
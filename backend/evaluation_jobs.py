@@ -0,0 +1,407 @@
+"""Queued end-of-session evaluations
+
+A timed exam ends for a whole class at the same minute. Instead of holding one
+long request per student open against the server timeout, /evaluation-jobs
+records a job (deduplicated by idempotency key) and returns its id right away.
+A bounded pool of asyncio workers runs the evaluations and clients long-poll
+GET /evaluation-jobs/{id} for the result.
+
+Jobs live in the evaluation_jobs table. Workers claim them with a conditional
+UPDATE, so with several processes each job still runs in one place at a time.
+Jobs left queued by another process or stuck 'running' after a crash are picked
+up by a periodic sweep. The Session row itself is written by record_evaluation,
+which is safe to run more than once for the same session, and concurrent
+evaluations of one student's assignment share a single LLM call
+(evaluate_and_record).
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from metrics import metrics
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_WORKERS = int(os.getenv("EVALUATION_WORKERS", "4"))
+EVALUATION_MAX_ATTEMPTS = int(os.getenv("EVALUATION_MAX_ATTEMPTS", "3"))
+EVALUATION_SWEEP_SECONDS = float(os.getenv("EVALUATION_SWEEP_SECONDS", "30"))
+EVALUATION_STALE_SECONDS = float(os.getenv("EVALUATION_STALE_SECONDS", "300"))
+FINISHED_STATUSES = ('completed', 'failed')
+
+evaluation_flight = SingleFlight('evaluate')
+
+
+class EvaluationError(Exception):
+    """Evaluation can't be recorded; status_code is the matching HTTP status
+
+    retryable is False when running the job again would fail the same way.
+    """
+
+    def __init__(self, message: str, status_code: int = 500, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+def parse_session_id(session_id: str) -> Tuple[int, int]:
+    """(student_id, assignment_id) from an AI session id"""
+    try:
+        parts = session_id.split('_')
+        return int(parts[1]), int(parts[2])
+    except (IndexError, ValueError):
+        raise EvaluationError("Invalid session ID format", 400)
+
+
+def _session_result(session, question_count) -> Dict:
+    return {
+        "session_id": session.id,
+        "score": session.final_score,
+        "category": session.score_category,
+        "feedback": session.ai_feedback,
+        "question_count": question_count
+    }
+
+
+def existing_evaluation(db, session_id: str) -> Optional[Dict]:
+    """The stored evaluation for this student and assignment, if there is one
+
+    Checked before calling the LLM so repeat requests never pay for a new evaluation.
+    """
+    from models import Session
+
+    student_id, assignment_id = parse_session_id(session_id)
+    existing_session = db.query(Session).filter(
+        Session.student_id == student_id,
+        Session.assignment_id == assignment_id
+    ).first()
+    if existing_session is None:
+        return None
+    metrics.incr('evaluation.existing_session_hits')
+    question_count = len([turn for turn in existing_session.full_transcript or [] if turn.get('speaker') == 'ai'])
+    return _session_result(existing_session, question_count)
+
+
+def record_evaluation(db, ai_service, session_id: str, evaluation: Dict) -> Dict:
+    """Write an evaluation to the sessions table exactly once; returns the response body
+
+    A repeat call (double-click, retried job) returns the stored row instead of
+    adding another. The (student_id, assignment_id) unique constraint settles
+    concurrent inserts.
+    """
+    from models import Session, Student
+
+    if 'error' in evaluation:
+        # Vendor failures are worth retrying; a session with no conversation isn't
+        raise EvaluationError(evaluation['error'], 400, retryable=evaluation['error'] != 'Session not found')
+
+    student_id, assignment_id = parse_session_id(session_id)
+    student = db.query(Student).filter(Student.id == student_id).first()
+    if not student:
+        raise EvaluationError("Student not found", 404)
+
+    existing_session = db.query(Session).filter(
+        Session.student_id == student_id,
+        Session.assignment_id == assignment_id
+    ).first()
+    if existing_session:
+        logger.info(f"Session already exists for student {student_id}, assignment {assignment_id}. Returning existing evaluation.")
+        return _session_result(existing_session, evaluation.get('question_count', 0))
+
+    new_session = Session(
+        student_id=student_id,
+        assignment_id=assignment_id,
+        class_id=student.class_id,
+        status="completed",
+        started_at=datetime.now(),
+        completed_at=datetime.now(),
+        full_transcript=ai_service.get_formatted_transcript(session_id),
+        final_score=evaluation.get('score', 75),
+        score_category=evaluation.get('category', 'yellow'),
+        ai_feedback=evaluation.get('feedback', 'No feedback available')
+    )
+    db.add(new_session)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request inserted the same session between our check and commit
+        db.rollback()
+        existing_session = db.query(Session).filter(
+            Session.student_id == student_id,
+            Session.assignment_id == assignment_id
+        ).one()
+        return _session_result(existing_session, evaluation.get('question_count', 0))
+    db.refresh(new_session)
+
+    # Don't clean up AI session - hibernate it so it stays available for re-evaluation without holding RAM
+    ai_service.sessions.hibernate(session_id)
+    logger.info(f"Session {session_id} evaluation complete - hibernated for potential re-access")
+    return _session_result(new_session, evaluation.get('question_count'))
+
+
+async def evaluate_and_record(ai_service, session_id: str, session_factory=None) -> Dict:
+    """Evaluate a session and record it, unless it already has been; returns the response body
+
+    Concurrent calls for the same student and assignment (the inline endpoint,
+    a queued job, a double-click) wait on one evaluation instead of each calling
+    the LLM.
+    """
+    if session_factory is None:
+        from database import SessionLocal
+        session_factory = SessionLocal
+
+    async def evaluate():
+        with session_factory() as db:
+            result = await asyncio.to_thread(existing_evaluation, db, session_id)
+            if result is not None:
+                logger.info(f"Session {session_id} already evaluated. Returning existing evaluation.")
+                return result
+            # Pass the db session for transcript recovery
+            evaluation = await ai_service.evaluate_session_async(session_id, db)
+            return await asyncio.to_thread(record_evaluation, db, ai_service, session_id, evaluation)
+
+    result, _ = await evaluation_flight.do(parse_session_id(session_id), evaluate)
+    return result
+
+
+def job_to_dict(job) -> Dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "session_id": job.session_id,
+        "attempts": job.attempts,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
+    }
+
+
+class EvaluationWorkerPool:
+    """At most `workers` evaluations in flight per process, fed from an in-process queue
+
+    Started and stopped by the app lifespan in main.py.
+    """
+
+    def __init__(self, ai_service, workers: Optional[int] = None, session_factory=None):
+        self.ai_service = ai_service
+        self.workers = workers or EVALUATION_WORKERS
+        self._session_factory = session_factory
+        self.queue = None
+        self._queued = set()
+        self._tasks = []
+        self._running = 0
+        self._finished_events = weakref.WeakValueDictionary()
+
+        metrics.register_gauge('evaluation_jobs.queue_depth', lambda: self.queue.qsize() if self.queue else 0)
+        metrics.register_gauge('evaluation_jobs.running', lambda: self._running)
+
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    async def start(self):
+        if self._tasks:
+            return
+        self.queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+        logger.info(f"Started {self.workers} evaluation workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _put(self, job_id: str):
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self.queue.put_nowait(job_id)
+
+    # Job table access (run in threads)
+
+    def _create_job(self, session_id: str, idempotency_key: str) -> Tuple[Dict, bool]:
+        """(job, whether it needs queueing); an existing job for the key is reused"""
+        from models import EvaluationJob
+
+        with self.session_factory() as db:
+            job = db.query(EvaluationJob).filter(EvaluationJob.idempotency_key == idempotency_key).first()
+            if job is None:
+                job = EvaluationJob(id=uuid.uuid4().hex, idempotency_key=idempotency_key, session_id=session_id,
+                                    status='queued', attempts=0)
+                db.add(job)
+                try:
+                    db.commit()
+                    return job_to_dict(job), True
+                except IntegrityError:
+                    db.rollback()
+                    job = db.query(EvaluationJob).filter(EvaluationJob.idempotency_key == idempotency_key).one()
+
+            if job.status == 'failed':
+                # Asking again for a failed evaluation retries it
+                job.status, job.attempts, job.error, job.finished_at = 'queued', 0, None, None
+                db.commit()
+                return job_to_dict(job), True
+            return job_to_dict(job), False
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        from models import EvaluationJob
+
+        with self.session_factory() as db:
+            job = db.get(EvaluationJob, job_id)
+            return job_to_dict(job) if job else None
+
+    def _claim(self, job_id: str) -> Optional[Dict]:
+        """Move a queued job to running; None if another worker got it first"""
+        from models import EvaluationJob
+
+        with self.session_factory() as db:
+            claimed = db.query(EvaluationJob).filter(
+                EvaluationJob.id == job_id,
+                EvaluationJob.status == 'queued'
+            ).update({
+                'status': 'running',
+                'started_at': datetime.now(timezone.utc),
+                'attempts': EvaluationJob.attempts + 1
+            }, synchronize_session=False)
+            db.commit()
+            return job_to_dict(db.get(EvaluationJob, job_id)) if claimed else None
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        from models import EvaluationJob
+
+        with self.session_factory() as db:
+            db.query(EvaluationJob).filter(EvaluationJob.id == job_id).update({
+                'status': status,
+                'result': result,
+                'error': error,
+                'finished_at': datetime.now(timezone.utc) if status in FINISHED_STATUSES else None
+            }, synchronize_session=False)
+            db.commit()
+
+    def _pending_job_ids(self):
+        """Queued jobs plus running jobs whose worker is presumed dead (reset to queued)"""
+        from models import EvaluationJob
+
+        with self.session_factory() as db:
+            stale_before = datetime.now(timezone.utc) - timedelta(seconds=EVALUATION_STALE_SECONDS)
+            reset = db.query(EvaluationJob).filter(
+                EvaluationJob.status == 'running',
+                EvaluationJob.started_at < stale_before
+            ).update({'status': 'queued'}, synchronize_session=False)
+            db.commit()
+            if reset:
+                logger.warning(f"Requeued {reset} stale evaluation jobs")
+            rows = db.query(EvaluationJob.id).filter(EvaluationJob.status == 'queued') \
+                .order_by(EvaluationJob.created_at).all()
+            return [row.id for row in rows]
+
+    # Async API
+
+    async def enqueue(self, session_id: str, idempotency_key: Optional[str] = None) -> Dict:
+        """Create (or reuse) the job for this evaluation and queue it"""
+        job, needs_queueing = await asyncio.to_thread(self._create_job, session_id, idempotency_key or session_id)
+        if needs_queueing:
+            metrics.incr('evaluation_jobs.enqueued')
+            self._put(job['job_id'])
+        else:
+            metrics.incr('evaluation_jobs.deduplicated')
+        return job
+
+    async def wait_for(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """The job, once finished or after timeout seconds, whichever comes first"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await asyncio.to_thread(self.get_job, job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in FINISHED_STATUSES or remaining <= 0:
+                return job
+            event = self._finished_events.get(job_id)
+            if event is None:
+                event = asyncio.Event()
+                self._finished_events[job_id] = event
+            try:
+                # Woken directly when this process runs the job; re-checks the table otherwise
+                await asyncio.wait_for(event.wait(), min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Evaluation job {job_id} crashed: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await asyncio.to_thread(self._claim, job_id)
+        if job is None:
+            return
+
+        self._running += 1
+        session_id = job['session_id']
+        started = time.perf_counter()
+        try:
+            result = await evaluate_and_record(self.ai_service, session_id, self.session_factory)
+        except Exception as e:
+            await self._handle_failure(job, e)
+            return
+        finally:
+            self._running -= 1
+
+        await asyncio.to_thread(self._finish, job_id, 'completed', result)
+        metrics.incr('evaluation_jobs.completed')
+        metrics.observe('evaluation_jobs.run_ms', (time.perf_counter() - started) * 1000)
+        self._notify(job_id)
+
+    async def _handle_failure(self, job: Dict, error: Exception):
+        job_id = job['job_id']
+        retryable = getattr(error, 'retryable', True)
+        if retryable and job['attempts'] < EVALUATION_MAX_ATTEMPTS:
+            delay = 2 ** job['attempts']
+            logger.warning(f"Evaluation job {job_id} attempt {job['attempts']} failed, retrying in {delay}s: {str(error)}")
+            metrics.incr('evaluation_jobs.retries')
+            await asyncio.to_thread(self._finish, job_id, 'queued', None, str(error))
+            # Requeue later without holding this worker for the backoff
+            self._queued.add(job_id)
+            asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, job_id)
+            return
+
+        logger.error(f"Evaluation job {job_id} failed after {job['attempts']} attempts: {str(error)}")
+        metrics.incr('evaluation_jobs.failed')
+        await asyncio.to_thread(self._finish, job_id, 'failed', None, str(error))
+        self._notify(job_id)
+
+    def _notify(self, job_id: str):
+        event = self._finished_events.get(job_id)
+        if event is not None:
+            event.set()
+
+    async def _sweeper(self):
+        while True:
+            try:
+                for job_id in await asyncio.to_thread(self._pending_job_ids):
+                    self._put(job_id)
+            except Exception as e:
+                logger.error(f"Evaluation job sweep failed: {str(e)}")
+            await asyncio.sleep(EVALUATION_SWEEP_SECONDS)
+
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue.qsize() if self.queue else 0,
+            'running': self._running
+        }
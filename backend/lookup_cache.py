@@ -0,0 +1,86 @@
+"""Read-through cache for class, student and assignment lookups
+
+At exam start a whole class hits /verify-class-code, /students and /assignments
+at once for data that changes perhaps weekly. Responses are cached per key
+(e.g. ("students", class_id)) with an ETag of the payload. Concurrent misses for
+the same key share a single database fetch (see singleflight.py).
+
+Writes made through the API (seed-data, assignment ingest) invalidate only the
+cache of the worker that served them. Scripts that edit assignments
+(update_pdfs.py, populate_week3_reading.py) run in their own process, so their
+invalidate() clears nothing in the server. Other gunicorn workers, and the
+server after a script, pick up the change on restart or when entries expire, so
+they can serve stale lookups for up to LOOKUP_CACHE_TTL_SECONDS (60 by default).
+
+Loaders run in a shared single-flight task, so they must open their own
+database session rather than use the request's.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Callable, Dict, Hashable, Tuple
+from caching import LRUCache
+from metrics import metrics
+from singleflight import SingleFlight
+
+LOOKUP_CACHE_TTL_SECONDS = float(os.getenv("LOOKUP_CACHE_TTL_SECONDS", "60"))
+
+
+def payload_etag(payload: Any) -> str:
+    """Quoted strong ETag for a JSON-serializable payload"""
+    body = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+class LookupCache:
+    """LRU of (payload, etag, loaded_at) with one in-flight load per key
+
+    Entries expire ttl_seconds after they were loaded, however often they are read
+    (LRUCache's own TTL is idle-based, which would keep hot entries forever).
+    """
+
+    def __init__(self, ttl_seconds: float = LOOKUP_CACHE_TTL_SECONDS, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.flight = SingleFlight('lookup_cache')
+        self._generation = 0
+
+        metrics.register_gauge('lookup_cache.entries', lambda: len(self.cache))
+
+    async def get(self, key: Hashable, loader: Callable[[], Any]) -> Tuple[Any, str]:
+        """(payload, etag) for key; loader runs in a thread, only on a miss"""
+        entry = self.cache.get(key)
+        if entry is not None and time.monotonic() - entry[2] < self.ttl_seconds:
+            metrics.incr('lookup_cache.hits')
+            return entry[:2]
+
+        entry, shared = await self.flight.do(key, lambda: self._load(key, loader))
+        metrics.incr('lookup_cache.coalesced' if shared else 'lookup_cache.misses')
+        return entry
+
+    async def _load(self, key: Hashable, loader: Callable[[], Any]) -> Tuple[Any, str]:
+        generation = self._generation
+        loaded_at = time.monotonic()
+        payload = await asyncio.to_thread(loader)
+        entry = (payload, payload_etag(payload))
+        if generation == self._generation:  # Don't cache data read before an invalidation
+            self.cache.set(key, entry + (loaded_at,))
+        return entry
+
+    def invalidate(self):
+        """Drop every entry (writes are rare, so no finer-grained invalidation)"""
+        self._generation += 1
+        self.cache.clear()
+        metrics.incr('lookup_cache.invalidations')
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self.cache),
+            'inflight': len(self.flight),
+            'ttl_seconds': self.ttl_seconds
+        }
+
+
+lookup_cache = LookupCache()
@@ -1,26 +1,74 @@
 import os
+import json
+import math
+import asyncio
+import base64
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session as DBSession
 from dotenv import load_dotenv
 import openai
-from database import get_db
+from database import SessionLocal, get_db
 from models import Student, Assignment, Session, Class
-from ai_service import AITutorService
+from ai_service import AsyncAITutorService, evaluation_cache
+from audio_utils import AudioTooLargeError, prepared_audio
+from evaluation_jobs import EvaluationError, EvaluationWorkerPool, evaluate_and_record, evaluation_flight, parse_session_id
+from pdf_utils import pdf_text_cache_stats, shutdown_process_pool
+from reading_ingest import ingest_assignment_by_id
+from reevaluation import ReevaluationManager, claim_run, create_run, get_run
+from lookup_cache import lookup_cache
+from resilience import VendorUnavailableError, openai_chat, vendor_stats
+from singleflight import SingleFlight
+from session_queries import DEFAULT_PAGE_SIZE, EXPORT_FORMATS, export_sessions, list_sessions_page
+from tts_service import TTSError, tts_client, tts_cache, speech_etag, synthesize_speech_async
+from speech_pipeline import pipeline_speech
+from stt_service import create_stt_backend
+from metrics import metrics
 
 load_dotenv()
 
-# Initialize OpenAI client
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+# Initialize OpenAI client (async so vendor round-trips don't block the event loop)
+# Retries and timeouts are applied per call by resilience.py, not by the SDK
+client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+# Speech-to-text engine selected by STT_BACKEND
+stt_backend = create_stt_backend(client)
 
 # Initialize AI Tutor Service
-ai_service = AITutorService()
+ai_service = AsyncAITutorService()
+
+# Background evaluation workers (see evaluation_jobs.py)
+evaluation_jobs = EvaluationWorkerPool(ai_service)
+
+# Concurrent duplicate requests (double-clicks, frontend retries) share one computation
+start_session_flight = SingleFlight('start_session')
+chat_flight = SingleFlight('chat')
+
+# Batch re-evaluation runs started through the API (see reevaluation.py)
+reevaluations = ReevaluationManager(ai_service)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Long-lived vendor clients: pooled keep-alive connections for the whole worker lifetime
+    await tts_client.start()
+    await stt_backend.start()
+    await evaluation_jobs.start()
+    yield
+    await evaluation_jobs.stop()
+    await reevaluations.stop()
+    await tts_client.aclose()
+    shutdown_process_pool()
 
-app = FastAPI(title="Backend API")
+app = FastAPI(title="Backend API", lifespan=lifespan)
 
 # Mount static files for serving PDFs
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -40,6 +88,12 @@ class ChatMessageRequest(BaseModel):
     session_id: str
     message: str
 
+class ReevaluationRequest(BaseModel):
+    class_id: Optional[int] = None
+    assignment_id: Optional[int] = None
+    rate_per_minute: Optional[float] = None
+    concurrency: Optional[int] = None
+
 # CORS configuration
 origins = [
     "http://localhost:5173",
@@ -73,6 +127,47 @@ async def debug_cors():
         "elevenlabs_key_set": bool(os.getenv("ELEVENLABS_API_KEY"))
     }
 
+@app.get("/debug-metrics")
+async def debug_metrics():
+    """Per-worker counters and gauges (session store, caches, vendor calls)"""
+    return {
+        "worker_pid": os.getpid(),
+        "metrics": metrics.snapshot(),
+        "session_store": ai_service.sessions.stats(),
+        "tts_client": tts_client.stats(),
+        "tts_cache": tts_cache.stats(),
+        "pdf_text_cache": pdf_text_cache_stats(),
+        "stt": stt_backend.stats(),
+        "evaluation_jobs": evaluation_jobs.stats(),
+        "evaluation_cache": evaluation_cache.stats(),
+        "lookup_cache": lookup_cache.stats(),
+        "vendors": vendor_stats(),
+        "singleflight_inflight": {flight.name: len(flight) for flight in (start_session_flight, chat_flight, evaluation_flight)}
+    }
+
+def vendor_unavailable(error: VendorUnavailableError, what: str) -> HTTPException:
+    """503 with Retry-After for a vendor outage (retries exhausted or circuit open)"""
+    logger.warning(f"{what} unavailable: {str(error)}")
+    return HTTPException(status_code=503, detail=f"{what} is temporarily unavailable, please try again",
+                         headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))})
+
+async def started_stream(events: AsyncIterator[Dict]) -> AsyncIterator[Dict]:
+    """Pull the first event before responding, so a vendor outage becomes a 503 instead of a broken stream"""
+    first = await events.__anext__()
+
+    async def replay():
+        yield first
+        async for event in events:
+            yield event
+    return replay()
+
+def cached_json_response(http_request: Request, payload: Dict, etag: str) -> Response:
+    """JSON response carrying its ETag; 304 if the client already has this version"""
+    if http_request.headers.get("if-none-match") == etag:
+        metrics.incr('lookup_cache.not_modified')
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(payload, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
 @app.post("/seed-data")
 async def seed_data(db: DBSession = Depends(get_db)):
     """Create sample students and assignments for testing"""
@@ -125,6 +220,7 @@ async def seed_data(db: DBSession = Depends(get_db)):
         for assignment in assignments:
             db.add(assignment)
         db.commit()
+        lookup_cache.invalidate()
 
         return {
             "status": "success",
@@ -135,14 +231,20 @@ async def seed_data(db: DBSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error seeding data: {str(e)}")
 
 @app.get("/students")
-async def get_students(class_id: Optional[int] = None, db: DBSession = Depends(get_db)):
+async def get_students(http_request: Request, class_id: Optional[int] = None):
     """Get all students for dropdown selection, optionally filtered by class_id"""
+    # Loaders are shared with concurrent requests, so each opens its own db session
+    def load_students():
+        with SessionLocal() as db:
+            query = db.query(Student)
+            if class_id is not None:
+                query = query.filter(Student.class_id == class_id)
+            students = query.all()
+            return {"students": [{"id": s.id, "name": s.name, "class_id": s.class_id} for s in students]}
+
     try:
-        query = db.query(Student)
-        if class_id is not None:
-            query = query.filter(Student.class_id == class_id)
-        students = query.all()
-        return {"students": [{"id": s.id, "name": s.name, "class_id": s.class_id} for s in students]}
+        payload, etag = await lookup_cache.get(("students", class_id), load_students)
+        return cached_json_response(http_request, payload, etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching students: {str(e)}")
 
@@ -169,30 +271,48 @@ async def check_session(student_id: int, assignment_id: int, db: DBSession = Dep
         raise HTTPException(status_code=500, detail=f"Error checking session: {str(e)}")
 
 @app.get("/assignments")
-async def get_assignments(class_id: Optional[int] = None, db: DBSession = Depends(get_db)):
+async def get_assignments(http_request: Request, class_id: Optional[int] = None):
     """Get all assignments for dropdown selection, optionally filtered by class_id"""
+    def load_assignments():
+        with SessionLocal() as db:
+            query = db.query(Assignment)
+            if class_id is not None:
+                query = query.filter(Assignment.class_id == class_id)
+            assignments = query.all()
+            return {"assignments": [
+                {
+                    "id": a.id,
+                    "title": a.title,
+                    "description": a.description,
+                    "week_number": a.week_number,
+                    "pdf_urls": [f"/static/assignments/{path}" for path in a.pdf_paths] if a.pdf_paths else [],
+                    "solution_pdf_urls": [f"/static/assignments/{path}" for path in a.solution_pdf_paths] if a.solution_pdf_paths else [],
+                    "has_reading_text": bool(a.reading_text),
+                    "class_id": a.class_id
+                }
+                for a in assignments
+            ]}
+
     try:
-        query = db.query(Assignment)
-        if class_id is not None:
-            query = query.filter(Assignment.class_id == class_id)
-        assignments = query.all()
-        return {"assignments": [
-            {
-                "id": a.id,
-                "title": a.title,
-                "description": a.description,
-                "week_number": a.week_number,
-                "pdf_urls": [f"/static/assignments/{path}" for path in a.pdf_paths] if a.pdf_paths else [],
-                "solution_pdf_urls": [f"/static/assignments/{path}" for path in a.solution_pdf_paths] if a.solution_pdf_paths else [],
-                "has_reading_text": bool(a.reading_text),
-                "class_id": a.class_id
-            }
-            for a in assignments
-        ]}
+        payload, etag = await lookup_cache.get(("assignments", class_id), load_assignments)
+        return cached_json_response(http_request, payload, etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching assignments: {str(e)}")
 
 
+@app.post("/assignments/{assignment_id}/ingest")
+async def ingest_assignment_readings(assignment_id: int, background_tasks: BackgroundTasks, db: DBSession = Depends(get_db)):
+    """Extract an assignment's PDFs into reading_pages in the background"""
+    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    if not assignment.pdf_paths:
+        raise HTTPException(status_code=400, detail="Assignment has no PDFs")
+
+    background_tasks.add_task(ingest_assignment_by_id, assignment_id)
+    background_tasks.add_task(lookup_cache.invalidate)  # Background tasks run in order: after the ingest
+    return {"status": "scheduled", "assignment_id": assignment_id, "pdf_count": len(assignment.pdf_paths)}
+
 @app.delete("/sessions/{session_id}")
 async def delete_session(session_id: int, db: DBSession = Depends(get_db)):
     """Delete a session by ID"""
@@ -210,30 +330,27 @@ async def delete_session(session_id: int, db: DBSession = Depends(get_db)):
 
 @app.post("/speech-to-text")
 async def speech_to_text(audio_file: UploadFile = File(...)):
-    """Convert audio to text using OpenAI Whisper"""
+    """Convert audio to text with the configured STT backend (see stt_service.py)"""
     try:
-        # Read the audio file
-        audio_content = await audio_file.read()
-        
-        # Create a temporary file-like object for OpenAI
-        from io import BytesIO
-        audio_buffer = BytesIO(audio_content)
-        audio_buffer.name = audio_file.filename
-        
-        # Send to Whisper
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_buffer
-        )
-        
-        return {"transcript": transcript.text}
-        
+        # Spool to disk and downsample to 16 kHz mono Opus before transcribing
+        async with prepared_audio(audio_file) as audio:
+            result = await stt_backend.transcribe(audio['path'], audio['filename'])
+
+        rtf = f", RTF {result['rtf']:.2f}" if result['rtf'] is not None else ""
+        logger.info(f"Transcribed {audio['bytes']} bytes with {result['backend']} in {result['latency_ms']:.0f}ms{rtf} "
+                    f"(preprocessing {audio['preprocess_ms']:.0f}ms, upload was {audio['upload_bytes']} bytes)")
+        return {"transcript": result['text']}
+
+    except AudioTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except VendorUnavailableError as e:
+        raise vendor_unavailable(e, "Speech-to-text")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Speech-to-text error: {str(e)}")
 
 # New AI Tutoring Endpoints
 @app.post("/start-ai-session")
-async def start_ai_session(request: StartSessionRequest, db: DBSession = Depends(get_db)):
+async def start_ai_session(request: StartSessionRequest, background_tasks: BackgroundTasks, db: DBSession = Depends(get_db)):
     """Start a new AI tutoring session with PDF context"""
     try:
         # Get assignment and its PDFs or reading text
@@ -246,28 +363,46 @@ async def start_ai_session(request: StartSessionRequest, db: DBSession = Depends
         if not class_obj:
             raise HTTPException(status_code=404, detail="Class not found")
 
-        # Create session ID
-        session_id = f"session_{request.student_id}_{request.assignment_id}_{int(datetime.now().timestamp())}"
-
-        # Initialize AI service with reading text if available, otherwise use PDFs
-        # Pass class-specific prompts (will fall back to defaults if None)
-        if assignment.reading_text:
-            result = ai_service.initialize_session_with_text(
-                session_id,
-                assignment.reading_text,
-                tutor_prompt=class_obj.tutor_prompt,
-                evaluation_prompt=class_obj.evaluation_prompt
-            )
-        elif assignment.pdf_paths:
-            result = ai_service.initialize_session(
-                session_id,
-                assignment.pdf_paths,
-                tutor_prompt=class_obj.tutor_prompt,
-                evaluation_prompt=class_obj.evaluation_prompt
-            )
-        else:
+        if not assignment.reading_text and not assignment.pdf_paths:
             raise HTTPException(status_code=400, detail="Assignment has no reading material")
 
+        reading_text, pdf_paths = assignment.reading_text, assignment.pdf_paths
+        tutor_prompt, evaluation_prompt = class_obj.tutor_prompt, class_obj.evaluation_prompt
+
+        async def initialize():
+            # Create session ID
+            session_id = f"session_{request.student_id}_{request.assignment_id}_{int(datetime.now().timestamp())}"
+
+            # Initialize AI service with reading text if available, otherwise use PDFs
+            # Pass class-specific prompts (will fall back to defaults if None)
+            if reading_text:
+                result = await asyncio.to_thread(
+                    ai_service.initialize_session_with_text,
+                    session_id,
+                    reading_text,
+                    tutor_prompt=tutor_prompt,
+                    evaluation_prompt=evaluation_prompt
+                )
+            else:
+                # Shared with duplicate requests, so not the request's db session
+                with SessionLocal() as init_db:
+                    result = await ai_service.initialize_session_async(
+                        session_id,
+                        pdf_paths,
+                        tutor_prompt=tutor_prompt,
+                        evaluation_prompt=evaluation_prompt,
+                        db_session=init_db
+                    )
+            return session_id, result
+
+        # A double-clicked start joins the session the first click is already building
+        (session_id, result), shared = await start_session_flight.do(
+            ("start", request.student_id, request.assignment_id), initialize)
+
+        # Readings weren't pre-extracted: ingest them so later sessions skip PyPDF2
+        if not shared and pdf_paths and not reading_text and result.get('success') and not result.get('ingested'):
+            background_tasks.add_task(ingest_assignment_by_id, assignment.id)
+
         if not result['success']:
             raise HTTPException(status_code=500, detail=result['error'])
         
@@ -283,112 +418,120 @@ async def start_ai_session(request: StartSessionRequest, db: DBSession = Depends
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting AI session: {str(e)}")
 
+def build_chat_payload(ai_response: str, metadata: Dict, session_id: str) -> Dict:
+    """Response body shared by /ai-chat and the final event of /ai-chat-stream"""
+    return {
+        "response": ai_response,
+        "question_count": metadata.get('question_count', 0),
+        "phase": metadata.get('phase', 'unknown'),
+        "should_wrap_up": metadata.get('should_wrap_up', False),
+        "final_question": metadata.get('final_question', False),
+        "auto_end": metadata.get('auto_end', False),
+        "elapsed_seconds": metadata.get('elapsed_seconds', 0),
+        "minutes_elapsed": metadata.get('minutes_elapsed', 0),
+        "remaining_seconds": metadata.get('remaining_seconds', 0),
+        "token_usage": metadata.get('token_usage', {}),
+        "timing": metadata.get('timing', {}),
+        "reading_context": metadata.get('reading_context') or {},
+        "token_breakdown": metadata.get('token_breakdown') or {},
+        "session_id": session_id
+    }
+
+def format_sse(event: str, data: Dict) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def chat_turn_key(session_id: str) -> Tuple:
+    """Single-flight key for a session's next tutor turn (question_count is None for an unknown session)"""
+    session_data = ai_service.sessions.get(session_id)
+    question_count = session_data['manager'].question_count if session_data else None
+    return ("chat", session_id, question_count)
+
 @app.post("/ai-chat")
 async def ai_chat(request: ChatMessageRequest):
     """Send a message to the AI tutor and get a response"""
     try:
-        ai_response, metadata = ai_service.get_ai_response(request.session_id, request.message)
+        # A retried send of the same turn waits for the reply already being generated
+        turn_key = await asyncio.to_thread(chat_turn_key, request.session_id)
+        (ai_response, metadata), _ = await chat_flight.do(
+            turn_key,
+            lambda: ai_service.get_ai_response_async(request.session_id, request.message))
         
-        return {
-            "response": ai_response,
-            "question_count": metadata.get('question_count', 0),
-            "phase": metadata.get('phase', 'unknown'),
-            "should_wrap_up": metadata.get('should_wrap_up', False),
-            "final_question": metadata.get('final_question', False),
-            "auto_end": metadata.get('auto_end', False),
-            "elapsed_seconds": metadata.get('elapsed_seconds', 0),
-            "minutes_elapsed": metadata.get('minutes_elapsed', 0),
-            "remaining_seconds": metadata.get('remaining_seconds', 0),
-            "token_usage": metadata.get('token_usage', {}),
-            "session_id": request.session_id
-        }
+        return build_chat_payload(ai_response, metadata, request.session_id)
         
+    except VendorUnavailableError as e:
+        raise vendor_unavailable(e, "AI tutor")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI chat error: {str(e)}")
 
+@app.post("/ai-chat-stream")
+async def ai_chat_stream(request: ChatMessageRequest):
+    """Send a message to the AI tutor and stream the response as Server-Sent Events
+
+    Emits `token` events ({"text": ...}) as the reply is generated, then a single
+    `done` event with the same body /ai-chat returns. 503 if the LLM is unavailable.
+    """
+    try:
+        events = await started_stream(ai_service.stream_ai_response(request.session_id, request.message))
+    except VendorUnavailableError as e:
+        raise vendor_unavailable(e, "AI tutor")
+
+    async def event_stream():
+        async for event in events:
+            if event['type'] == 'token':
+                yield format_sse('token', {"text": event['text']})
+            else:
+                yield format_sse('done', build_chat_payload(event['response'], event['metadata'], request.session_id))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/evaluate-ai-session")
-async def evaluate_ai_session(session_id: str, db: DBSession = Depends(get_db)):
-    """Evaluate a completed AI session and save to database"""
-    import logging
-    logger = logging.getLogger(__name__)
+async def evaluate_ai_session(session_id: str):
+    """Evaluate a completed AI session and save to database (inline; see /evaluation-jobs)"""
     logger.info(f"Starting evaluation for session {session_id}")
 
     try:
-        # Get evaluation from AI service (pass db session for recovery)
-        evaluation = ai_service.evaluate_session(session_id, db)
-        
-        if 'error' in evaluation:
-            raise HTTPException(status_code=400, detail=evaluation['error'])
-        
-        # Extract session info from session_id
-        try:
-            parts = session_id.split('_')
-            student_id = int(parts[1])
-            assignment_id = int(parts[2])
-        except:
-            raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-        # Get class_id from student or assignment
-        student = db.query(Student).filter(Student.id == student_id).first()
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-
-        # Check if session already exists (handles duplicate requests from double-clicks)
-        existing_session = db.query(Session).filter(
-            Session.student_id == student_id,
-            Session.assignment_id == assignment_id
-        ).first()
+        # Already evaluated, or being evaluated by a concurrent request: no second LLM call
+        return await evaluate_and_record(ai_service, session_id)
 
-        if existing_session:
-            # Session already evaluated - return existing results (idempotent)
-            logger.info(f"Session already exists for student {student_id}, assignment {assignment_id}. Returning existing evaluation.")
-            return {
-                "session_id": existing_session.id,
-                "score": existing_session.final_score,
-                "category": existing_session.score_category,
-                "feedback": existing_session.ai_feedback,
-                "question_count": evaluation.get('question_count', 0)
-            }
-
-        # Get session stats
-        stats = ai_service.get_session_stats(session_id)
+    except EvaluationError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except VendorUnavailableError as e:
+        raise vendor_unavailable(e, "Evaluation")
+    except Exception as e:
+        logger.error(f"Error evaluating session {session_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error evaluating session: {str(e)}")
 
-        # Get the formatted transcript for database storage
-        formatted_transcript = ai_service.get_formatted_transcript(session_id)
+@app.post("/evaluation-jobs", status_code=202)
+async def create_evaluation_job(session_id: str, http_request: Request):
+    """Queue the end-of-session evaluation and return its job id right away
 
-        # Create session record in database
-        new_session = Session(
-            student_id=student_id,
-            assignment_id=assignment_id,
-            class_id=student.class_id,
-            status="completed",
-            started_at=datetime.now(),
-            completed_at=datetime.now(),
-            full_transcript=formatted_transcript,
-            final_score=evaluation.get('score', 75),
-            score_category=evaluation.get('category', 'yellow'),
-            ai_feedback=evaluation.get('feedback', 'No feedback available')
-        )
+    Repeat requests with the same Idempotency-Key header (default: the session id)
+    return the existing job. Poll GET /evaluation-jobs/{job_id} for the result.
+    """
+    try:
+        parse_session_id(session_id)
+        return await evaluation_jobs.enqueue(session_id, http_request.headers.get("idempotency-key"))
+    except EvaluationError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing evaluation: {str(e)}")
 
-        db.add(new_session)
-        db.commit()
-        db.refresh(new_session)
+@app.get("/evaluation-jobs/{job_id}")
+async def get_evaluation_job(job_id: str, wait: float = 0):
+    """Job status; `result` holds the /evaluate-ai-session body once completed
 
-        # Don't clean up AI session immediately - keep it for potential re-evaluation
-        # ai_service.cleanup_session(session_id)
-        logger.info(f"Session {session_id} evaluation complete - keeping in memory for potential re-access")
-        
-        return {
-            "session_id": new_session.id,
-            "score": evaluation.get('score'),
-            "category": evaluation.get('category'),
-            "feedback": evaluation.get('feedback'),
-            "question_count": evaluation.get('question_count')
-        }
-        
-    except Exception as e:
-        logger.error(f"Error evaluating session {session_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error evaluating session: {str(e)}")
+    With `wait` (seconds, at most 25) the request is held until the job finishes or
+    the wait runs out, so clients can long-poll instead of polling in a tight loop.
+    """
+    job = await evaluation_jobs.wait_for(job_id, min(max(wait, 0), 25))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Evaluation job not found")
+    return job
 
 @app.post("/ai-response")
 async def get_ai_response(request: dict):
@@ -422,7 +565,8 @@ Your role is to:
 This is a {assignment_title} discussion. Guide the student to demonstrate their understanding through dialogue."""
 
         # Make GPT call
-        response = client.chat.completions.create(
+        response = await openai_chat.call(
+            client.chat.completions.create,
             model="gpt-4",  # Will update to gpt-5 when available
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -436,81 +580,100 @@ This is a {assignment_title} discussion. Guide the student to demonstrate their
         
         return {"response": ai_response}
         
+    except VendorUnavailableError as e:
+        raise vendor_unavailable(e, "AI tutor")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI response error: {str(e)}")
 
 @app.post("/text-to-speech")
-async def text_to_speech(request: dict):
-    """Convert text to speech using ElevenLabs"""
+async def text_to_speech(request: dict, http_request: Request):
+    """Convert text to speech using ElevenLabs
+
+    Audio is content-addressed: the ETag identifies (voice, model, settings, text),
+    so a client that already holds it can send If-None-Match and get a 304.
+    """
     try:
         text = request.get("text", "")
-        voice_id = os.getenv("ELEVENLABS_VOICE_ID")
-        
-        if not voice_id:
-            raise HTTPException(status_code=500, detail="ElevenLabs voice ID not configured")
+        etag = f'"{speech_etag(text)}"'
+
+        if http_request.headers.get("if-none-match") == etag:
+            metrics.incr('tts_cache.not_modified')
+            return Response(status_code=304, headers={"ETag": etag})
         
-        # Generate speech - try different ElevenLabs API approach
         try:
-            print(f"Text to convert: '{text}'")
-            print(f"Using voice ID: {voice_id}")
-            
-            # Try the direct API approach instead of the client
-            import requests
-            
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": os.getenv("ELEVENLABS_API_KEY")
-            }
-            data = {
-                "text": text,
-                "model_id": "eleven_multilingual_v2",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.5
-                }
-            }
-            
-            print("Making ElevenLabs API request...")
-            response = requests.post(url, json=data, headers=headers)
-            print(f"ElevenLabs response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"ElevenLabs error response: {response.text}")
-                raise Exception(f"ElevenLabs API error: {response.status_code} - {response.text}")
-            
-            audio_bytes = response.content
-            print(f"Generated audio bytes length: {len(audio_bytes)}")
-            
-            if len(audio_bytes) < 1000:  # Suspiciously small
-                raise Exception(f"Audio too small: {len(audio_bytes)} bytes")
-                
-        except Exception as e:
-            print(f"ElevenLabs error: {str(e)}")
+            audio_bytes = await synthesize_speech_async(text)
+        except TTSError as e:
             raise Exception(f"ElevenLabs generation failed: {str(e)}")
+        except VendorUnavailableError as e:
+            raise vendor_unavailable(e, "Text-to-speech")
         
-        from fastapi.responses import Response
         return Response(
             content=audio_bytes,
             media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=speech.mp3"}
+            headers={
+                "Content-Disposition": "attachment; filename=speech.mp3",
+                "ETag": etag,
+                "Cache-Control": "private, max-age=86400"
+            }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text-to-speech error: {str(e)}")
 
+@app.post("/ai-chat-speech")
+async def ai_chat_speech(request: ChatMessageRequest):
+    """Send a message to the AI tutor and stream the spoken reply as Server-Sent Events
+
+    Each sentence is sent to ElevenLabs as soon as the LLM finishes it. Emits, in order:
+    `sentence` ({"index", "text"}), `audio` ({"index", "audio_base64", "media_type"}) or
+    `audio_error` ({"index", "error"}) per sentence, then a `done` event with the same
+    body /ai-chat returns. Play the audio events in index order. 503 if the LLM is
+    unavailable.
+    """
+    try:
+        events = await started_stream(ai_service.stream_ai_response(request.session_id, request.message))
+    except VendorUnavailableError as e:
+        raise vendor_unavailable(e, "AI tutor")
+
+    async def event_stream():
+        async for event in pipeline_speech(events, synthesize_speech_async):
+            if event['type'] == 'sentence':
+                yield format_sse('sentence', {"index": event['index'], "text": event['text']})
+            elif event['type'] == 'audio':
+                yield format_sse('audio', {
+                    "index": event['index'],
+                    "audio_base64": base64.b64encode(event['audio']).decode('ascii'),
+                    "media_type": "audio/mpeg"
+                })
+            elif event['type'] == 'audio_error':
+                yield format_sse('audio_error', {"index": event['index'], "error": event['error']})
+            else:
+                yield format_sse('done', build_chat_payload(event['response'], event['metadata'], request.session_id))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/classes")
-async def get_classes(db: DBSession = Depends(get_db)):
+async def get_classes(http_request: Request):
     """Get all classes"""
+    def load_classes():
+        with SessionLocal() as db:
+            classes = db.query(Class).all()
+            return {"classes": [{"id": c.id, "class_name": c.class_name, "professor_name": c.professor_name, "access_code": c.access_code} for c in classes]}
+
     try:
-        classes = db.query(Class).all()
-        return {"classes": [{"id": c.id, "class_name": c.class_name, "professor_name": c.professor_name, "access_code": c.access_code} for c in classes]}
+        payload, etag = await lookup_cache.get(("classes",), load_classes)
+        return cached_json_response(http_request, payload, etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching classes: {str(e)}")
 
 @app.post("/verify-class-code")
-async def verify_class_code(request: dict, db: DBSession = Depends(get_db)):
+async def verify_class_code(request: dict):
     """Verify a class access code and return class information"""
     try:
         code = request.get("code", "").strip().upper()
@@ -521,21 +684,26 @@ async def verify_class_code(request: dict, db: DBSession = Depends(get_db)):
         if len(code) != 6:
             raise HTTPException(status_code=400, detail="Access code must be 6 characters")
 
-        # Look up class by access code
-        class_obj = db.query(Class).filter(Class.access_code == code).first()
-
-        if not class_obj:
-            raise HTTPException(status_code=404, detail="Invalid access code")
+        # Look up class by access code (unknown codes raise, so they aren't cached)
+        def load_class():
+            with SessionLocal() as db:
+                class_obj = db.query(Class).filter(Class.access_code == code).first()
+
+                if not class_obj:
+                    raise HTTPException(status_code=404, detail="Invalid access code")
+
+                return {
+                    "valid": True,
+                    "class": {
+                        "id": class_obj.id,
+                        "class_name": class_obj.class_name,
+                        "professor_name": class_obj.professor_name,
+                        "access_code": class_obj.access_code
+                    }
+                }
 
-        return {
-            "valid": True,
-            "class": {
-                "id": class_obj.id,
-                "class_name": class_obj.class_name,
-                "professor_name": class_obj.professor_name,
-                "access_code": class_obj.access_code
-            }
-        }
+        payload, _ = await lookup_cache.get(("class_code", code), load_class)
+        return payload
     except HTTPException:
         raise
     except Exception as e:
@@ -570,34 +738,94 @@ async def verify_professor_password(request: dict, db: DBSession = Depends(get_d
         raise HTTPException(status_code=500, detail=f"Error verifying professor password: {str(e)}")
 
 @app.get("/test-data")
-async def get_test_data(class_id: Optional[int] = None, db: DBSession = Depends(get_db)):
+async def get_test_data(class_id: Optional[int] = None, assignment_id: Optional[int] = None,
+                        status: Optional[str] = None, completed_after: Optional[datetime] = None,
+                        completed_before: Optional[datetime] = None, cursor: Optional[int] = None,
+                        limit: int = DEFAULT_PAGE_SIZE, include_transcripts: bool = False,
+                        db: DBSession = Depends(get_db)):
+    """Sessions for the instructor dashboard, newest first, one page at a time
+
+    Pass next_cursor back as cursor to get the following page. Transcripts are left
+    out unless include_transcripts=true; fetch them per session from
+    /sessions/{session_id}/transcript.
+    """
     try:
-        # Get all sessions with student and assignment names, optionally filtered by class_id
-        query = db.query(Session)
-        if class_id is not None:
-            query = query.filter(Session.class_id == class_id)
-        sessions = query.all()
-
-        result = []
-        for session in sessions:
-            student = db.query(Student).filter(Student.id == session.student_id).first()
-            assignment = db.query(Assignment).filter(Assignment.id == session.assignment_id).first()
-            class_obj = db.query(Class).filter(Class.id == session.class_id).first()
-
-            result.append({
-                "session_id": session.id,
-                "student_name": student.name if student else "Unknown",
-                "assignment_title": assignment.title if assignment else "Unknown",
-                "class_name": class_obj.class_name if class_obj else "Unknown",
-                "professor_name": class_obj.professor_name if class_obj else "Unknown",
-                "status": session.status,
-                "final_score": session.final_score,
-                "score_category": session.score_category,
-                "transcript": session.full_transcript,
-                "ai_feedback": session.ai_feedback,
-                "completed_at": session.completed_at
-            })
-
-        return {"sessions": result}
+        sessions, next_cursor = list_sessions_page(
+            db,
+            cursor=cursor,
+            limit=limit,
+            class_id=class_id,
+            assignment_id=assignment_id,
+            status=status,
+            completed_after=completed_after,
+            completed_before=completed_before,
+            include_transcripts=include_transcripts
+        )
+        return {"sessions": sessions, "next_cursor": next_cursor}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching test data: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching test data: {str(e)}")
+
+@app.get("/sessions/export")
+async def export_session_data(format: str = "ndjson", class_id: Optional[int] = None,
+                              assignment_id: Optional[int] = None, status: Optional[str] = None,
+                              completed_after: Optional[datetime] = None, completed_before: Optional[datetime] = None,
+                              include_transcripts: bool = True):
+    """Stream every matching session as NDJSON (default) or CSV for bulk download"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+
+    filename = f"sessions-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}"
+    return StreamingResponse(
+        export_sessions(
+            format,
+            class_id=class_id,
+            assignment_id=assignment_id,
+            status=status,
+            completed_after=completed_after,
+            completed_before=completed_before,
+            include_transcripts=include_transcripts
+        ),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/sessions/{session_id}/transcript")
+async def get_session_transcript(session_id: int, db: DBSession = Depends(get_db)):
+    """Full transcript of one completed session"""
+    row = db.query(Session.id, Session.full_transcript).filter(Session.id == session_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": row.id, "transcript": row.full_transcript}
+
+@app.post("/reevaluations", status_code=202)
+async def start_reevaluation(request: ReevaluationRequest, db: DBSession = Depends(get_db)):
+    """Re-score a class's or assignment's stored sessions with the current evaluation prompt
+
+    Runs in the background; poll GET /reevaluations/{run_id} for progress.
+    """
+    try:
+        run = create_run(db, request.class_id, request.assignment_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    reevaluations.start(run["run_id"], request.rate_per_minute, request.concurrency)
+    return run
+
+@app.post("/reevaluations/{run_id}/resume", status_code=202)
+async def resume_reevaluation(run_id: int, request: Optional[ReevaluationRequest] = None, db: DBSession = Depends(get_db)):
+    """Continue a paused, failed or abandoned run from its checkpoint"""
+    run = claim_run(db, run_id)
+    if run is None:
+        if get_run(db, run_id) is None:
+            raise HTTPException(status_code=404, detail="Re-evaluation run not found")
+        raise HTTPException(status_code=409, detail="Run is already running or completed")
+    reevaluations.start(run_id, request.rate_per_minute if request else None, request.concurrency if request else None)
+    return run
+
+@app.get("/reevaluations/{run_id}")
+async def get_reevaluation(run_id: int, db: DBSession = Depends(get_db)):
+    """Run progress, including throughput in sessions/min"""
+    run = get_run(db, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Re-evaluation run not found")
+    run.update(reevaluations.live_progress(run_id) or {})
+    return run
\ No newline at end of file
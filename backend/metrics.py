@@ -0,0 +1,82 @@
+"""Process-wide counters, latencies and gauges exposed through /debug-metrics
+
+Values are per worker process; aggregate across workers in the log/monitoring layer.
+"""
+import threading
+from collections import deque
+from typing import Callable, Dict
+
+
+class LatencyStats:
+    """Count/avg/max over all observations plus percentiles over the most recent ones"""
+
+    def __init__(self, window: int = 500):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self) -> Dict:
+        ordered = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1)
+
+        return {
+            'count': self.count,
+            'avg': round(self.total / self.count, 1) if self.count else 0.0,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'max': round(self.max, 1)
+        }
+
+
+class MetricsRegistry:
+    """Named counters, latency distributions, and gauges computed on demand"""
+
+    def __init__(self):
+        self._counters = {}
+        self._latencies = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float):
+        """Record one latency sample (by convention in milliseconds, name ending in _ms)"""
+        with self._lock:
+            if name not in self._latencies:
+                self._latencies[name] = LatencyStats()
+            self._latencies[name].observe(value)
+
+    def register_gauge(self, name: str, func: Callable[[], float]):
+        """Register a callable that is evaluated each time a snapshot is taken"""
+        self._gauges[name] = func
+
+    def get(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            snapshot = dict(self._counters)
+            for name, stats in self._latencies.items():
+                snapshot[name] = stats.summary()
+        for name, func in self._gauges.items():
+            try:
+                snapshot[name] = func()
+            except Exception:
+                snapshot[name] = None
+        return dict(sorted(snapshot.items()))
+
+
+metrics = MetricsRegistry()
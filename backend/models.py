@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, UniqueConstraint, ForeignKey, func
+from sqlalchemy import Column, Integer, Float, String, DateTime, Text, JSON, Index, UniqueConstraint, ForeignKey, func, text
 from database import Base
 
 class Class(Base):
@@ -53,11 +53,97 @@ class Session(Base):
     final_score = Column(Integer, nullable=True)
     score_category = Column(String, nullable=True)  # 'green', 'yellow', 'red'
     ai_feedback = Column(Text, nullable=True)
-    class_id = Column(Integer, ForeignKey('classes.id'), nullable=False, index=True)
+    class_id = Column(Integer, ForeignKey('classes.id'), nullable=False)
 
+    # (student_id, assignment_id) lookups are served by the unique constraint's index.
+    # The rest back the instructor listings in session_queries.py (see bench_session_indexes.py)
     __table_args__ = (
         UniqueConstraint('student_id', 'assignment_id', name='_student_assignment_uc'),
+        Index('ix_sessions_class_id_id', 'class_id', 'id'),  # Keyset pages per class
+        Index('ix_sessions_class_id_completed_at', 'class_id', 'completed_at'),  # Date-range filters
+        Index('ix_sessions_assignment_id_id_completed', 'assignment_id', 'id',
+              postgresql_where=text("status = 'completed'"), sqlite_where=text("status = 'completed'")),
+    )
+
+    def __repr__(self):
+        return f"<Session(id={self.id}, student_id={self.student_id}, assignment_id={self.assignment_id}, class_id={self.class_id}, status='{self.status}')>"
+
+class AISessionState(Base):
+    """Live AI tutoring session state, shared by all workers (see session_store.SQLSessionStore)"""
+    __tablename__ = "ai_session_states"
+
+    session_id = Column(String, primary_key=True)
+    context = Column(JSON, nullable=False)  # Large, write-once data: pdf_context, reading_text
+    state = Column(JSON, nullable=False)  # Per-turn data: conversation history, manager state, prompts
+    version = Column(Integer, nullable=False, default=1)  # Bumped on every save, used to validate local caches
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<AISessionState(session_id='{self.session_id}', version={self.version})>"
+
+
+class ReadingPage(Base):
+    """One page of an assignment PDF, extracted ahead of time (see reading_ingest.py)"""
+    __tablename__ = "reading_pages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pdf_path = Column(String, nullable=False)  # Relative to static/assignments, e.g. "week1/reading1.pdf"
+    content_hash = Column(String(64), nullable=False)  # SHA-256 of the PDF file the page came from
+    page_number = Column(Integer, nullable=False)  # 1-based; 0 marks a PDF without pages
+    text = Column(Text, nullable=False)  # Empty for pages without extractable text
+    char_count = Column(Integer, nullable=False)
+    token_count = Column(Integer, nullable=False)  # Approximate (token_utils.estimate_tokens)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('pdf_path', 'content_hash', 'page_number', name='_reading_page_path_hash_page_uc'),
     )
 
     def __repr__(self):
-        return f"<Session(id={self.id}, student_id={self.student_id}, assignment_id={self.assignment_id}, class_id={self.class_id}, status='{self.status}')>"
\ No newline at end of file
+        return f"<ReadingPage(pdf_path='{self.pdf_path}', page_number={self.page_number}, char_count={self.char_count})>"
+
+
+class EvaluationJob(Base):
+    """Queued end-of-session evaluation, processed by the worker pool in evaluation_jobs.py"""
+    __tablename__ = "evaluation_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex, returned to the client for polling
+    idempotency_key = Column(String, unique=True, nullable=False)  # Idempotency-Key header, or the AI session id
+    session_id = Column(String, nullable=False)  # AI tutoring session id (session_<student>_<assignment>_<ts>)
+    status = Column(String, nullable=False, default="queued")  # 'queued', 'running', 'completed', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True)  # Same body /evaluate-ai-session returns
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_evaluation_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<EvaluationJob(id='{self.id}', session_id='{self.session_id}', status='{self.status}')>"
+
+
+class ReevaluationRun(Base):
+    """Batch re-scoring of stored sessions for a class or assignment (see reevaluation.py)"""
+    __tablename__ = "reevaluation_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, nullable=True)  # Filters; at least one is set
+    assignment_id = Column(Integer, nullable=True)
+    status = Column(String, nullable=False, default="running")  # 'running', 'paused', 'completed', 'failed'
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)  # Sessions at or below last_session_id, including failures
+    failed_session_ids = Column(JSON, nullable=False, default=list)
+    last_session_id = Column(Integer, nullable=False, default=0)  # Checkpoint: every session up to this id is done
+    sessions_per_minute = Column(Float, nullable=True)  # Throughput of the latest run segment
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Updated at each checkpoint while running
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<ReevaluationRun(id={self.id}, status='{self.status}', processed={self.processed}/{self.total})>"
@@ -1,34 +1,223 @@
 """PDF text extraction utilities"""
 import os
-from typing import List, Dict
+import asyncio
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from PyPDF2 import PdfReader
 import logging
+from caching import DiskCache, LRUCache, TieredCache
 
 logger = logging.getLogger(__name__)
 
+# All assignment PDF paths are relative to this directory
+ASSIGNMENTS_DIR = "static/assignments"
+
+# Bump when the extracted text format changes so stale cache entries are ignored
+PDF_TEXT_CACHE_VERSION = 1
+
+# Extracted text keyed by PDF content hash: in-memory tier plus a disk tier shared by all workers
+_text_cache = TieredCache(
+    'pdf_text_cache',
+    LRUCache(max_entries=64, max_bytes=int(os.getenv("PDF_TEXT_CACHE_MEMORY_MB", "64")) * 1024 * 1024),
+    DiskCache(
+        os.getenv("PDF_TEXT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "professr_pdf_text"),
+        max_bytes=int(os.getenv("PDF_TEXT_CACHE_DISK_MB", "256")) * 1024 * 1024,
+        suffix=".txt"
+    ),
+    encode=lambda text: text.encode('utf-8'),
+    decode=lambda data: data.decode('utf-8')
+)
+
+# (path, mtime_ns, size) -> sha256, so unchanged files are hashed only once per process
+_hash_memo = {}
+_hash_lock = threading.Lock()
+
+def file_content_hash(full_path: str) -> str:
+    """SHA-256 of a file's bytes; recomputed automatically when the file changes"""
+    stat = os.stat(full_path)
+    memo_key = (full_path, stat.st_mtime_ns, stat.st_size)
+    with _hash_lock:
+        if memo_key in _hash_memo:
+            return _hash_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(full_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+
+    with _hash_lock:
+        # Drop memo entries for older versions of this file
+        for key in [key for key in _hash_memo if key[0] == full_path]:
+            del _hash_memo[key]
+        _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+def get_cached_pdf_text(content_hash: str) -> Optional[str]:
+    """Look up extracted text by PDF content hash (memory, then disk)"""
+    return _text_cache.get(f"{content_hash}_v{PDF_TEXT_CACHE_VERSION}")
+
+def set_cached_pdf_text(content_hash: str, text: str):
+    _text_cache.set(f"{content_hash}_v{PDF_TEXT_CACHE_VERSION}", text)
+
+def lookup_pdf_text(full_path: str) -> Tuple[str, Optional[str]]:
+    """(content hash, cached text or None) for a PDF on disk"""
+    content_hash = file_content_hash(full_path)
+    return content_hash, get_cached_pdf_text(content_hash)
+
+def pdf_text_cache_stats() -> Dict:
+    return _text_cache.stats()
+
+# PDFs with fewer pages than this are extracted serially; spreading them isn't worth the IPC
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+
+_process_pool = None
+_process_pool_workers = 0  # Worker count the current pool was created with
+_process_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared pool for CPU-bound extraction (PDF_EXTRACT_WORKERS processes, default one per core)
+
+    Uses spawn rather than fork: the web worker is multithreaded, and forking it can
+    deadlock the children.
+    """
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool_workers = int(os.getenv("PDF_EXTRACT_WORKERS", "0")) or os.cpu_count() or 1
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_process_pool_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+def process_pool_workers() -> int:
+    """Number of processes in the shared extraction pool"""
+    get_process_pool()
+    return _process_pool_workers
+
+def shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(cancel_futures=True)
+            _process_pool = None
+
+def count_pages(full_path: str) -> int:
+    return len(PdfReader(full_path).pages)
+
+def split_page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into at most `parts` contiguous (start, end) ranges"""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def extract_page_range(full_path: str, start: int, end: int) -> List[str]:
+    """Extract pages [start, end) - runs inside pool processes"""
+    reader = PdfReader(full_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+def extract_pages_from_pdf(full_path: str) -> List[str]:
+    """Extract the text of every page serially (empty string for pages without text)"""
+    reader = PdfReader(full_path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+def extract_pages_parallel(full_path: str, max_workers: Optional[int] = None) -> List[str]:
+    """extract_pages_from_pdf with page ranges spread across the process pool"""
+    page_count = count_pages(full_path)
+    if page_count < PARALLEL_MIN_PAGES:
+        return extract_pages_from_pdf(full_path)
+
+    pool = get_process_pool()
+    ranges = split_page_ranges(page_count, max_workers or _process_pool_workers)
+    futures = [pool.submit(extract_page_range, full_path, start, end) for start, end in ranges]
+    return [text for future in futures for text in future.result()]
+
+async def extract_pages_async(full_path: str) -> List[str]:
+    """Parallel page extraction that can be awaited without blocking the event loop"""
+    page_count = await asyncio.to_thread(count_pages, full_path)
+    if page_count < PARALLEL_MIN_PAGES:
+        return await asyncio.to_thread(extract_pages_from_pdf, full_path)
+
+    pool = get_process_pool()
+    ranges = split_page_ranges(page_count, _process_pool_workers)
+    results = await asyncio.gather(*[
+        asyncio.wrap_future(pool.submit(extract_page_range, full_path, start, end))
+        for start, end in ranges
+    ])
+    return [text for chunk in results for text in chunk]
+
+def format_pages(pages: List[str]) -> str:
+    """Join page texts with the [Page n] markers used throughout the tutor context"""
+    return "\n\n".join(
+        f"[Page {page_num}]\n{text}" for page_num, text in enumerate(pages, 1) if text
+    )
+
 def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text content from a PDF file"""
+    """Extract text content from a PDF file (cached by file content hash)"""
     try:
-        full_path = os.path.join("static/assignments", pdf_path)
+        full_path = os.path.join(ASSIGNMENTS_DIR, pdf_path)
         
         if not os.path.exists(full_path):
             logger.error(f"PDF file not found: {full_path}")
             return ""
+
+        content_hash = file_content_hash(full_path)
+        cached_text = get_cached_pdf_text(content_hash)
+        if cached_text is not None:
+            return cached_text
         
-        reader = PdfReader(full_path)
-        text_content = []
-        
-        for page_num, page in enumerate(reader.pages, 1):
-            text = page.extract_text()
-            if text:
-                text_content.append(f"[Page {page_num}]\n{text}")
-        
-        return "\n\n".join(text_content)
+        pages = extract_pages_from_pdf(full_path)
+        extracted_text = format_pages(pages)
+        set_cached_pdf_text(content_hash, extracted_text)
+        logger.info(f"Extracted and cached {pdf_path} ({len(pages)} pages, {len(extracted_text)} chars)")
+        return extracted_text
     
     except Exception as e:
         logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
         return ""
 
+async def extract_text_from_pdf_async(pdf_path: str) -> str:
+    """Awaitable extract_text_from_pdf: pages are extracted in parallel in the process pool"""
+    try:
+        full_path = os.path.join(ASSIGNMENTS_DIR, pdf_path)
+
+        if not os.path.exists(full_path):
+            logger.error(f"PDF file not found: {full_path}")
+            return ""
+
+        # Hashing and the disk cache tier are blocking file I/O: one thread hop for both
+        content_hash, cached_text = await asyncio.to_thread(lookup_pdf_text, full_path)
+        if cached_text is not None:
+            return cached_text
+
+        pages = await extract_pages_async(full_path)
+        extracted_text = format_pages(pages)
+        await asyncio.to_thread(set_cached_pdf_text, content_hash, extracted_text)
+        logger.info(f"Extracted and cached {pdf_path} ({len(pages)} pages, {len(extracted_text)} chars)")
+        return extracted_text
+
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
+        return ""
+
+async def extract_texts_from_pdfs_async(pdf_paths: List[str]) -> Dict[str, str]:
+    """Awaitable extract_texts_from_pdfs; all PDFs are extracted concurrently"""
+    texts = await asyncio.gather(*[extract_text_from_pdf_async(pdf_path) for pdf_path in pdf_paths])
+    return {
+        os.path.basename(pdf_path): text
+        for pdf_path, text in zip(pdf_paths, texts) if text
+    }
+
 def extract_texts_from_pdfs(pdf_paths: List[str]) -> Dict[str, str]:
     """Extract text from multiple PDFs"""
     extracted_texts = {}
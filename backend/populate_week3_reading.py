@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import Assignment
+from lookup_cache import lookup_cache
 
 load_dotenv()
 
@@ -366,6 +367,9 @@ def populate_week3_reading():
         if assignment:
             assignment.reading_text = WEEK3_READING_TEXT
             db.commit()
+            # Only clears this process's cache: a running server picks up the change
+            # after a restart or once its lookups expire (LOOKUP_CACHE_TTL_SECONDS)
+            lookup_cache.invalidate()
             print(f"Successfully updated assignment '{assignment.title}' (Week {assignment.week_number}) with reading text")
             print(f"Text length: {len(WEEK3_READING_TEXT)} characters")
         else:
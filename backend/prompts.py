@@ -127,4 +127,8 @@ Interpret and Compare Theories & Justifications: Yellow – Student mentioned ke
 Evaluate Effectiveness & Fairness: Red – Student gave vague opinions without evidence from the texts.
 Propose and Justify Reforms: Red – No reform ideas were discussed.
 Overall: Red
-"""
\ No newline at end of file
+"""
+SUMMARY_COMPACTION_PROMPT = """You maintain a running summary of a student's oral exam conversation with a tutor.
+Merge the summary so far and the newer exchanges into one concise summary of at most 120 words.
+Keep the specific ideas, readings and authors the student discussed, the questions already asked,
+and any misunderstandings the tutor challenged. Write plain prose with no preamble."""
@@ -0,0 +1,215 @@
+"""Lexical (BM25) retrieval over reading chunks
+
+Long readings are split into chunks along the "=== file ===" sections and
+[Page n] markers produced by pdf_utils, and indexed once per distinct
+pdf_context. Each tutor turn then gets only the chunks most relevant to the
+student's latest answer and the recent history, within a token budget,
+instead of the full text.
+"""
+import os
+import re
+import math
+import time
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional
+from caching import LRUCache
+from metrics import metrics
+from token_utils import estimate_tokens
+
+# Readings shorter than this are always sent in full
+RETRIEVAL_MIN_TOKENS = int(os.getenv("READING_RETRIEVAL_MIN_TOKENS", "6000"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("READING_CONTEXT_TOKEN_BUDGET", "2500"))
+RETRIEVAL_TOP_K = int(os.getenv("READING_RETRIEVAL_TOP_K", "8"))
+CHUNK_CHARS = int(os.getenv("READING_CHUNK_CHARS", "1200"))
+
+SECTION_PATTERN = re.compile(r"^=== (.+) ===$", re.MULTILINE)
+PAGE_PATTERN = re.compile(r"^\[Page (\d+)\]$", re.MULTILINE)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i if in into is it its
+me my no not of on or our she so that the their them then there these they this
+to was we were what when which who why will with you your do does did can could
+would should about also just more than very""".split())
+
+_index_cache = LRUCache(max_entries=32)
+
+
+def tokenize(text: str) -> List[str]:
+    return [term for term in TOKEN_PATTERN.findall(text.lower())
+            if len(term) > 1 and term not in STOPWORDS]
+
+
+def _split_long(paragraph: str, max_chars: int) -> List[str]:
+    """Break an oversized paragraph on line, then word boundaries"""
+    pieces, current = [], ""
+    for part in re.split(r"(?<=\n)|(?<= )", paragraph):
+        if current and len(current) + len(part) > max_chars:
+            pieces.append(current.strip())
+            current = ""
+        current += part
+    if current.strip():
+        pieces.append(current.strip())
+    return pieces
+
+
+def _pack_paragraphs(text: str, max_chars: int) -> List[str]:
+    """Group consecutive paragraphs into chunks of up to max_chars"""
+    chunks, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in _split_long(paragraph, max_chars) if len(paragraph) > max_chars else [paragraph]:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_reading(pdf_context: str, max_chars: int = CHUNK_CHARS) -> List[Dict]:
+    """Split a formatted reading context into chunks tagged with source file and page"""
+    chunks = []
+    sections = SECTION_PATTERN.split(pdf_context)
+    # re.split with one group gives [preamble, name1, body1, name2, body2, ...]
+    named_sections = [("", sections[0])] + list(zip(sections[1::2], sections[2::2]))
+
+    for source, body in named_sections:
+        pages = PAGE_PATTERN.split(body)
+        numbered_pages = [(None, pages[0])] + [(int(number), text) for number, text in zip(pages[1::2], pages[2::2])]
+        for page, text in numbered_pages:
+            for chunk_text in _pack_paragraphs(text, max_chars):
+                chunks.append({'source': source, 'page': page, 'text': chunk_text})
+
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks"""
+
+    def __init__(self, chunks: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(chunk['text'])) for chunk in chunks]
+        self.lengths = [sum(freqs.values()) for freqs in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.token_counts = [estimate_tokens(chunk['text']) for chunk in chunks]
+
+        doc_freqs = Counter()
+        for freqs in self.term_freqs:
+            doc_freqs.update(freqs.keys())
+        n = len(chunks)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+        # Fallback order: first chunk of every source, then the second of every source, ...
+        positions, counts = [], Counter()
+        for chunk in chunks:
+            positions.append(counts[chunk['source']])
+            counts[chunk['source']] += 1
+        self.opening_order = sorted(range(n), key=lambda i: positions[i])
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def scores(self, query_terms: Dict[str, float]) -> List[float]:
+        """BM25 score of every chunk for weighted query terms"""
+        scores = [0.0] * len(self.chunks)
+        for term, weight in query_terms.items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, freqs in enumerate(self.term_freqs):
+                tf = freqs.get(term)
+                if not tf:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+                scores[i] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query_terms: Dict[str, float], top_k: int) -> List[int]:
+        """Indices of the top_k scoring chunks (only chunks with a positive score)"""
+        scores = self.scores(query_terms)
+        ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+        return ranked[:top_k]
+
+
+def get_reading_index(pdf_context: str) -> BM25Index:
+    """Index for a reading context, built once and cached by content hash"""
+    key = hashlib.sha256(pdf_context.encode("utf-8")).hexdigest()
+    index = _index_cache.get(key)
+    if index is None:
+        started = time.perf_counter()
+        index = BM25Index(chunk_reading(pdf_context))
+        _index_cache.set(key, index)
+        metrics.observe('reading_index.build_ms', (time.perf_counter() - started) * 1000)
+    return index
+
+
+def build_query(user_message: str, recent_history: List[Dict]) -> Dict[str, float]:
+    """Weighted query terms: the latest answer counts double, recent turns once"""
+    query = Counter()
+    for message in recent_history:
+        query.update(tokenize(message.get('content', '')))
+    for term in tokenize(user_message):
+        query[term] += 2
+    return query
+
+
+def format_excerpts(chunks: List[Dict]) -> str:
+    """Render chunks in reading order, keeping the === file === and [Page n] labels"""
+    sections = []
+    current_source, current_page = None, None
+    for chunk in chunks:
+        labels = []
+        if chunk['source'] != current_source:
+            if chunk['source']:
+                labels.append(f"=== {chunk['source']} ===")
+            current_source, current_page = chunk['source'], None
+        if chunk['page'] is not None and chunk['page'] != current_page:
+            labels.append(f"[Page {chunk['page']}]")
+            current_page = chunk['page']
+        sections.append("\n".join(labels + [chunk['text']]))
+    return "\n\n".join(sections)
+
+
+def select_reading_context(pdf_context: str, user_message: str, recent_history: List[Dict],
+                           token_budget: int = CONTEXT_TOKEN_BUDGET,
+                           top_k: int = RETRIEVAL_TOP_K) -> Optional[Dict]:
+    """Pick the reading excerpts for one tutor turn
+
+    Returns None when the reading is short enough to send in full. Otherwise
+    returns {'text', 'chunks', 'tokens'} with the best-matching chunks that fit
+    the budget. When few chunks match (e.g. the opening turn) the rest of the
+    budget goes to the opening chunks of each reading.
+    """
+    if estimate_tokens(pdf_context) < RETRIEVAL_MIN_TOKENS:
+        return None
+
+    started = time.perf_counter()
+    index = get_reading_index(pdf_context)
+    ranked = index.search(build_query(user_message, recent_history), top_k)
+    if len(ranked) < top_k:
+        ranked += [i for i in index.opening_order if i not in ranked]
+
+    selected, tokens = [], 0
+    for i in ranked:
+        if tokens + index.token_counts[i] > token_budget:
+            if selected:
+                continue
+        selected.append(i)
+        tokens += index.token_counts[i]
+        if len(selected) >= top_k or tokens >= token_budget:
+            break
+
+    metrics.incr('reading_index.retrievals')
+    metrics.observe('reading_index.search_ms', (time.perf_counter() - started) * 1000)
+    return {
+        'text': format_excerpts([index.chunks[i] for i in sorted(selected)]),
+        'chunks': len(selected),
+        'tokens': tokens
+    }
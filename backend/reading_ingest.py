@@ -0,0 +1,134 @@
+"""Ingest assignment PDFs into the reading_pages table ahead of time
+
+Each PDF listed in Assignment.pdf_paths is extracted once, page by page, and
+stored with its content hash and char/token counts. AITutorService then builds
+the session context from these rows instead of running PyPDF2 per session.
+A PDF without pages gets a single empty row numbered EMPTY_PDF_PAGE_NUMBER, so
+it counts as ingested rather than being re-extracted for every session.
+
+Run directly to ingest every assignment:
+    python reading_ingest.py
+"""
+import os
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session as DBSession
+from models import Assignment, ReadingPage
+from pdf_utils import ASSIGNMENTS_DIR, extract_pages_parallel, file_content_hash, format_pages
+from token_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Page number of the empty marker row stored for a PDF with no pages
+EMPTY_PDF_PAGE_NUMBER = 0
+
+def is_ingested(db: DBSession, pdf_path: str, content_hash: str) -> bool:
+    return db.query(ReadingPage.id).filter(
+        ReadingPage.pdf_path == pdf_path,
+        ReadingPage.content_hash == content_hash
+    ).first() is not None
+
+def ingest_pdf(db: DBSession, pdf_path: str) -> int:
+    """Extract one PDF into reading_pages if this version isn't stored yet. Returns pages written"""
+    full_path = os.path.join(ASSIGNMENTS_DIR, pdf_path)
+    if not os.path.exists(full_path):
+        logger.error(f"PDF file not found: {full_path}")
+        return 0
+
+    content_hash = file_content_hash(full_path)
+    if is_ingested(db, pdf_path, content_hash):
+        return 0
+
+    pages = extract_pages_parallel(full_path)
+    rows = list(enumerate(pages, 1)) or [(EMPTY_PDF_PAGE_NUMBER, "")]
+    for page_number, text in rows:
+        db.add(ReadingPage(
+            pdf_path=pdf_path,
+            content_hash=content_hash,
+            page_number=page_number,
+            text=text,
+            char_count=len(text),
+            token_count=estimate_tokens(text)
+        ))
+
+    # Pages of older versions of this file are no longer needed
+    db.query(ReadingPage).filter(
+        ReadingPage.pdf_path == pdf_path,
+        ReadingPage.content_hash != content_hash
+    ).delete(synchronize_session=False)
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker ingested the same file concurrently
+        db.rollback()
+        return 0
+
+    logger.info(f"Ingested {pdf_path}: {len(pages)} pages, {sum(len(text) for text in pages)} chars")
+    return len(pages)
+
+def ingest_assignment(db: DBSession, assignment: Assignment) -> Dict:
+    """Ingest every PDF of an assignment"""
+    pdf_paths = assignment.pdf_paths or []
+    pages_written = sum(ingest_pdf(db, pdf_path) for pdf_path in pdf_paths)
+    return {'assignment_id': assignment.id, 'pdf_count': len(pdf_paths), 'pages_written': pages_written}
+
+def ingest_assignment_by_id(assignment_id: int):
+    """Background-task entry point: uses its own database session"""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+        if assignment:
+            ingest_assignment(db, assignment)
+    except Exception as e:
+        logger.error(f"Error ingesting readings for assignment {assignment_id}: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+def load_ingested_texts(db: DBSession, pdf_paths: List[str]) -> Optional[Dict[str, str]]:
+    """Rebuild {filename: text} from reading_pages, in the same format extract_texts_from_pdfs returns
+
+    Returns None if any PDF (in its current version on disk) has not been ingested yet.
+    """
+    extracted_texts = {}
+    for pdf_path in pdf_paths:
+        full_path = os.path.join(ASSIGNMENTS_DIR, pdf_path)
+        if not os.path.exists(full_path):
+            logger.error(f"PDF file not found: {full_path}")
+            continue
+
+        rows = db.query(ReadingPage.page_number, ReadingPage.text).filter(
+            ReadingPage.pdf_path == pdf_path,
+            ReadingPage.content_hash == file_content_hash(full_path)
+        ).order_by(ReadingPage.page_number).all()
+        if not rows:
+            return None
+
+        text = format_pages([row.text for row in rows if row.page_number != EMPTY_PDF_PAGE_NUMBER])
+        if text:
+            extracted_texts[os.path.basename(pdf_path)] = text
+
+    return extracted_texts
+
+def ingest_all_assignments():
+    """Ingest the PDFs of every assignment in the database"""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        for assignment in db.query(Assignment).all():
+            result = ingest_assignment(db, assignment)
+            print(f"  ID: {assignment.id}, Title: {assignment.title} - "
+                  f"{result['pdf_count']} PDFs, {result['pages_written']} new pages")
+    except Exception as e:
+        print(f"Error ingesting readings: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    ingest_all_assignments()
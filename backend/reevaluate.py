@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Re-score stored sessions with the current evaluation prompt
+
+Usage:
+    python reevaluate.py --class-id 3 [--assignment-id 12] [--rate 60] [--concurrency 8]
+    python reevaluate.py --resume RUN_ID
+
+Ctrl-C pauses the run at its checkpoint; resume it with --resume.
+"""
+import sys
+import asyncio
+import logging
+import argparse
+from database import SessionLocal
+from ai_service import AsyncAITutorService
+from reevaluation import ReevaluationRunner, claim_run, create_run, get_run
+
+async def report(runner, total):
+    while True:
+        await asyncio.sleep(10)
+        print(f"   {runner.processed}/{total} processed, {len(runner.failed_session_ids)} failed, "
+              f"{runner.sessions_per_minute()} sessions/min")
+
+async def run(args):
+    with SessionLocal() as db:
+        if args.resume:
+            run = claim_run(db, args.resume)
+            if run is None:
+                existing = get_run(db, args.resume)
+                print(f"❌ Run {args.resume} {'not found' if existing is None else 'is ' + existing['status']}")
+                sys.exit(1)
+        else:
+            run = create_run(db, args.class_id, args.assignment_id)
+
+    print(f"🔁 Re-evaluation run {run['run_id']}: {run['total']} sessions "
+          f"({run['processed']} already done), up to {args.rate or 'default'}/min")
+    runner = ReevaluationRunner(AsyncAITutorService(), run['run_id'], args.rate, args.concurrency)
+    reporter = asyncio.create_task(report(runner, run['total']))
+    try:
+        result = await runner.run()
+    finally:
+        reporter.cancel()
+
+    print(f"\n✅ Run {result['run_id']} {result['status']}: {result['processed']}/{result['total']} processed, "
+          f"{result['failed']} failed, {result['sessions_per_minute']} sessions/min")
+    if result['failed_session_ids']:
+        print(f"   Failed sessions: {result['failed_session_ids']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored sessions with the current evaluation prompt")
+    parser.add_argument("--class-id", type=int)
+    parser.add_argument("--assignment-id", type=int)
+    parser.add_argument("--resume", type=int, metavar="RUN_ID", help="Continue a paused or interrupted run")
+    parser.add_argument("--rate", type=float, help="Max evaluations started per minute")
+    parser.add_argument("--concurrency", type=int, help="Max evaluations in flight")
+    args = parser.parse_args()
+    if not (args.resume or args.class_id or args.assignment_id):
+        parser.error("--class-id, --assignment-id or --resume is required")
+
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\n⏸️  Paused at the last checkpoint; continue with --resume")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""Batch re-evaluation of stored sessions
+
+After an instructor changes Class.evaluation_prompt, existing sessions can be
+re-scored from their stored full_transcript. A run streams the matching sessions
+in id order in batches and evaluates them concurrently. At most `concurrency`
+are in flight, and starts are spaced to `rate_per_minute`. Each result is
+written to its Session as it arrives.
+
+Progress is checkpointed to reevaluation_runs as the highest session id below
+which everything is done, so an interrupted run resumes where it stopped.
+Start runs with POST /reevaluations or the reevaluate.py command.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REEVALUATION_RATE_PER_MINUTE = float(os.getenv("REEVALUATION_RATE_PER_MINUTE", "60"))
+REEVALUATION_CONCURRENCY = int(os.getenv("REEVALUATION_CONCURRENCY", "8"))
+REEVALUATION_BATCH_SIZE = 50
+CHECKPOINT_SECONDS = 10
+STALE_SECONDS = 120  # A 'running' run without a checkpoint for this long is presumed dead
+
+
+class RateLimiter:
+    """Spaces acquisitions evenly so at most rate_per_minute start per minute"""
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next = 0.0
+
+    async def acquire(self):
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def run_to_dict(run) -> Dict:
+    return {
+        "run_id": run.id,
+        "class_id": run.class_id,
+        "assignment_id": run.assignment_id,
+        "status": run.status,
+        "total": run.total,
+        "processed": run.processed,
+        "failed": len(run.failed_session_ids or []),
+        "failed_session_ids": run.failed_session_ids or [],
+        "last_session_id": run.last_session_id,
+        "sessions_per_minute": run.sessions_per_minute,
+        "last_error": run.last_error,
+        "created_at": run.created_at,
+        "heartbeat_at": run.heartbeat_at,
+        "finished_at": run.finished_at
+    }
+
+
+def _session_filters(run):
+    from models import Session
+
+    filters = []
+    if run.class_id is not None:
+        filters.append(Session.class_id == run.class_id)
+    if run.assignment_id is not None:
+        filters.append(Session.assignment_id == run.assignment_id)
+    return filters
+
+
+def create_run(db, class_id: Optional[int] = None, assignment_id: Optional[int] = None) -> Dict:
+    """Record a new run over a class's and/or assignment's sessions"""
+    from models import ReevaluationRun, Session
+
+    if class_id is None and assignment_id is None:
+        raise ValueError("class_id or assignment_id is required")
+
+    run = ReevaluationRun(class_id=class_id, assignment_id=assignment_id, status="running", processed=0,
+                          failed_session_ids=[], last_session_id=0, heartbeat_at=datetime.now(timezone.utc))
+    run.total = db.query(Session).filter(*_session_filters(run)).count()
+    db.add(run)
+    db.commit()
+    return run_to_dict(run)
+
+
+def claim_run(db, run_id: int) -> Optional[Dict]:
+    """Mark a paused, failed or abandoned run as running; None if it can't be resumed"""
+    from models import ReevaluationRun
+
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=STALE_SECONDS)
+    claimed = db.query(ReevaluationRun).filter(
+        ReevaluationRun.id == run_id,
+        (ReevaluationRun.status.in_(('paused', 'failed'))) |
+        ((ReevaluationRun.status == 'running') & (ReevaluationRun.heartbeat_at < stale_before))
+    ).update({'status': 'running', 'heartbeat_at': datetime.now(timezone.utc), 'last_error': None},
+             synchronize_session=False)
+    db.commit()
+    return run_to_dict(db.get(ReevaluationRun, run_id)) if claimed else None
+
+
+def get_run(db, run_id: int) -> Optional[Dict]:
+    from models import ReevaluationRun
+
+    run = db.get(ReevaluationRun, run_id)
+    return run_to_dict(run) if run else None
+
+
+class ReevaluationRunner:
+    """Executes one run (already marked 'running') from its checkpoint to the end"""
+
+    def __init__(self, ai_service, run_id: int, rate_per_minute: Optional[float] = None,
+                 concurrency: Optional[int] = None, session_factory=None):
+        self.ai_service = ai_service
+        self.run_id = run_id
+        self.rate_per_minute = rate_per_minute or REEVALUATION_RATE_PER_MINUTE
+        self.concurrency = concurrency or REEVALUATION_CONCURRENCY
+        self._session_factory = session_factory
+
+        self.processed = 0
+        self.completed_this_run = 0
+        self.last_session_id = 0
+        self.failed_session_ids: List[int] = []
+        self.started = None
+        self._started_ids = deque()  # Dispatched session ids, in id order
+        self._finished_ids = set()
+        self._prompts: Dict[int, Optional[str]] = {}
+
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    def sessions_per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started if self.started else 0
+        return round(self.completed_this_run / (elapsed / 60), 1) if elapsed > 0 else 0.0
+
+    # Database access (run in threads)
+
+    def _load(self):
+        from models import ReevaluationRun
+
+        with self.session_factory() as db:
+            run = db.get(ReevaluationRun, self.run_id)
+            if run is None:
+                raise ValueError(f"Reevaluation run {self.run_id} not found")
+            self.processed = run.processed
+            self.last_session_id = run.last_session_id
+            self.failed_session_ids = list(run.failed_session_ids or [])
+            return run_to_dict(run)
+
+    def _next_batch(self, after_id: int):
+        """Next sessions after a given id: (id, class_id, full_transcript) rows"""
+        from models import ReevaluationRun, Session
+
+        with self.session_factory() as db:
+            run = db.get(ReevaluationRun, self.run_id)
+            return db.query(Session.id, Session.class_id, Session.full_transcript) \
+                .filter(*_session_filters(run), Session.id > after_id) \
+                .order_by(Session.id).limit(REEVALUATION_BATCH_SIZE).all()
+
+    def _evaluation_prompt(self, class_id: int) -> Optional[str]:
+        from models import Class
+
+        if class_id not in self._prompts:
+            with self.session_factory() as db:
+                row = db.query(Class.evaluation_prompt).filter(Class.id == class_id).first()
+                self._prompts[class_id] = row.evaluation_prompt if row else None
+        return self._prompts[class_id]
+
+    def _store_result(self, session_id: int, evaluation: Dict):
+        from models import Session
+
+        with self.session_factory() as db:
+            db.query(Session).filter(Session.id == session_id).update({
+                'final_score': evaluation.get('score'),
+                'score_category': evaluation.get('category'),
+                'ai_feedback': evaluation.get('feedback')
+            }, synchronize_session=False)
+            db.commit()
+
+    def _checkpoint(self, status: str, values: Dict):
+        from models import ReevaluationRun
+
+        values.update({'status': status, 'heartbeat_at': datetime.now(timezone.utc)})
+        if status in ('completed', 'failed', 'paused'):
+            values['finished_at'] = datetime.now(timezone.utc)
+        with self.session_factory() as db:
+            db.query(ReevaluationRun).filter(ReevaluationRun.id == self.run_id) \
+                .update(values, synchronize_session=False)
+            db.commit()
+
+    # Async execution
+
+    def _checkpoint_values(self) -> Dict:
+        return {
+            'processed': self.processed,
+            'last_session_id': self.last_session_id,
+            'failed_session_ids': list(self.failed_session_ids),
+            'sessions_per_minute': self.sessions_per_minute()
+        }
+
+    def _mark_finished(self, session_id: int):
+        # Advance the checkpoint over the contiguous prefix of finished sessions
+        self._finished_ids.add(session_id)
+        while self._started_ids and self._started_ids[0] in self._finished_ids:
+            self.last_session_id = self._started_ids.popleft()
+            self._finished_ids.discard(self.last_session_id)
+            self.processed += 1
+
+    async def _evaluate(self, row, slots: asyncio.Semaphore):
+        try:
+            prompt = await asyncio.to_thread(self._evaluation_prompt, row.class_id)
+            evaluation = await self.ai_service.evaluate_transcript_async(f"reevaluation_{row.id}", row.full_transcript or [], prompt)
+            if 'error' in evaluation:
+                raise RuntimeError(evaluation['error'])
+            await asyncio.to_thread(self._store_result, row.id, evaluation)
+            metrics.incr('reevaluation.sessions')
+        except asyncio.CancelledError:
+            # Not finished: stays behind the checkpoint and is redone on resume
+            raise
+        except Exception as e:
+            logger.warning(f"Re-evaluation of session {row.id} failed: {str(e)}")
+            metrics.incr('reevaluation.failures')
+            self.failed_session_ids.append(row.id)
+        finally:
+            slots.release()
+
+        self.completed_this_run += 1
+        self._mark_finished(row.id)
+
+    async def _checkpointer(self):
+        while True:
+            await asyncio.sleep(CHECKPOINT_SECONDS)
+            await asyncio.to_thread(self._checkpoint, 'running', self._checkpoint_values())
+            logger.info(f"Re-evaluation run {self.run_id}: {self.processed} processed, "
+                        f"{self.sessions_per_minute()} sessions/min")
+
+    async def run(self) -> Dict:
+        """Evaluate every remaining session; returns the final run state"""
+        await asyncio.to_thread(self._load)
+        self.started = time.monotonic()
+        limiter = RateLimiter(self.rate_per_minute)
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        checkpointer = asyncio.create_task(self._checkpointer())
+        status, error = 'completed', None
+
+        try:
+            after_id = self.last_session_id
+            while True:
+                batch = await asyncio.to_thread(self._next_batch, after_id)
+                if not batch:
+                    break
+                after_id = batch[-1].id
+                for row in batch:
+                    await slots.acquire()
+                    await limiter.acquire()
+                    self._started_ids.append(row.id)
+                    task = asyncio.create_task(self._evaluate(row, slots))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            # Shutdown or Ctrl-C: keep the checkpoint so the run can be resumed
+            status = 'paused'
+            raise
+        except Exception as e:
+            status, error = 'failed', str(e)
+            logger.error(f"Re-evaluation run {self.run_id} failed: {error}")
+        finally:
+            checkpointer.cancel()
+            for task in list(tasks):
+                task.cancel()
+            values = self._checkpoint_values()
+            if error:
+                values['last_error'] = error
+            await asyncio.shield(asyncio.to_thread(self._checkpoint, status, values))
+            logger.info(f"Re-evaluation run {self.run_id} {status}: {self.processed} processed, "
+                        f"{len(self.failed_session_ids)} failed, {self.sessions_per_minute()} sessions/min")
+
+        return await asyncio.to_thread(self._load)
+
+
+class ReevaluationManager:
+    """Runs started through the API, as background tasks in this process"""
+
+    def __init__(self, ai_service):
+        self.ai_service = ai_service
+        self.runners: Dict[int, ReevaluationRunner] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def start(self, run_id: int, rate_per_minute: Optional[float] = None, concurrency: Optional[int] = None):
+        runner = ReevaluationRunner(self.ai_service, run_id, rate_per_minute, concurrency)
+        task = asyncio.create_task(runner.run())
+        self.runners[run_id] = runner
+        self._tasks[run_id] = task
+
+        def finished(_):
+            self.runners.pop(run_id, None)
+            self._tasks.pop(run_id, None)
+        task.add_done_callback(finished)
+
+    def live_progress(self, run_id: int) -> Optional[Dict]:
+        """In-memory progress for a run executing here (fresher than the last checkpoint)"""
+        runner = self.runners.get(run_id)
+        if runner is None or runner.started is None:
+            return None
+        return {
+            'processed': runner.processed,
+            'failed': len(runner.failed_session_ids),
+            'sessions_per_minute': runner.sessions_per_minute()
+        }
+
+    async def stop(self):
+        """Pause running runs at their checkpoint (app shutdown)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,274 @@
+"""Timeouts, retries and circuit breaking for vendor API calls
+
+Every OpenAI (chat, Whisper) and ElevenLabs call goes through a VendorPolicy:
+
+- Each attempt is bounded by the vendor's timeout.
+- Transient failures (timeouts, connection errors, 408/409/429/5xx) are retried
+  with full-jitter exponential backoff. A Retry-After header, when the vendor
+  sends one, sets the minimum wait.
+- Retries stop once the next wait would overrun the call's retry budget. A slow
+  vendor therefore costs at most about `budget_seconds` plus one attempt, not an
+  unbounded queue of retries.
+- After `failure_threshold` consecutive transient failures the circuit opens.
+  Calls then fail fast with CircuitOpenError for `reset_seconds`, then a single
+  probe call decides whether it closes again. Client errors (400, 401...)
+  mean the vendor is up, so they never open it.
+
+When transient failures outlast the retries, or the circuit is open, the call
+raises VendorUnavailableError (CircuitOpenError is a subclass). Endpoints turn
+that into a 503 with Retry-After instead of passing vendor errors to students.
+Client errors are raised unchanged.
+
+A concurrency `slot` (anything with async acquire() and release()) can be
+taken per attempt: waiting for it doesn't count against the timeout, and
+backoff sleeps don't hold it.
+
+The SDK clients are created with max_retries=0 so retries aren't stacked.
+Settings come from <PREFIX>_TIMEOUT_SECONDS, _MAX_ATTEMPTS, _RETRY_BUDGET_SECONDS,
+_BREAKER_THRESHOLD and _BREAKER_RESET_SECONDS, with PREFIX OPENAI_CHAT,
+OPENAI_STT or ELEVENLABS.
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+import httpx
+import openai
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class VendorUnavailableError(Exception):
+    """A vendor kept failing transiently; retry_after is a suggested wait in seconds"""
+
+    def __init__(self, vendor: str, message: str, retry_after: float):
+        super().__init__(message)
+        self.vendor = vendor
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(VendorUnavailableError):
+    """The vendor's circuit is open; retry_after is the seconds until the next probe"""
+
+    def __init__(self, vendor: str, retry_after: float):
+        super().__init__(vendor, f"{vendor} is unavailable (circuit open, retry in {retry_after:.0f}s)", retry_after)
+
+
+def _is_timeout(error: Exception) -> bool:
+    return isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException, openai.APITimeoutError))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed vendor call may succeed if repeated"""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, openai.APIConnectionError)):
+        return True
+    return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The wait a vendor asked for through Retry-After (or OpenAI's retry-after-ms), if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        # HTTP-date form
+        return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class VendorPolicy:
+    """Timeout, retry and circuit-breaker settings and state for one vendor API"""
+
+    def __init__(self, name: str, timeout_seconds: float = 30.0, max_attempts: int = 3,
+                 budget_seconds: float = 20.0, base_delay: float = 0.5, max_delay: float = 8.0,
+                 failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.budget_seconds = budget_seconds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        metrics.register_gauge(f'vendor.{name}.circuit_open', lambda: 1 if self.state() != 'closed' else 0)
+
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    def _before_attempt(self):
+        state = self.state()
+        if state == 'closed':
+            return
+        if state == 'half_open' and not self._probing:
+            self._probing = True  # This attempt is the probe; everyone else keeps failing fast
+            return
+        metrics.incr(f'vendor.{self.name}.rejected')
+        remaining = self.reset_seconds - (time.monotonic() - self.opened_at) if state == 'open' else 1.0
+        raise CircuitOpenError(self.name, max(remaining, 1.0))
+
+    def _record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"{self.name} circuit closed")
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def _record_failure(self):
+        self.consecutive_failures += 1
+        if self._probing or (self.opened_at is None and self.consecutive_failures >= self.failure_threshold):
+            logger.warning(f"{self.name} circuit opened after {self.consecutive_failures} consecutive failures")
+            metrics.incr(f'vendor.{self.name}.circuit_opened')
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        """Seconds to wait before retry number `attempt` (1-based)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        requested = retry_after_seconds(error)
+        return max(delay, requested) if requested is not None else delay
+
+    def _after_failure(self, attempt: int, started: float, error: Exception) -> float:
+        """Account for a failed attempt; returns the wait before the next one, or raises"""
+        if _is_timeout(error):
+            metrics.incr(f'vendor.{self.name}.timeouts')
+        if not is_retryable(error):
+            self._record_success()  # The vendor answered; the request itself was bad
+            raise error
+        metrics.incr(f'vendor.{self.name}.failures')
+        self._record_failure()
+
+        delay = self.backoff(attempt, error)
+        if attempt >= self.max_attempts or self.opened_at is not None \
+                or time.monotonic() - started + delay > self.budget_seconds:
+            metrics.incr(f'vendor.{self.name}.exhausted')
+            retry_after = self.reset_seconds if self.opened_at is not None else max(delay, 1.0)
+            raise VendorUnavailableError(
+                self.name,
+                f"{self.name} is unavailable after {attempt} attempt(s): {str(error) or type(error).__name__}",
+                retry_after
+            ) from error
+        metrics.incr(f'vendor.{self.name}.retries')
+        logger.warning(f"{self.name} call failed ({type(error).__name__}: {str(error) or 'timed out'}), "
+                       f"retry {attempt}/{self.max_attempts - 1} in {delay:.2f}s")
+        return delay
+
+    def _after_success(self, started: float):
+        self._record_success()
+        metrics.observe(f'vendor.{self.name}.call_ms', (time.monotonic() - started) * 1000)
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, slot=None, hold_slot: bool = False, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) under this vendor's timeout, retry and breaker policy
+
+        With `slot`, each attempt acquires it first and releases it when the
+        attempt ends. hold_slot=True keeps it after a successful attempt (for
+        streams still being read); the caller then releases it.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            if slot is not None:
+                try:
+                    await slot.acquire()
+                except asyncio.CancelledError:
+                    self._probing = False
+                    raise
+            succeeded = False
+            try:
+                result = await asyncio.wait_for(fn(*args, **kwargs), self.timeout_seconds)
+                succeeded = True
+            except asyncio.CancelledError:
+                self._probing = False
+                raise
+            except Exception as e:
+                delay = self._after_failure(attempt, started, e)
+            finally:
+                if slot is not None and not (succeeded and hold_slot):
+                    slot.release()
+
+            if succeeded:
+                self._after_success(started)
+                return result
+            await asyncio.sleep(delay)
+
+    def call_sync(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """call() for blocking clients; the per-attempt timeout must be set on the client itself"""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                time.sleep(self._after_failure(attempt, started, e))
+                continue
+            self._after_success(started)
+            return result
+
+    def stats(self) -> Dict:
+        return {
+            'state': self.state(),
+            'consecutive_failures': self.consecutive_failures,
+            'timeout_seconds': self.timeout_seconds,
+            'max_attempts': self.max_attempts,
+            'budget_seconds': self.budget_seconds,
+            'retries': metrics.get(f'vendor.{self.name}.retries'),
+            'exhausted': metrics.get(f'vendor.{self.name}.exhausted'),
+            'circuit_opened': metrics.get(f'vendor.{self.name}.circuit_opened'),
+            'rejected': metrics.get(f'vendor.{self.name}.rejected')
+        }
+
+
+def create_vendor_policy(name: str, prefix: str, timeout_seconds: float, budget_seconds: float) -> VendorPolicy:
+    """Build a vendor's policy from its <prefix>_* environment variables"""
+    return VendorPolicy(
+        name,
+        timeout_seconds=float(os.getenv(f"{prefix}_TIMEOUT_SECONDS", str(timeout_seconds))),
+        max_attempts=int(os.getenv(f"{prefix}_MAX_ATTEMPTS", "3")),
+        budget_seconds=float(os.getenv(f"{prefix}_RETRY_BUDGET_SECONDS", str(budget_seconds))),
+        failure_threshold=int(os.getenv(f"{prefix}_BREAKER_THRESHOLD", "5")),
+        reset_seconds=float(os.getenv(f"{prefix}_BREAKER_RESET_SECONDS", "30"))
+    )
+
+
+openai_chat = create_vendor_policy('openai_chat', 'OPENAI_CHAT', timeout_seconds=30, budget_seconds=20)
+openai_stt = create_vendor_policy('openai_stt', 'OPENAI_STT', timeout_seconds=60, budget_seconds=20)
+elevenlabs = create_vendor_policy('elevenlabs', 'ELEVENLABS', timeout_seconds=30, budget_seconds=10)
+
+
+def vendor_stats() -> Dict:
+    return {policy.name: policy.stats() for policy in (openai_chat, openai_stt, elevenlabs)}
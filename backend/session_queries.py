@@ -0,0 +1,151 @@
+"""Instructor-facing session listing queries
+
+Sessions are listed with one joined query that pulls the student, assignment
+and class names alongside each row, ordered by id (newest first) for keyset
+pagination. The full_transcript blob is only selected when asked for.
+The same query backs the streaming NDJSON/CSV export.
+"""
+import io
+import csv
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session as DBSession
+from models import Assignment, Class, Session, Student
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched per round-trip by the export cursor, and bytes buffered per yielded chunk
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+SESSION_COLUMNS = (
+    Session.id,
+    Session.status,
+    Session.final_score,
+    Session.score_category,
+    Session.ai_feedback,
+    Session.started_at,
+    Session.completed_at,
+    Session.student_id,
+    Session.assignment_id,
+    Session.class_id,
+)
+JOINED_COLUMNS = (
+    Student.name.label("student_name"),
+    Assignment.title.label("assignment_title"),
+    Class.class_name.label("class_name"),
+    Class.professor_name.label("professor_name"),
+)
+
+def session_listing_query(db: DBSession, class_id: Optional[int] = None, assignment_id: Optional[int] = None,
+                          status: Optional[str] = None, completed_after: Optional[datetime] = None,
+                          completed_before: Optional[datetime] = None, include_transcripts: bool = False):
+    """Joined, filtered session query ordered newest first (by id)"""
+    columns = SESSION_COLUMNS + JOINED_COLUMNS
+    if include_transcripts:
+        columns += (Session.full_transcript,)
+
+    query = db.query(*columns) \
+        .outerjoin(Student, Student.id == Session.student_id) \
+        .outerjoin(Assignment, Assignment.id == Session.assignment_id) \
+        .outerjoin(Class, Class.id == Session.class_id)
+
+    if class_id is not None:
+        query = query.filter(Session.class_id == class_id)
+    if assignment_id is not None:
+        query = query.filter(Session.assignment_id == assignment_id)
+    if status is not None:
+        query = query.filter(Session.status == status)
+    if completed_after is not None:
+        query = query.filter(Session.completed_at >= completed_after)
+    if completed_before is not None:
+        query = query.filter(Session.completed_at < completed_before)
+
+    return query.order_by(Session.id.desc())
+
+def session_row_to_dict(row) -> Dict:
+    """Response shape for one listing row (same keys /test-data has always returned)"""
+    data = {
+        "session_id": row.id,
+        "student_name": row.student_name or "Unknown",
+        "assignment_title": row.assignment_title or "Unknown",
+        "class_name": row.class_name or "Unknown",
+        "professor_name": row.professor_name or "Unknown",
+        "assignment_id": row.assignment_id,
+        "status": row.status,
+        "final_score": row.final_score,
+        "score_category": row.score_category,
+        "ai_feedback": row.ai_feedback,
+        "started_at": row.started_at,
+        "completed_at": row.completed_at
+    }
+    if "full_transcript" in row._fields:
+        data["transcript"] = row.full_transcript
+    return data
+
+def list_sessions_page(db: DBSession, cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                       **filters) -> Tuple[List[Dict], Optional[int]]:
+    """One keyset page of sessions: (rows, cursor for the next page or None)"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = session_listing_query(db, **filters)
+    if cursor is not None:
+        query = query.filter(Session.id < cursor)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [session_row_to_dict(row) for row in rows[:limit]], next_cursor
+
+def _export_lines(rows, export_format: str) -> Iterator[str]:
+    if export_format == "ndjson":
+        for row in rows:
+            yield json.dumps(session_row_to_dict(row), default=str) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for row in rows:
+        data = session_row_to_dict(row)
+        if "transcript" in data:
+            data["transcript"] = json.dumps(data["transcript"])
+        if not header_written:
+            writer.writerow(data.keys())
+            header_written = True
+        writer.writerow(data.values())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+def export_sessions(export_format: str = "ndjson", **filters) -> Iterator[bytes]:
+    """Stream the session listing as NDJSON or CSV without loading it into memory
+
+    Opens its own database session: the generator runs after the request's
+    get_db session has been closed. Rows come from a server-side cursor in
+    EXPORT_BATCH_SIZE batches and are yielded in ~EXPORT_CHUNK_BYTES chunks.
+    """
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rows = session_listing_query(db, **filters).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        chunk = []
+        chunk_size = 0
+        for line in _export_lines(rows, export_format):
+            chunk.append(line)
+            chunk_size += len(line)
+            if chunk_size >= EXPORT_CHUNK_BYTES:
+                yield "".join(chunk).encode("utf-8")
+                chunk = []
+                chunk_size = 0
+        if chunk:
+            yield "".join(chunk).encode("utf-8")
+    finally:
+        db.close()
@@ -0,0 +1,417 @@
+"""Storage backends for AI tutoring sessions
+
+AITutorService keeps one dict per session (conversation manager, reading context,
+history, prompts). The store decides where that dict lives:
+
+- InMemorySessionStore: a bounded per-process hot tier (single worker only); idle or
+  overflow sessions are hibernated to compressed files on disk and rehydrated on access
+- SQLSessionStore: a shared table on the existing database engine, fronted by a
+  small local cache so repeated turns on the same worker skip the large context blob
+
+Changes to an existing session go through update(), which reapplies the change
+to a fresh copy if another worker saved the session in the meantime.
+"""
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from caching import LRUCache
+from conversation_manager import ConversationManager
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Keys that are written once when the session starts and never change afterwards
+CONTEXT_KEYS = ('pdf_context', 'reading_text')
+# Row version a session dict was loaded at (SQL store only; never serialized)
+VERSION_KEY = '_store_version'
+UPDATE_ATTEMPTS = 5
+
+
+class SessionConflictError(Exception):
+    """The session was saved by someone else since it was loaded"""
+    pass
+
+
+def serialize_session(session_data: Dict) -> Dict:
+    """Convert session data into JSON-safe form"""
+    serialized = dict(session_data)
+    serialized.pop(VERSION_KEY, None)
+    serialized['manager'] = session_data['manager'].to_dict()
+    if isinstance(session_data.get('start_time'), datetime):
+        serialized['start_time'] = session_data['start_time'].isoformat()
+    return serialized
+
+
+def deserialize_session(serialized: Dict) -> Dict:
+    """Inverse of serialize_session"""
+    session_data = dict(serialized)
+    session_data['manager'] = ConversationManager.from_dict(serialized.get('manager', {}))
+    if isinstance(serialized.get('start_time'), str):
+        session_data['start_time'] = datetime.fromisoformat(serialized['start_time'])
+    return session_data
+
+
+def estimate_session_bytes(session_data: Dict) -> int:
+    """Rough size of a session's text payload (readings, prompts and history)"""
+    total = sum(len(session_data.get(key) or '') for key in CONTEXT_KEYS + ('tutor_prompt', 'evaluation_prompt'))
+    total += sum(len(msg.get('content', '')) for msg in session_data.get('conversation_history', []))
+    return total
+
+
+class SessionStore(ABC):
+    """Interface for session storage
+
+    Supports dict-style access so callers can keep using `session_id in store`,
+    `store[session_id]` and `store[session_id] = data`. Session dicts are mutated
+    in place by the service, so callers must call save() (or use update()) after
+    each change.
+    """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def save(self, session_id: str, session_data: Dict):
+        """Store a session; raises SessionConflictError if it changed since it was loaded"""
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        pass
+
+    def update(self, session_id: str, mutate: Callable[[Dict], None]) -> Optional[Dict]:
+        """Apply mutate to the latest copy of a session and save it; None if there is no session
+
+        On a conflicting save the session is reloaded and mutate applied again,
+        so it must only depend on the session it is given.
+        """
+        for attempt in range(UPDATE_ATTEMPTS):
+            session_data = self.get(session_id)
+            if session_data is None:
+                return None
+            mutate(session_data)
+            try:
+                self.save(session_id, session_data)
+                return session_data
+            except SessionConflictError:
+                metrics.incr('session_store.save_conflicts')
+                logger.info(f"Session {session_id} changed concurrently, retrying update ({attempt + 1})")
+                self._forget(session_id)
+        raise SessionConflictError(f"Session {session_id} kept changing; gave up after {UPDATE_ATTEMPTS} attempts")
+
+    def _forget(self, session_id: str):
+        """Drop any locally cached copy so the next get() reloads it"""
+        pass
+
+    def hibernate(self, session_id: str):
+        """Release the session from process memory while keeping it retrievable"""
+        pass
+
+    def stats(self) -> Dict:
+        return {'backend': type(self).__name__}
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> Dict:
+        session_data = self.get(session_id)
+        if session_data is None:
+            raise KeyError(session_id)
+        return session_data
+
+    def __setitem__(self, session_id: str, session_data: Dict):
+        self.save(session_id, session_data)
+
+    def __delitem__(self, session_id: str):
+        if not self.delete(session_id):
+            raise KeyError(session_id)
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process session storage with a bounded hot tier and a cold disk tier
+
+    Requires single worker mode (--workers 1). The hot tier holds at most
+    max_hot_sessions deserialized sessions; sessions that are idle for
+    idle_ttl_seconds or pushed out by newer ones are written as zlib-compressed
+    JSON to hibernate_dir and loaded back on the next access. Cold files older
+    than cold_ttl_seconds are deleted.
+
+    Every hot-tier operation runs under the store lock, and eviction writes the
+    cold file before that lock is released. A session being hibernated is
+    therefore always visible in one tier or the other.
+    """
+
+    def __init__(self, max_hot_sessions: int = 200, idle_ttl_seconds: Optional[float] = 900,
+                 hibernate_dir: Optional[str] = None, cold_ttl_seconds: float = 86400):
+        self.hibernate_dir = hibernate_dir or os.path.join(tempfile.gettempdir(), "professr_sessions")
+        self.cold_ttl_seconds = cold_ttl_seconds
+        os.makedirs(self.hibernate_dir, exist_ok=True)
+
+        self._hot = LRUCache(max_entries=max_hot_sessions, ttl_seconds=idle_ttl_seconds, on_evict=self._on_evict)
+        self._hot_bytes = {}  # session_id -> estimated bytes held in RAM
+        self._cold_bytes = {}  # file path -> compressed bytes on disk
+        # Reentrant: hot-tier operations hold it while on_evict spills to disk
+        self._lock = threading.RLock()
+        self._last_prune = 0.0
+
+        # Sessions hibernated by a previous process are still valid
+        for filename in os.listdir(self.hibernate_dir):
+            if filename.endswith('.json.z'):
+                path = os.path.join(self.hibernate_dir, filename)
+                self._cold_bytes[path] = os.path.getsize(path)
+
+        metrics.register_gauge('session_store.hot_sessions', lambda: len(self._hot))
+        metrics.register_gauge('session_store.hot_bytes', lambda: sum(self._hot_bytes.values()))
+        metrics.register_gauge('session_store.cold_sessions', lambda: len(self._cold_bytes))
+        metrics.register_gauge('session_store.cold_bytes', lambda: sum(self._cold_bytes.values()))
+
+    def _cold_path(self, session_id: str) -> str:
+        # Hash the id so client-supplied session ids can never escape hibernate_dir
+        digest = hashlib.sha256(session_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.hibernate_dir, f"{digest}.json.z")
+
+    def _on_evict(self, session_id: str, session_data: Dict, reason: str):
+        metrics.incr(f'session_store.evictions.{reason}')
+        self._write_cold(session_id, session_data)
+
+    def _write_cold(self, session_id: str, session_data: Dict):
+        path = self._cold_path(session_id)
+        payload = zlib.compress(json.dumps({
+            'session_id': session_id,
+            'session': serialize_session(session_data)
+        }).encode('utf-8'))
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._hot_bytes.pop(session_id, None)
+            self._cold_bytes[path] = len(payload)
+        metrics.incr('session_store.hibernations')
+        logger.info(f"Hibernated session {session_id} to disk ({len(payload)} bytes compressed)")
+        self._prune_cold_tier()
+
+    def _read_cold(self, session_id: str) -> Optional[Dict]:
+        path = self._cold_path(session_id)
+        try:
+            with open(path, 'rb') as f:
+                payload = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Could not rehydrate session {session_id}: {str(e)}")
+            return None
+
+        if payload.get('session_id') != session_id:
+            return None
+
+        os.remove(path)
+        with self._lock:
+            self._cold_bytes.pop(path, None)
+        return deserialize_session(payload['session'])
+
+    def _prune_cold_tier(self):
+        """Delete hibernated sessions older than cold_ttl_seconds (at most every 5 minutes)"""
+        now = time.time()
+        if now - self._last_prune < 300:
+            return
+        self._last_prune = now
+
+        for path in list(self._cold_bytes):
+            try:
+                expired = now - os.path.getmtime(path) > self.cold_ttl_seconds
+                if expired:
+                    os.remove(path)
+                    metrics.incr('session_store.cold_pruned')
+            except FileNotFoundError:
+                expired = True
+            if expired:
+                with self._lock:
+                    self._cold_bytes.pop(path, None)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            session_data = self._hot.get(session_id)
+            if session_data is not None:
+                return session_data
+
+            session_data = self._read_cold(session_id)
+            if session_data is not None:
+                metrics.incr('session_store.rehydrations')
+                logger.info(f"Rehydrated session {session_id} from disk")
+                self.save(session_id, session_data)
+            return session_data
+
+    def save(self, session_id: str, session_data: Dict):
+        with self._lock:
+            self._hot_bytes[session_id] = estimate_session_bytes(session_data)
+            self._hot.set(session_id, session_data)
+
+    def delete(self, session_id: str) -> bool:
+        path = self._cold_path(session_id)
+        with self._lock:
+            found = self._hot.pop(session_id) is not None
+            self._hot_bytes.pop(session_id, None)
+            found = self._cold_bytes.pop(path, None) is not None or found
+            if os.path.exists(path):
+                os.remove(path)
+        return found
+
+    def hibernate(self, session_id: str):
+        with self._lock:
+            session_data = self._hot.pop(session_id)
+            if session_data is not None:
+                self._write_cold(session_id, session_data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._hot.expire()
+        return {
+            'backend': type(self).__name__,
+            'hot_tier': self._hot.stats(),
+            'hot_bytes': sum(self._hot_bytes.values()),
+            'cold_sessions': len(self._cold_bytes),
+            'cold_bytes': sum(self._cold_bytes.values()),
+            'hibernate_dir': self.hibernate_dir
+        }
+
+
+class SQLSessionStore(SessionStore):
+    """Session storage shared across workers through the `ai_session_states` table
+
+    Each row keeps the write-once context (readings) apart from the per-turn state,
+    so a save only rewrites the conversation state. A local LRU cache holds
+    deserialized sessions keyed by row version; a lookup only reads the version
+    column unless another worker has changed the session since we last saw it.
+
+    Saves are optimistic: a loaded session remembers its row version and is only
+    written if the row still has it, so two workers can't overwrite each other's
+    turns. Sessions created in this process (no version yet) are upserted.
+    """
+
+    def __init__(self, session_factory=None, cache_size: int = 128, idle_ttl_seconds: Optional[float] = 900):
+        if session_factory is None:
+            # Import here so the in-memory store works without DATABASE_URL
+            from database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        # Evicting from the local cache is free: the database is the cold tier
+        self.cache = LRUCache(max_entries=cache_size, ttl_seconds=idle_ttl_seconds)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        from models import AISessionState
+
+        cached = self.cache.get(session_id)
+        with self.session_factory() as db:
+            if cached is not None:
+                version = db.query(AISessionState.version).filter(
+                    AISessionState.session_id == session_id
+                ).scalar()
+                if version == cached[0]:
+                    return cached[1]
+                if version is None:
+                    self.cache.pop(session_id)
+                    return None
+
+            row = db.query(AISessionState).filter(AISessionState.session_id == session_id).first()
+            if not row:
+                return None
+
+            serialized = dict(row.state)
+            serialized.update(row.context)
+            session_data = deserialize_session(serialized)
+            session_data[VERSION_KEY] = row.version
+            self.cache.set(session_id, (row.version, session_data))
+            return session_data
+
+    def save(self, session_id: str, session_data: Dict):
+        from models import AISessionState
+
+        serialized = serialize_session(session_data)
+        context = {key: serialized.pop(key) for key in CONTEXT_KEYS if key in serialized}
+
+        cached = self.cache.get(session_id)
+        context_unchanged = cached is not None and all(
+            cached[1].get(key) == session_data.get(key) for key in CONTEXT_KEYS
+        )
+        expected = session_data.get(VERSION_KEY)
+
+        with self.session_factory() as db:
+            if expected is not None:
+                values = {'state': serialized, 'version': expected + 1}
+                if not context_unchanged:
+                    values['context'] = context
+                updated = db.query(AISessionState).filter(
+                    AISessionState.session_id == session_id,
+                    AISessionState.version == expected
+                ).update(values, synchronize_session=False)
+                if updated == 0:
+                    db.rollback()
+                    self.cache.pop(session_id)  # Our copy is stale (and possibly half-mutated)
+                    raise SessionConflictError(f"Session {session_id} changed since version {expected}")
+                version = expected + 1
+            else:
+                row = db.query(AISessionState).filter(AISessionState.session_id == session_id).first()
+                if row:
+                    row.state = serialized
+                    row.context = context
+                    row.version = row.version + 1
+                else:
+                    row = AISessionState(session_id=session_id, context=context, state=serialized, version=1)
+                    db.add(row)
+                db.flush()
+                version = row.version
+            db.commit()
+
+        session_data[VERSION_KEY] = version
+        self.cache.set(session_id, (version, session_data))
+
+    def _forget(self, session_id: str):
+        self.cache.pop(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        from models import AISessionState
+
+        self.cache.pop(session_id)
+        with self.session_factory() as db:
+            deleted = db.query(AISessionState).filter(AISessionState.session_id == session_id).delete()
+            db.commit()
+        return deleted > 0
+
+    def hibernate(self, session_id: str):
+        self.cache.pop(session_id)
+
+    def stats(self) -> Dict:
+        self.cache.expire()
+        return {'backend': type(self).__name__, 'local_cache': self.cache.stats()}
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by SESSION_STORE_BACKEND (memory or sql)"""
+    backend = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+    idle_ttl_seconds = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "900"))
+
+    if backend == "sql":
+        cache_size = int(os.getenv("SESSION_STORE_CACHE_SIZE", "128"))
+        logger.info(f"Using SQL session store (local cache size {cache_size})")
+        return SQLSessionStore(cache_size=cache_size, idle_ttl_seconds=idle_ttl_seconds)
+
+    if backend != "memory":
+        logger.warning(f"Unknown SESSION_STORE_BACKEND '{backend}', falling back to memory")
+    return InMemorySessionStore(
+        max_hot_sessions=int(os.getenv("SESSION_HOT_MAX_SESSIONS", "200")),
+        idle_ttl_seconds=idle_ttl_seconds,
+        hibernate_dir=os.getenv("SESSION_HIBERNATE_DIR"),
+        cold_ttl_seconds=float(os.getenv("SESSION_COLD_TTL_SECONDS", "86400"))
+    )
@@ -0,0 +1,56 @@
+"""Single-flight deduplication of concurrent identical work
+
+Double-clicks and frontend retries arrive as concurrent duplicate requests. With
+a SingleFlight, the first caller for a key starts the computation and every
+caller arriving while it is in flight awaits that same result (or exception)
+instead of repeating the PDF extraction or vendor call.
+
+The computation runs in its own task, so a leader whose client disconnects
+doesn't cancel it for the others. It must therefore not use request-scoped
+resources such as the request's database session. Nothing is cached once the
+computation finishes: the next caller starts a new flight.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from metrics import metrics
+
+
+def _consume_exception(task: asyncio.Task):
+    # A failure nobody is waiting on any more shouldn't log "exception never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Per-key in-flight tasks, shared by concurrent callers
+
+    `name` labels the metrics: singleflight.<name>.calls (computations started)
+    and singleflight.<name>.shared (duplicate calls that reused one). Shared
+    calls also add to singleflight.saved_calls.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(result of fn, whether it was shared with an earlier in-flight call)"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            metrics.incr(f'singleflight.{self.name}.shared')
+            metrics.incr('singleflight.saved_calls')
+        else:
+            metrics.incr(f'singleflight.{self.name}.calls')
+            task = asyncio.create_task(fn())
+            task.add_done_callback(_consume_exception)
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._inflight[key] = task
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
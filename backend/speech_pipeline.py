@@ -0,0 +1,127 @@
+"""Sentence-pipelined speech for streamed tutor replies
+
+The tutor reply is split at sentence boundaries while it streams. Each finished
+sentence is sent to TTS right away (a few in parallel) and the audio is emitted
+in sentence order, so playback can start long before the LLM finishes.
+"""
+import re
+import time
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# End of sentence: terminal punctuation, optional closing quote/bracket, then whitespace
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+
+class SentenceSplitter:
+    """Incrementally split streamed text into sentences
+
+    Sentences shorter than min_chars are held back and joined with the next one,
+    so abbreviations and tiny fragments don't become separate TTS requests.
+    """
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return any sentences completed by it"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return whatever is left once the stream has ended"""
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return [remainder] if remainder else []
+
+
+async def pipeline_speech(events: AsyncIterator[Dict], synthesize: Callable[[str], Awaitable[bytes]],
+                          max_parallel: int = 3) -> AsyncIterator[Dict]:
+    """Turn a token event stream (see stream_ai_response) into ordered speech events
+
+    Yields {'type': 'sentence', 'index', 'text'} and {'type': 'audio', 'index', 'audio'}
+    pairs in sentence order ({'type': 'audio_error', 'index', 'error'} if TTS fails
+    for a sentence), then passes through the final 'done' event unchanged.
+    """
+    started = time.perf_counter()
+    splitter = SentenceSplitter()
+    tts_slots = asyncio.Semaphore(max_parallel)
+    pending = asyncio.Queue()
+
+    async def synthesize_sentence(sentence: str) -> bytes:
+        async with tts_slots:
+            return await synthesize(sentence)
+
+    async def produce():
+        index = 0
+        try:
+            async for event in events:
+                if event['type'] == 'token':
+                    sentences = splitter.feed(event['text'])
+                else:
+                    sentences = splitter.flush()
+                for sentence in sentences:
+                    task = asyncio.create_task(synthesize_sentence(sentence))
+                    await pending.put(('sentence', index, sentence, task, time.perf_counter()))
+                    index += 1
+                if event['type'] == 'done':
+                    await pending.put(('done', event))
+        except Exception as e:
+            await pending.put(('error', e))
+        finally:
+            await pending.put(('end',))
+
+    producer = asyncio.create_task(produce())
+    tasks = []
+    first_audio = True
+    try:
+        while True:
+            item = await pending.get()
+            if item[0] == 'error':
+                raise item[1]
+            if item[0] == 'end':
+                break
+            if item[0] == 'done':
+                yield item[1]
+                continue
+
+            _, index, sentence, task, ready_at = item
+            tasks.append(task)
+            yield {'type': 'sentence', 'index': index, 'text': sentence}
+            try:
+                audio = await task
+            except Exception as e:
+                logger.error(f"TTS failed for sentence {index}: {str(e)}")
+                metrics.incr('speech_pipeline.tts_errors')
+                yield {'type': 'audio_error', 'index': index, 'error': str(e)}
+                continue
+
+            if first_audio:
+                first_audio = False
+                now = time.perf_counter()
+                metrics.observe('speech_pipeline.first_audio_ms', (now - started) * 1000)
+                metrics.observe('speech_pipeline.sentence_to_audio_ms', (now - ready_at) * 1000)
+            metrics.incr('speech_pipeline.sentences')
+            yield {'type': 'audio', 'index': index, 'audio': audio}
+    finally:
+        producer.cancel()
+        for task in tasks:
+            task.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if item[0] == 'sentence':
+                item[3].cancel()
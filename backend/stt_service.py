@@ -0,0 +1,163 @@
+"""Speech-to-text backends
+
+STT_BACKEND selects the engine per deployment:
+
+- openai (default): OpenAI's transcription API (STT_OPENAI_MODEL, whisper-1)
+- local: faster-whisper on the server's CPU (pip install faster-whisper). No
+  upload or vendor queueing, at the cost of CPU time on the web host
+
+Every transcription reports its latency and real-time factor (processing time /
+audio duration; below 1.0 is faster than real time).
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+from metrics import metrics
+from resilience import openai_stt
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:  # Optional dependency
+    WhisperModel = None
+
+logger = logging.getLogger(__name__)
+
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "en")
+
+
+class STTBackend(ABC):
+    """Interface for speech-to-text engines"""
+
+    name = "base"
+
+    async def start(self):
+        """Load anything expensive up front (called from the app lifespan)"""
+        pass
+
+    @abstractmethod
+    async def _transcribe(self, path: str, filename: str) -> Tuple[str, Optional[float]]:
+        """(text, audio duration in seconds or None if unknown)"""
+        pass
+
+    async def transcribe(self, path: str, filename: str) -> Dict:
+        """Transcribe an audio file: {'text', 'backend', 'latency_ms', 'audio_seconds', 'rtf'}"""
+        started = time.perf_counter()
+        text, audio_seconds = await self._transcribe(path, filename)
+        latency_ms = (time.perf_counter() - started) * 1000
+        rtf = latency_ms / 1000 / audio_seconds if audio_seconds else None
+
+        metrics.observe(f'stt.{self.name}.latency_ms', latency_ms)
+        if rtf is not None:
+            metrics.observe(f'stt.{self.name}.rtf_percent', rtf * 100)
+        return {
+            'text': text,
+            'backend': self.name,
+            'latency_ms': latency_ms,
+            'audio_seconds': audio_seconds,
+            'rtf': rtf
+        }
+
+    def stats(self) -> Dict:
+        return {'backend': self.name}
+
+
+class OpenAISTTBackend(STTBackend):
+    """OpenAI transcription API through the app's shared AsyncOpenAI client
+
+    Transient failures are retried under resilience.openai_stt.
+    """
+
+    name = "openai"
+
+    def __init__(self, client, model: Optional[str] = None):
+        self.client = client
+        self.model = model or os.getenv("STT_OPENAI_MODEL", "whisper-1")
+
+    async def _transcribe(self, path: str, filename: str) -> Tuple[str, Optional[float]]:
+        # Only whisper-1 supports verbose_json, which carries the audio duration
+        verbose = self.model == "whisper-1"
+
+        async def attempt():
+            # Reopened per attempt so a retry uploads the file from the start
+            with open(path, 'rb') as audio_handle:
+                return await self.client.audio.transcriptions.create(
+                    model=self.model,
+                    file=(filename, audio_handle),
+                    response_format="verbose_json" if verbose else "json"
+                )
+
+        transcript = await openai_stt.call(attempt)
+        return transcript.text, getattr(transcript, 'duration', None) if verbose else None
+
+    def stats(self) -> Dict:
+        return {'backend': self.name, 'model': self.model}
+
+
+class LocalWhisperBackend(STTBackend):
+    """faster-whisper (CTranslate2) inference on the CPU
+
+    Inference runs in worker threads, at most `concurrency` at a time. Each
+    transcription already uses `cpu_threads` cores, so more parallel runs only
+    queue for CPU.
+    """
+
+    name = "local"
+
+    def __init__(self, model_size: Optional[str] = None, compute_type: Optional[str] = None,
+                 cpu_threads: Optional[int] = None, concurrency: Optional[int] = None):
+        self.model_size = model_size or os.getenv("STT_LOCAL_MODEL", "base.en")
+        self.compute_type = compute_type or os.getenv("STT_LOCAL_COMPUTE_TYPE", "int8")
+        self.cpu_threads = cpu_threads or int(os.getenv("STT_LOCAL_CPU_THREADS", "4"))
+        self.concurrency = concurrency or int(os.getenv("STT_LOCAL_CONCURRENCY", "1"))
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._semaphore = None
+
+    def _load_model(self):
+        with self._model_lock:
+            if self._model is None:
+                started = time.perf_counter()
+                self._model = WhisperModel(self.model_size, device="cpu", compute_type=self.compute_type,
+                                           cpu_threads=self.cpu_threads)
+                logger.info(f"Loaded faster-whisper {self.model_size} ({self.compute_type}) "
+                            f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return self._model
+
+    async def start(self):
+        await asyncio.to_thread(self._load_model)
+
+    def _run(self, path: str) -> Tuple[str, Optional[float]]:
+        segments, info = self._load_model().transcribe(path, language=STT_LANGUAGE or None, beam_size=1,
+                                                       vad_filter=True)
+        # segments is a generator; decoding happens while it's consumed
+        text = "".join(segment.text for segment in segments).strip()
+        return text, info.duration
+
+    async def _transcribe(self, path: str, filename: str) -> Tuple[str, Optional[float]]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await asyncio.to_thread(self._run, path)
+
+    def stats(self) -> Dict:
+        return {'backend': self.name, 'model': self.model_size, 'compute_type': self.compute_type,
+                'cpu_threads': self.cpu_threads, 'concurrency': self.concurrency, 'loaded': self._model is not None}
+
+
+def create_stt_backend(client) -> STTBackend:
+    """Build the STT backend selected by STT_BACKEND (openai or local)"""
+    backend = os.getenv("STT_BACKEND", "openai").lower()
+
+    if backend == "local":
+        if WhisperModel is not None:
+            local = LocalWhisperBackend()
+            logger.info(f"Using local faster-whisper STT ({local.model_size}, {local.compute_type})")
+            return local
+        logger.warning("STT_BACKEND=local but faster-whisper is not installed, falling back to openai")
+    elif backend != "openai":
+        logger.warning(f"Unknown STT_BACKEND '{backend}', falling back to openai")
+    return OpenAISTTBackend(client)
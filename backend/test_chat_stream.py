@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Test /ai-chat-stream end to end: token events, the done event and its timing"""
+
+import json
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from openai.types import CompletionUsage
+from main import app, ai_service
+from session_store import SessionConflictError
+
+READING = "Locke argues that legitimate government rests on the consent of the governed."
+REPLY = ["What ", "does Locke ", "mean by ", "tacit consent?"]
+
+class FakeStream:
+    """Async iterator of streamed chat chunks, usage on the last one"""
+
+    def __init__(self, pieces):
+        self.chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+                       for piece in pieces]
+        self.chunks.append(SimpleNamespace(choices=[], usage=CompletionUsage(
+            prompt_tokens=120, completion_tokens=len(pieces), total_tokens=120 + len(pieces))))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        assert params['stream'], "Expected a streaming request"
+        return FakeStream(REPLY)
+
+def read_events(response):
+    """Parse an SSE body into (event, data) pairs"""
+    events = []
+    for block in response.text.split("\n\n"):
+        if not block.strip():
+            continue
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_chat_stream():
+    """Stream a reply, then check failures still end with a done event"""
+
+    print("🧪 Testing AI Chat Stream")
+    print("=" * 50)
+
+    completions = FakeCompletions()
+    ai_service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    client = TestClient(app)
+    session_id = "session_1_1_stream"
+    assert ai_service.initialize_session_with_text(session_id, READING)['success']
+
+    print("\n1. Streamed reply...")
+    response = client.post("/ai-chat-stream", json={"session_id": session_id, "message": "Consent matters."})
+    events = read_events(response)
+    tokens = [data["text"] for event, data in events if event == "token"]
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+    assert tokens == REPLY and [event for event, _ in events][-1] == "done", events
+    done = events[-1][1]
+    assert done["response"] == "".join(REPLY) and done["session_id"] == session_id, done
+    assert done["question_count"] == 1 and done["token_usage"], done
+    assert set(done["timing"]) == {"ttft_ms", "generation_ms"}, done["timing"]
+    assert 0 <= done["timing"]["ttft_ms"] <= done["timing"]["generation_ms"], done["timing"]
+    print(f"   ✅ {len(tokens)} token events, then done with timing {done['timing']}")
+
+    print("\n2. Unknown session...")
+    events = read_events(client.post("/ai-chat-stream", json={"session_id": "session_9_9_missing", "message": "Hi"}))
+    assert [event for event, _ in events] == ["token", "done"], events
+    assert events[-1][1]["response"].startswith("Session not found") and completions.calls == 1, events
+    print("   ✅ Session-not-found reply, no LLM call")
+
+    print("\n3. Failure after tokens were sent...")
+    original_finish = ai_service._finish_turn
+
+    def conflicting_finish(*args):
+        raise SessionConflictError("Session was updated by another request")
+    ai_service._finish_turn = conflicting_finish
+    try:
+        events = read_events(client.post("/ai-chat-stream", json={"session_id": session_id, "message": "Again."}))
+    finally:
+        ai_service._finish_turn = original_finish
+    assert [data["text"] for event, data in events if event == "token"] == REPLY, events
+    assert events[-1][0] == "done" and "encountered an error" in events[-1][1]["response"], events
+    print("   ✅ Tokens, then a done event carrying the error")
+
+    print("\n4. Failure before the LLM call...")
+    original_begin = ai_service._begin_turn
+
+    def broken_begin(*args):
+        raise RuntimeError("Session store unreachable")
+    ai_service._begin_turn = broken_begin
+    try:
+        response = client.post("/ai-chat-stream", json={"session_id": session_id, "message": "Again."})
+    finally:
+        ai_service._begin_turn = original_begin
+    events = read_events(response)
+    assert response.status_code == 200 and [event for event, _ in events] == ["token", "done"], events
+    assert "Session store unreachable" in events[-1][1]["response"], events
+    print("   ✅ Error reply and done event instead of a broken stream")
+
+    print("\n✅ AI chat stream test complete!")
+
+if __name__ == "__main__":
+    test_chat_stream()
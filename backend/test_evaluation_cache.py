@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Test that identical evaluations are served from the cache without a vendor call"""
+
+import os
+import asyncio
+import tempfile
+
+os.environ["EVALUATION_CACHE_DIR"] = tempfile.mkdtemp()
+
+from types import SimpleNamespace
+from ai_service import AsyncAITutorService, evaluation_cache
+from evaluation_cache import evaluation_cache_key
+from metrics import metrics
+
+FEEDBACK = "Explain: Green\nInterpret: Green\nEvaluate: Yellow\nPropose: Green\nOverall: Green"
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=FEEDBACK))], usage=None)
+
+def transcript(spacing=" "):
+    return [
+        {"speaker": "ai", "text": "What does Locke say about consent?"},
+        {"speaker": "student", "text": f"He argues{spacing}that legitimate government rests on the consent of the governed."},
+        {"speaker": "ai", "text": "And tacit consent?"},
+        {"speaker": "student", "text": "Using roads and property counts as tacit consent in his view."}
+    ]
+
+def test_evaluation_cache():
+    """Evaluate the same transcript repeatedly and with a changed rubric"""
+
+    print("🧪 Testing Evaluation Cache")
+    print("=" * 50)
+
+    service = AsyncAITutorService()
+    completions = FakeCompletions()
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    async def run():
+        print("\n1. Repeat evaluations...")
+        first = await service.evaluate_transcript_async("session_1_1_1", transcript(), "Rubric A")
+        repeats = await asyncio.gather(*[service.evaluate_transcript_async("session_1_1_1", transcript("   "), "Rubric A")
+                                         for _ in range(3)])
+        assert completions.calls == 1 and all(r == first for r in repeats) and first['category'] == 'green', \
+            f"{completions.calls} vendor calls"
+        print("   ✅ 4 evaluations, 1 vendor call (whitespace differences ignored)")
+
+        print("\n2. Changed inputs miss...")
+        await service.evaluate_transcript_async("session_1_1_1", transcript(), "Rubric B")
+        changed = transcript()
+        changed[3]["text"] = "I'm not sure."
+        await service.evaluate_transcript_async("session_1_1_1", changed, "Rubric A")
+        assert completions.calls == 3, f"{completions.calls} vendor calls"
+        print("   ✅ New prompt and new transcript each called the vendor")
+
+        print("\n3. Disk tier...")
+        evaluation_cache.memory.clear()
+        await service.evaluate_transcript_async("session_1_1_1", transcript(), "Rubric A")
+        assert completions.calls == 3 and metrics.get('evaluation_cache.hits.disk') == 1, "Disk tier missed"
+        print("   ✅ Served from disk after the memory tier was cleared")
+
+    asyncio.run(run())
+
+    print("\n4. Key sensitivity...")
+    history = [{"role": "user", "content": "He argues that government rests on consent."}]
+
+    def key(history=history, prompt="Rubric A", model="gpt-4o-mini", temperature=0.3, max_tokens=800):
+        return evaluation_cache_key(history, prompt, model, temperature, max_tokens)
+
+    spaced = [{"role": "user", "content": " He argues  that government rests on consent. "}]
+    assert key(spaced, prompt="Rubric  A") == key(), "Whitespace changed the key"
+    variants = {
+        'transcript': key([{"role": "user", "content": "He argues otherwise."}]),
+        'speaker': key([{"role": "assistant", "content": history[0]['content']}]),
+        'prompt': key(prompt="Rubric B"),
+        'model': key(model="gpt-4o"),
+        'temperature': key(temperature=0.7),
+        'max_tokens': key(max_tokens=400)
+    }
+    unchanged = [name for name, variant in variants.items() if variant == key()]
+    assert not unchanged, f"Key ignores {unchanged}"
+    print(f"   ✅ Key changes with {', '.join(variants)}")
+
+    print("\n5. Metrics...")
+    hits = metrics.get('evaluation_cache.hits.memory') + metrics.get('evaluation_cache.hits.disk')
+    misses = metrics.get('evaluation_cache.misses')
+    assert hits == 4 and misses == 3, f"{hits} hits, {misses} misses"
+    print(f"   ✅ {hits} hits, {misses} misses, hit rate {evaluation_cache.hit_rate()}")
+
+    print("\n" + "=" * 50)
+    print("✅ Evaluation cache test complete!")
+
+if __name__ == "__main__":
+    test_evaluation_cache()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Test queued evaluations: idempotency, bounded workers, retries and exactly-once writes"""
+
+import asyncio
+from database import SessionLocal, engine
+from models import Class, EvaluationJob, Session, Student
+from evaluation_jobs import EvaluationWorkerPool, record_evaluation
+
+class FakeStore:
+    def hibernate(self, session_id):
+        pass
+
+class FakeTutorService:
+    """Stands in for AsyncAITutorService: slow evaluations, optional first-attempt failure"""
+
+    def __init__(self, flaky=()):
+        self.sessions = FakeStore()
+        self.flaky = set(flaky)
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def evaluate_session_async(self, session_id, db_session=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.2)
+            if session_id in self.flaky:
+                self.flaky.discard(session_id)
+                return {'error': 'Rate limited'}
+            return {'score': 2, 'category': 'green', 'feedback': 'Overall: Green', 'question_count': 5}
+        finally:
+            self.active -= 1
+
+    def get_formatted_transcript(self, session_id):
+        return [{"speaker": "ai", "text": "Question"}, {"speaker": "student", "text": "Answer"}]
+
+def test_evaluation_jobs():
+    """Run a class's worth of evaluations through a two-worker pool"""
+
+    print("🧪 Testing Evaluation Jobs")
+    print("=" * 50)
+
+    for model in (Class, Student, Session, EvaluationJob):
+        model.__table__.create(engine, checkfirst=True)
+    db = SessionLocal()
+    class_obj = Class(class_name="Jobs Test", professor_name="Prof", access_code="JOB001", professor_password="jobs-test")
+    db.add(class_obj)
+    db.flush()
+    students = [Student(name=f"Jobs Student {i}", class_id=class_obj.id) for i in range(6)]
+    db.add_all(students)
+    db.commit()
+    session_ids = [f"session_{s.id}_9001_1700000000" for s in students]
+    race_ids = [f"claim_race_{i}" for i in range(5)]
+
+    async def run():
+        service = FakeTutorService(flaky=[session_ids[1]])
+        pool = EvaluationWorkerPool(service, workers=2)
+        await pool.start()
+        try:
+            print("\n1. Duplicate submissions...")
+            jobs = await asyncio.gather(*[pool.enqueue(session_ids[0]) for _ in range(10)])
+            job_ids = {job['job_id'] for job in jobs}
+            assert len(job_ids) == 1, f"10 submissions created {len(job_ids)} jobs"
+            print("   ✅ 10 submissions, 1 job")
+
+            print("\n2. Bounded worker pool...")
+            others = [await pool.enqueue(session_id) for session_id in session_ids[1:]]
+            results = await asyncio.gather(*[pool.wait_for(job['job_id'], 10) for job in [jobs[0]] + others])
+            statuses = [job['status'] for job in results]
+            assert all(status == 'completed' for status in statuses) and service.peak == 2, \
+                f"Statuses {statuses}, peak concurrency {service.peak}"
+            print(f"   ✅ 6 evaluations completed, at most {service.peak} at once")
+
+            print("\n3. Retry after a vendor error...")
+            retried = results[1]
+            assert retried['attempts'] == 2 and retried['result']['category'] == 'green', f"Job: {retried}"
+            print("   ✅ Failed attempt retried and completed")
+
+            print("\n4. Finished jobs are returned, not rerun...")
+            calls = service.calls
+            again = await pool.enqueue(session_ids[0])
+            assert again['status'] == 'completed' and service.calls == calls, "Job ran again"
+            print("   ✅ Resubmission returns the stored result")
+        finally:
+            await pool.stop()
+
+        print("\n5. Workers racing to claim the same job...")
+        # Pools that were never started: only their job-table access is used, as by other processes
+        claimers = [EvaluationWorkerPool(service, workers=1) for _ in range(4)]
+        for session_id in race_ids:
+            job, _ = claimers[0]._create_job(session_id, f"race:{session_id}")
+            claims = await asyncio.gather(*[asyncio.to_thread(claimer._claim, job['job_id']) for claimer in claimers])
+            winners = [claim for claim in claims if claim is not None]
+            assert len(winners) == 1 and winners[0]['attempts'] == 1, f"{len(winners)} workers claimed one job"
+        print(f"   ✅ {len(race_ids)} jobs, 4 concurrent claims each, exactly one winner per job")
+
+        print("\n6. Exactly one Session row per evaluation...")
+        with SessionLocal() as check:
+            evaluation = {'score': 0, 'category': 'red', 'feedback': 'duplicate', 'question_count': 1}
+            again = record_evaluation(check, service, session_ids[0], evaluation)
+            rows = check.query(Session).filter(Session.class_id == class_obj.id).count()
+        assert rows == 6 and again['category'] == 'green', f"{rows} rows, repeat returned {again}"
+        print("   ✅ 6 rows for 6 sessions; repeat write returned the stored evaluation")
+
+    try:
+        asyncio.run(run())
+    finally:
+        db.query(EvaluationJob).filter(EvaluationJob.session_id.in_(session_ids + race_ids)).delete(synchronize_session=False)
+        db.query(Session).filter(Session.class_id == class_obj.id).delete()
+        db.query(Student).filter(Student.class_id == class_obj.id).delete()
+        db.query(Class).filter(Class.id == class_obj.id).delete()
+        db.commit()
+        db.close()
+
+    print("\n" + "=" * 50)
+    print("✅ Evaluation jobs test complete!")
+
+if __name__ == "__main__":
+    test_evaluation_jobs()
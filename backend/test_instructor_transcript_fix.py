@@ -68,21 +68,26 @@ def test_instructor_transcript_fix():
             database_session_id = eval_data['session_id']
             print(f"   ✅ Session saved to database with ID: {database_session_id}")
             
-            # Step 5: Test instructor view endpoint
+            # Step 5: Test instructor view endpoint (paginated; transcripts are opt-in)
             print("\n5. Testing instructor view endpoint...")
-            test_data_response = requests.get("http://localhost:8000/test-data")
-            
-            if test_data_response.status_code == 200:
+            params = {"include_transcripts": "true"}
+            our_session = None
+            while True:
+                test_data_response = requests.get("http://localhost:8000/test-data", params=params)
+                if test_data_response.status_code != 200:
+                    break
                 sessions_data = test_data_response.json()
-                sessions = sessions_data.get('sessions', [])
                 
                 # Find our session
-                our_session = None
-                for session in sessions:
+                for session in sessions_data['sessions']:
                     if session['session_id'] == database_session_id:
                         our_session = session
                         break
-                
+                if our_session or sessions_data['next_cursor'] is None:
+                    break
+                params["cursor"] = sessions_data['next_cursor']
+            
+            if test_data_response.status_code == 200:
                 if our_session:
                     transcript = our_session.get('transcript', [])
                     print(f"   ✅ Found session in instructor data")
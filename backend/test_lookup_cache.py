@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test the class/student/assignment lookup cache"""
+
+import time
+import asyncio
+from lookup_cache import LookupCache
+
+def test_lookup_cache():
+    """Cold-cache herd, ETags, invalidation and expiry"""
+
+    print("🧪 Testing Lookup Cache")
+    print("=" * 50)
+
+    calls = []
+    version = {"n": 1}
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)  # Slow enough for the whole herd to arrive mid-load
+        return {"students": [{"id": 1, "name": f"Student v{version['n']}"}]}
+
+    async def run():
+        cache = LookupCache(ttl_seconds=0.5)
+
+        print("\n1. Thundering herd on a cold cache...")
+        results = await asyncio.gather(*[cache.get(("students", 1), loader) for _ in range(50)])
+        etags = {etag for _, etag in results}
+        assert len(calls) == 1 and len(etags) == 1, f"{len(calls)} fetches for 50 requests"
+        print("   ✅ 50 concurrent requests, 1 database fetch")
+
+        print("\n2. Hits and ETags...")
+        payload, etag = await cache.get(("students", 1), loader)
+        assert len(calls) == 1 and etag in etags, "Cached entry not reused"
+        print(f"   ✅ Served from cache with stable ETag {etag}")
+
+        print("\n3. Invalidation on write...")
+        version["n"] = 2
+        cache.invalidate()
+        payload, new_etag = await cache.get(("students", 1), loader)
+        assert len(calls) == 2 and new_etag != etag and "v2" in payload["students"][0]["name"], \
+            "Stale data after invalidation"
+        print("   ✅ Reloaded with a new ETag")
+
+        print("\n4. Load racing an invalidation isn't cached...")
+        pending = asyncio.create_task(cache.get(("students", 2), loader))
+        await asyncio.sleep(0.01)
+        version["n"] = 3
+        cache.invalidate()
+        await pending
+        payload, _ = await cache.get(("students", 2), loader)
+        assert 'v3' in payload['students'][0]['name'], "Racing load's stale result was cached"
+        print("   ✅ Fresh data after the racing load")
+
+        print("\n5. Expiry...")
+        before = len(calls)
+        await asyncio.sleep(0.6)
+        await cache.get(("students", 1), loader)
+        assert len(calls) == before + 1, "Entry not reloaded after TTL"
+        print("   ✅ Entry reloaded after TTL")
+
+        print("\n6. Loader errors...")
+        def failing():
+            raise LookupError("Invalid access code")
+        outcomes = await asyncio.gather(*[cache.get(("class_code", "ZZZZZZ"), failing) for _ in range(5)],
+                                        return_exceptions=True)
+        assert all(isinstance(o, LookupError) for o in outcomes) and cache.stats()["inflight"] == 0, \
+            f"Unexpected outcomes: {outcomes}"
+        print("   ✅ Errors reach every waiter and aren't cached")
+
+    asyncio.run(run())
+
+    print("\n" + "=" * 50)
+    print("✅ Lookup cache test complete!")
+
+if __name__ == "__main__":
+    test_lookup_cache()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Test that extracted PDF text is cached by content hash and invalidated when the file changes"""
+
+import os
+import shutil
+import time
+import asyncio
+from pdf_utils import extract_text_from_pdf, extract_text_from_pdf_async
+from metrics import metrics
+
+TEST_DIR = "static/assignments/cache_test"
+
+def test_pdf_text_cache():
+    """Extract twice, then replace the file and make sure the new content is picked up"""
+
+    print("🧪 Testing PDF Text Cache")
+    print("=" * 50)
+
+    os.makedirs(TEST_DIR, exist_ok=True)
+    shutil.copy("static/assignments/week1/reading1.pdf", f"{TEST_DIR}/reading.pdf")
+
+    try:
+        print("\n1. First extraction (cold)...")
+        started = time.time()
+        first = extract_text_from_pdf("cache_test/reading.pdf")
+        print(f"   Extracted {len(first)} chars in {time.time() - started:.2f}s")
+
+        print("\n2. Second extraction (cached)...")
+        hits_before = metrics.get('pdf_text_cache.hits.memory')
+        started = time.time()
+        second = extract_text_from_pdf("cache_test/reading.pdf")
+        elapsed = time.time() - started
+        assert second == first and metrics.get('pdf_text_cache.hits.memory') == hits_before + 1, "Cache was not used"
+        print(f"   ✅ Served from cache in {elapsed * 1000:.2f}ms")
+
+        print("\n3. Replacing the file...")
+        time.sleep(0.01)
+        shutil.copy("static/assignments/week1/reading2.pdf", f"{TEST_DIR}/reading.pdf")
+        third = extract_text_from_pdf("cache_test/reading.pdf")
+        assert third and third != first, "Stale text returned for changed file"
+        print("   ✅ Changed file was re-extracted")
+
+        print("\n4. Async extraction of the same file...")
+        hits_before = metrics.get('pdf_text_cache.hits.memory')
+        fourth = asyncio.run(extract_text_from_pdf_async("cache_test/reading.pdf"))
+        assert fourth == third and metrics.get('pdf_text_cache.hits.memory') == hits_before + 1, \
+            "Async path missed the cache"
+        print("   ✅ Async path shares the cache")
+    finally:
+        shutil.rmtree(TEST_DIR)
+
+    print("\n" + "=" * 50)
+    print("✅ PDF text cache test complete!")
+
+if __name__ == "__main__":
+    test_pdf_text_cache()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Test that the tutor prompt prefix stays byte-identical across turns (provider prefix caching)"""
+
+from conversation_manager import ConversationManager
+from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
+from ai_service import cached_prompt_tokens
+
+def test_prompt_layout():
+    """Format two consecutive turns and compare their leading messages"""
+
+    print("🧪 Testing Prompt Layout")
+    print("=" * 50)
+
+    manager = ConversationManager()
+    history = [
+        {"role": "user", "content": "I think the author argues for utilitarianism."},
+        {"role": "assistant", "content": "What in the text supports that reading?"}
+    ]
+
+    first = manager.format_for_api("Tutor prompt", "[Page 1]\nReading text", history[:0], history[0]['content'], elapsed_seconds=30)
+    manager.update_phase(150)
+    second = manager.format_for_api("Tutor prompt", "[Page 1]\nReading text", history, "The second chapter.", elapsed_seconds=150)
+
+    print("\n1. Stable prefix...")
+    assert first[0] == second[0] and first[1] == second[1], "Prefix changed between turns"
+    print("   ✅ System prompt + readings and earlier turns are identical across turns")
+
+    print("\n2. Dynamic status...")
+    assert second[-1]['role'] == 'system' and "Current phase: exploration" in second[-1]['content'] \
+            and "SESSION STATUS" not in second[0]['content'], "Session status not moved out of the prefix"
+    print("   ✅ Session status is the trailing message")
+
+    print("\n3. Cached token accounting...")
+    usage = CompletionUsage(prompt_tokens=2000, completion_tokens=50, total_tokens=2050,
+                            prompt_tokens_details=PromptTokensDetails(cached_tokens=1792))
+    bare_usage = CompletionUsage(prompt_tokens=2000, completion_tokens=50, total_tokens=2050)
+    assert cached_prompt_tokens(usage) == 1792 and cached_prompt_tokens(bare_usage) == 0, "Wrong cached token count"
+    print("   ✅ cached_tokens read from prompt_tokens_details")
+
+    print("\n" + "=" * 50)
+    print("✅ Prompt layout test complete!")
+
+if __name__ == "__main__":
+    test_prompt_layout()
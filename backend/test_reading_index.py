@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Test BM25 retrieval of reading excerpts for long readings"""
+
+from pdf_utils import format_pages, format_pdf_context
+from reading_index import chunk_reading, select_reading_context
+from token_utils import estimate_tokens
+
+FILLER = "The discussion continues with general remarks on the history of ideas. " * 20
+
+def build_reading():
+    pages = [FILLER for _ in range(30)]
+    pages[11] = "Locke argues that property arises when a person mixes labour with land. " + FILLER
+    return format_pdf_context({"reading1.pdf": format_pages(pages), "reading2.pdf": format_pages([FILLER] * 5)})
+
+def test_reading_index():
+    """Chunk a synthetic reading and retrieve the page that matches the student's answer"""
+
+    print("🧪 Testing Reading Index")
+    print("=" * 50)
+
+    pdf_context = build_reading()
+    print(f"\nReading: ~{estimate_tokens(pdf_context)} tokens")
+
+    print("\n1. Chunking...")
+    chunks = chunk_reading(pdf_context)
+    pages = {(chunk['source'], chunk['page']) for chunk in chunks}
+    assert len(pages) == 35, f"Expected 35 (file, page) pairs, got {len(pages)}"
+    print(f"   ✅ {len(chunks)} chunks tagged with file and page")
+
+    print("\n2. Retrieval...")
+    excerpts = select_reading_context(pdf_context, "I think labour is what makes land someone's property", [],
+                                      token_budget=1000)
+    assert excerpts and "[Page 12]\nLocke argues" in excerpts['text'], "Relevant page missing from excerpts"
+    print(f"   ✅ Matching page retrieved ({excerpts['chunks']} chunks, ~{excerpts['tokens']} tokens)")
+    assert excerpts and excerpts['tokens'] <= 1000, "Excerpts over budget"
+    print("   ✅ Token budget respected")
+
+    print("\n3. Opening turn with no matching terms...")
+    opening = select_reading_context(pdf_context, "Hello!", [], token_budget=1000)
+    assert opening and "[Page 1]" in opening['text'], "No fallback excerpts"
+    print("   ✅ Falls back to the start of the readings")
+
+    print("\n4. Short reading...")
+    short = format_pdf_context({"short.pdf": "[Page 1]\nA short text."})
+    assert select_reading_context(short, "text", []) is None, "Retrieval used for a short reading"
+    print("   ✅ Short readings are sent in full")
+
+    print("\n" + "=" * 50)
+    print("✅ Reading index test complete!")
+
+if __name__ == "__main__":
+    test_reading_index()
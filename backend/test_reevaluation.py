@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test batch re-evaluation: rate limiting, checkpoints and resume"""
+
+import time
+import asyncio
+from datetime import datetime
+from database import SessionLocal, engine
+from models import Class, ReevaluationRun, Session, Student
+from reevaluation import ReevaluationRunner, claim_run, create_run
+
+class FakeTutorService:
+    """Stands in for AsyncAITutorService.evaluate_transcript_async"""
+
+    def __init__(self, fail_text=None):
+        self.prompts = set()
+        self.evaluated = []
+        self.fail_text = fail_text
+
+    async def evaluate_transcript_async(self, session_id, transcript, evaluation_prompt=None):
+        await asyncio.sleep(0.05)
+        self.prompts.add(evaluation_prompt)
+        self.evaluated.append(session_id)
+        if transcript[0]['text'] == self.fail_text:
+            return {'error': 'Rate limited'}
+        return {'score': 90, 'category': 'green', 'feedback': 'Re-scored: Green', 'question_count': 1}
+
+def test_reevaluation():
+    """Re-score 30 sessions, interrupting the run part way"""
+
+    print("🧪 Testing Batch Re-evaluation")
+    print("=" * 50)
+
+    for model in (Class, Student, Session, ReevaluationRun):
+        model.__table__.create(engine, checkfirst=True)
+    db = SessionLocal()
+    class_obj = Class(class_name="Reeval Test", professor_name="Prof", access_code="REV001",
+                      professor_password="reeval-test", evaluation_prompt="New rubric")
+    db.add(class_obj)
+    db.flush()
+    for i in range(30):
+        student = Student(name=f"Reeval Student {i}", class_id=class_obj.id)
+        db.add(student)
+        db.flush()
+        db.add(Session(student_id=student.id, assignment_id=7001, class_id=class_obj.id, status="completed",
+                       started_at=datetime.now(), completed_at=datetime.now(), final_score=60, score_category="red",
+                       full_transcript=[{"speaker": "student", "text": f"answer {i}"}], ai_feedback="Old rubric"))
+    db.commit()
+
+    async def run():
+        service = FakeTutorService(fail_text="answer 3")
+        with SessionLocal() as setup:
+            run_id = create_run(setup, class_id=class_obj.id)['run_id']
+
+        print("\n1. Rate limit and interruption...")
+        runner = ReevaluationRunner(service, run_id, rate_per_minute=600, concurrency=4)
+        task = asyncio.create_task(runner.run())
+        started = time.monotonic()
+        await asyncio.sleep(1.2)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        elapsed = time.monotonic() - started
+        with SessionLocal() as check:
+            run_row = check.get(ReevaluationRun, run_id)
+            status, processed, checkpoint = run_row.status, run_row.processed, run_row.last_session_id
+        rate = len(service.evaluated) / elapsed * 60
+        assert rate <= 660, f"{rate:.0f} evaluations/min over a 600/min limit"
+        print(f"   ✅ {len(service.evaluated)} evaluations in {elapsed:.1f}s ({rate:.0f}/min, limit 600)")
+        assert status == 'paused' and 0 < processed < 30 and checkpoint > 0, f"Status {status}, processed {processed}"
+        print(f"   ✅ Paused with {processed}/30 checkpointed")
+
+        print("\n2. Resume from the checkpoint...")
+        with SessionLocal() as claim:
+            claimed = claim_run(claim, run_id)
+        before = len(service.evaluated)
+        result = await ReevaluationRunner(service, run_id, rate_per_minute=6000, concurrency=4).run()
+        redone = len(service.evaluated) - before - (30 - processed)
+        assert claimed and result['status'] == 'completed' and result['processed'] == 30 and 0 <= redone <= 4, \
+            f"Result: {result}"
+        print(f"   ✅ Completed 30/30 ({redone} in-flight sessions redone), {result['sessions_per_minute']} sessions/min")
+        assert result['failed'] == 1, f"{result['failed']} failed sessions recorded"
+        print("   ✅ 1 failed session recorded")
+
+        print("\n3. Sessions re-scored with the class prompt...")
+        with SessionLocal() as check:
+            greens = check.query(Session).filter(Session.class_id == class_obj.id, Session.score_category == 'green').count()
+        assert greens == 29 and service.prompts == {"New rubric"}, f"{greens} updated, prompts used: {service.prompts}"
+        print("   ✅ 29 sessions updated using the class's evaluation prompt")
+
+    try:
+        asyncio.run(run())
+    finally:
+        db.query(ReevaluationRun).filter(ReevaluationRun.class_id == class_obj.id).delete()
+        db.query(Session).filter(Session.class_id == class_obj.id).delete()
+        db.query(Student).filter(Student.class_id == class_obj.id).delete()
+        db.query(Class).filter(Class.id == class_obj.id).delete()
+        db.commit()
+        db.close()
+
+    print("\n" + "=" * 50)
+    print("✅ Batch re-evaluation test complete!")
+
+if __name__ == "__main__":
+    test_reevaluation()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Test vendor call retries, Retry-After handling, timeouts and the circuit breaker"""
+
+import time
+import asyncio
+import httpx
+from metrics import metrics
+from resilience import CircuitOpenError, VendorPolicy, VendorUnavailableError, retry_after_seconds
+
+class VendorError(Exception):
+    """Stands in for an SDK error carrying the HTTP response"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = httpx.Response(status_code, headers=headers or {})
+
+class Slots:
+    """Semaphore-like slot that records how many are held"""
+
+    def __init__(self):
+        self.held = 0
+        self.max_held = 0
+
+    async def acquire(self):
+        self.held += 1
+        self.max_held = max(self.max_held, self.held)
+
+    def release(self):
+        self.held -= 1
+
+def test_resilience():
+    """Retries, budgets, client errors, timeouts, slots and breaker open/half-open/close"""
+
+    print("🧪 Testing Vendor Resilience")
+    print("=" * 50)
+
+    def flaky(failures, error):
+        calls = []
+
+        async def call():
+            calls.append(time.monotonic())
+            if len(calls) <= failures:
+                raise error
+            return "ok"
+        return call, calls
+
+    async def run():
+        print("\n1. 429 with Retry-After...")
+        policy = VendorPolicy('test_429', base_delay=0.01, max_attempts=3)
+        call, calls = flaky(1, VendorError(429, {"retry-after": "0.2"}))
+        result = await policy.call(call)
+        waited = calls[1] - calls[0]
+        assert result == "ok" and len(calls) == 2, f"{len(calls)} calls"
+        assert waited >= 0.2, f"Waited {waited:.2f}s, vendor asked for 0.2s"
+        assert metrics.get('vendor.test_429.retries') == 1
+        print(f"   ✅ Retried once after {waited:.2f}s (vendor asked for 0.2s)")
+
+        print("\n2. Retry-After beyond the budget fails fast...")
+        policy = VendorPolicy('test_budget', base_delay=0.01, budget_seconds=1.0)
+        call, calls = flaky(1, VendorError(429, {"retry-after": "30"}))
+        started = time.monotonic()
+        try:
+            await policy.call(call)
+            raise AssertionError("Call succeeded unexpectedly")
+        except VendorUnavailableError as e:
+            elapsed = time.monotonic() - started
+            assert len(calls) == 1 and elapsed < 0.5, f"{len(calls)} calls in {elapsed:.2f}s"
+            assert e.retry_after >= 30 and isinstance(e.__cause__, VendorError), e
+            print(f"   ✅ Gave up after {elapsed:.2f}s instead of waiting 30s (retry after {e.retry_after:.0f}s)")
+
+        print("\n3. Client errors aren't retried...")
+        policy = VendorPolicy('test_400', base_delay=0.01)
+        call, calls = flaky(5, VendorError(400))
+        try:
+            await policy.call(call)
+            raise AssertionError("Call succeeded unexpectedly")
+        except VendorError:
+            pass
+        assert len(calls) == 1 and policy.state() == 'closed', f"{len(calls)} calls, state {policy.state()}"
+        print("   ✅ 1 attempt, raised unchanged, circuit still closed")
+
+        print("\n4. Per-attempt timeout...")
+        policy = VendorPolicy('test_timeout', timeout_seconds=0.05, base_delay=0.01, max_attempts=2)
+        attempts = []
+
+        async def hang():
+            attempts.append(1)
+            await asyncio.sleep(1)
+        started = time.monotonic()
+        try:
+            await policy.call(hang)
+            raise AssertionError("Call succeeded unexpectedly")
+        except VendorUnavailableError:
+            pass
+        elapsed = time.monotonic() - started
+        assert len(attempts) == 2 and elapsed < 0.3, f"{len(attempts)} attempts in {elapsed:.2f}s"
+        assert metrics.get('vendor.test_timeout.timeouts') == 2
+        print(f"   ✅ 2 attempts timed out in {elapsed:.2f}s")
+
+        print("\n5. Concurrency slot per attempt...")
+        policy = VendorPolicy('test_slot', base_delay=0.05, max_attempts=3)
+        slots = Slots()
+        held_during_backoff = []
+        call, calls = flaky(1, VendorError(503))
+
+        async def watch():
+            await asyncio.sleep(0.02)  # Inside the backoff after the first failure
+            held_during_backoff.append(slots.held)
+        watcher = asyncio.create_task(watch())
+        policy.base_delay = 0.0
+        policy.backoff = lambda attempt, error: 0.05
+        assert await policy.call(call, slot=slots) == "ok"
+        await watcher
+        assert slots.held == 0 and held_during_backoff == [0], (slots.held, held_during_backoff)
+        assert await policy.call(call, slot=slots, hold_slot=True) == "ok" and slots.held == 1
+        slots.release()
+        print("   ✅ Slot released for the backoff and after the call; kept with hold_slot")
+
+        print("\n6. Circuit breaker...")
+        policy = VendorPolicy('test_breaker', base_delay=0.01, max_attempts=1, failure_threshold=3, reset_seconds=0.2)
+        call, calls = flaky(3, VendorError(503))
+        for _ in range(3):
+            try:
+                await policy.call(call)
+                raise AssertionError("Call succeeded unexpectedly")
+            except VendorUnavailableError as e:
+                assert not isinstance(e, CircuitOpenError)
+        assert policy.state() == 'open' and metrics.get('vendor.test_breaker.circuit_opened') == 1
+        try:
+            await policy.call(call)
+            raise AssertionError("Open circuit let a call through")
+        except CircuitOpenError as e:
+            assert len(calls) == 3, f"{len(calls)} vendor calls"
+            assert metrics.get('vendor.test_breaker.rejected') == 1
+            print(f"   ✅ Opened after 3 failures, then failed fast ({e})")
+
+        await asyncio.sleep(0.25)
+        assert policy.state() == 'half_open'
+        results = await asyncio.gather(policy.call(call), policy.call(call), return_exceptions=True)
+        probes = len(calls) - 3
+        assert probes == 1, f"{probes} probes"
+        assert "ok" in results and any(isinstance(r, CircuitOpenError) for r in results), results
+        assert policy.state() == 'closed' and policy.consecutive_failures == 0
+        print("   ✅ One probe after the reset period closed the circuit")
+
+        call, calls = flaky(3, VendorError(503))
+        for _ in range(3):
+            try:
+                await policy.call(call)
+            except VendorUnavailableError:
+                pass
+        await asyncio.sleep(0.25)
+        failing_probe, _ = flaky(1, VendorError(502))
+        try:
+            await policy.call(failing_probe)
+        except VendorUnavailableError:
+            pass
+        assert policy.state() == 'open', policy.state()
+        print("   ✅ A failed probe reopens the circuit")
+
+        print("\n7. Blocking clients...")
+        policy = VendorPolicy('test_sync', base_delay=0.01, max_attempts=3)
+        sync_calls = []
+
+        def sync_call():
+            sync_calls.append(1)
+            if len(sync_calls) == 1:
+                raise VendorError(500)
+            return "ok"
+        assert policy.call_sync(sync_call) == "ok" and len(sync_calls) == 2
+        print("   ✅ call_sync retried a 500")
+
+        print("\n8. Retry-After parsing...")
+        parsed = [retry_after_seconds(VendorError(429, headers)) for headers in
+                  ({"retry-after": "3"}, {"retry-after-ms": "1500"}, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}, {})]
+        assert parsed == [3.0, 1.5, 0.0, None], parsed
+        print(f"   ✅ Seconds, milliseconds, past date, absent: {parsed}")
+
+    asyncio.run(run())
+    print("\n✅ Vendor resilience test complete!")
+
+if __name__ == "__main__":
+    test_resilience()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Test the incremental rolling conversation summary"""
+
+import time
+from conversation_manager import ConversationManager
+
+ARGS = ("Tutor prompt", "[Page 1]\nReading text")
+
+def play_turns(manager, history, start, turns):
+    for i in range(start, start + turns):
+        manager.pack_messages(*ARGS, history, f"Answer {i}", token_budget=1500)
+        history.append({"role": "user", "content": f"Answer {i}: the author argues point {i}. " + "detail " * 60})
+        history.append({"role": "assistant", "content": f"Question {i}: how does point {i} follow?"})
+
+def test_rolling_summary():
+    """Grow a conversation turn by turn and check the summary rolls forward"""
+
+    print("🧪 Testing Rolling Summary")
+    print("=" * 50)
+
+    manager = ConversationManager()
+    history = []
+
+    print("\n1. Folding as the conversation grows...")
+    play_turns(manager, history, 0, 20)
+    summary, recent = manager.summary_message(), history[manager.summarized_count:]
+    assert summary and len(manager.summary_topics) > 3 and "Answer 10" in summary['content'], \
+        "Older exchanges missing from the summary"
+    print(f"   ✅ {manager.summarized_count} messages folded, {len(manager.summary_topics)} topics kept")
+    assert manager.summarized_count // 2 > 12 and "Answer 0:" in summary['content'], \
+        "Earliest topic lost once more than 12 exchanges were folded"
+    print("   ✅ Topics past the limit merged into the summary text (earliest still present)")
+    assert recent and recent[0]['role'] == 'user', "Recent window misaligned"
+    print(f"   ✅ Recent window is the last {len(recent)} messages")
+
+    print("\n2. Serialization...")
+    restored = ConversationManager.from_dict(manager.to_dict())
+    assert restored.summary_message() == manager.summary_message() \
+        and restored.summarized_count == manager.summarized_count, "Summary lost in serialization"
+    print("   ✅ Summary survives to_dict/from_dict")
+
+    print("\n3. Compaction...")
+    summary_input, through = manager.compaction_input()
+    play_turns(manager, history, 20, 4)  # Turns complete while the compaction is in flight
+    manager.apply_compaction("The student covered points 0-14.", through)
+    assert manager.summary_text and len(manager.summary_topics) < 6 \
+        and "points 0-14" in manager.summary_message()['content'], "Compaction not applied"
+    print(f"   ✅ Compacted text replaces covered topics ({len(manager.summary_topics)} newer topics kept)")
+
+    print("\n4. Per-turn cost...")
+    long_history = []
+    long_manager = ConversationManager()
+    play_turns(long_manager, long_history, 0, 400)
+    started = time.perf_counter()
+    play_turns(long_manager, long_history, 400, 50)
+    per_turn_ms = (time.perf_counter() - started) * 1000 / 50
+    assert per_turn_ms < 5, f"{per_turn_ms:.2f}ms per turn after 400 turns"
+    print(f"   ✅ {per_turn_ms:.2f}ms per turn after 400 turns")
+
+    print("\n" + "=" * 50)
+    print("✅ Rolling summary test complete!")
+
+if __name__ == "__main__":
+    test_rolling_summary()
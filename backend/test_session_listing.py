@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Test the joined, keyset-paginated session listing behind /test-data"""
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from database import SessionLocal, engine
+from models import Assignment, Class, Session, Student
+from session_queries import list_sessions_page
+
+def test_session_listing():
+    """Create a class with 25 sessions and page through them"""
+
+    print("🧪 Testing Session Listing")
+    print("=" * 50)
+
+    for model in (Class, Student, Assignment, Session):
+        model.__table__.create(engine, checkfirst=True)
+    db = SessionLocal()
+
+    try:
+        class_obj = Class(class_name="Listing Test", professor_name="Prof", access_code="LST001", professor_password="listing-test")
+        db.add(class_obj)
+        db.flush()
+        assignment = Assignment(title="Week 1", description="", class_id=class_obj.id)
+        db.add(assignment)
+        db.flush()
+        now = datetime.now(timezone.utc)
+        for i in range(25):
+            student = Student(name=f"Listing Student {i}", class_id=class_obj.id)
+            db.add(student)
+            db.flush()
+            db.add(Session(student_id=student.id, assignment_id=assignment.id, class_id=class_obj.id,
+                           status="completed" if i % 5 else "failed", started_at=now, completed_at=now - timedelta(hours=i),
+                           full_transcript=[{"speaker": "student", "text": f"answer {i}"}]))
+        db.commit()
+
+        print("\n1. Keyset pagination...")
+        queries = []
+        listener = lambda *args: queries.append(1)
+        event.listen(engine, "before_cursor_execute", listener)
+        def page_through(limit, **filters):
+            seen, sizes, cursor = [], [], None
+            while True:
+                rows, cursor = list_sessions_page(db, cursor=cursor, limit=limit, class_id=class_obj.id, **filters)
+                seen += rows
+                sizes.append(len(rows))
+                if cursor is None:
+                    return seen, sizes
+
+        seen, sizes = page_through(10)
+        event.remove(engine, "before_cursor_execute", listener)
+        ids = [row["session_id"] for row in seen]
+        assert len(ids) == 25 and ids == sorted(set(ids), reverse=True) and sizes == [10, 10, 5], \
+            f"Got {len(ids)} sessions in pages of {sizes}"
+        print(f"   ✅ 25 sessions in {len(sizes)} pages, newest first, {len(queries)} queries")
+        completed, sizes = page_through(5, status="completed")
+        assert len(completed) == 20 and sizes == [5, 5, 5, 5], f"Pages of {sizes} for 20 sessions"
+        _, sizes = page_through(25)
+        assert sizes == [25], f"Pages of {sizes} for a single full page"
+        print("   ✅ No empty trailing page when the last page is full")
+        assert seen[0]["student_name"].startswith("Listing Student") and seen[0]["assignment_title"] == "Week 1", \
+            "Joined names missing"
+        print("   ✅ Student and assignment names joined in")
+
+        print("\n2. Transcripts excluded by default...")
+        assert "transcript" not in seen[0], "Transcript shipped in listing"
+        print("   ✅ No transcript in listing rows")
+        rows, _ = list_sessions_page(db, limit=1, class_id=class_obj.id, include_transcripts=True)
+        assert rows[0].get('transcript'), "include_transcripts returned no transcript"
+        print("   ✅ include_transcripts adds them")
+
+        print("\n3. Filters...")
+        failed, _ = list_sessions_page(db, class_id=class_obj.id, status="failed")
+        recent, _ = list_sessions_page(db, class_id=class_obj.id, completed_after=now - timedelta(hours=4, minutes=30))
+        assert len(failed) == 5 and len(recent) == 5, f"{len(failed)} failed, {len(recent)} recent"
+        print("   ✅ Status and date range filters applied")
+    finally:
+        db.query(Session).filter(Session.class_id == class_obj.id).delete()
+        db.query(Student).filter(Student.class_id == class_obj.id).delete()
+        db.query(Assignment).filter(Assignment.class_id == class_obj.id).delete()
+        db.query(Class).filter(Class.id == class_obj.id).delete()
+        db.commit()
+        db.close()
+
+    print("\n" + "=" * 50)
+    print("✅ Session listing test complete!")
+
+if __name__ == "__main__":
+    test_session_listing()
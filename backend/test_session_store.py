@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Test that AI sessions survive a round-trip through the shared session store"""
+
+from datetime import datetime
+from database import SessionLocal, engine
+from models import AISessionState
+from conversation_manager import ConversationManager
+from session_store import SessionConflictError, SessionStore, SQLSessionStore
+
+def test_sql_session_store():
+    """Save a session from one store and read it back from another (simulates two workers)"""
+
+    print("🧪 Testing SQL Session Store")
+    print("=" * 50)
+
+    AISessionState.__table__.create(engine, checkfirst=True)
+
+    worker_a = SQLSessionStore(SessionLocal)
+    worker_b = SQLSessionStore(SessionLocal)
+    session_id = "session_1_1_store_test"
+    worker_a.delete(session_id)
+
+    manager = ConversationManager()
+    session_data = {
+        'manager': manager,
+        'pdf_context': "=== Reading Material ===\nAristotle's Politics",
+        'conversation_history': [],
+        'pdf_paths': [],
+        'start_time': datetime.now(),
+        'reading_text': "Aristotle's Politics",
+        'tutor_prompt': "tutor",
+        'evaluation_prompt': "evaluation"
+    }
+
+    print("\n1. Saving session on worker A...")
+    worker_a[session_id] = session_data
+
+    print("\n2. Loading session on worker B...")
+    loaded = worker_b.get(session_id)
+    assert loaded and loaded['pdf_context'] == session_data['pdf_context'], "Worker B could not load the session"
+    print("   ✅ Worker B sees the session created by worker A")
+
+    print("\n3. Taking a turn on worker B...")
+    loaded['conversation_history'].append({"role": "user", "content": "Humans are political animals."})
+    loaded['manager'].update_phase(30)
+    worker_b.save(session_id, loaded)
+
+    print("\n4. Reading the turn back on worker A (stale local cache)...")
+    refreshed = worker_a.get(session_id)
+    assert len(refreshed['conversation_history']) == 1 and refreshed['manager'].question_count == 1, \
+        f"Worker A returned stale data: {refreshed['conversation_history']}"
+    print("   ✅ Worker A picked up the newer version")
+    assert isinstance(refreshed['start_time'], datetime), f"start_time has type {type(refreshed['start_time'])}"
+    print("   ✅ start_time restored as datetime")
+
+    print("\n5. Concurrent turns on both workers...")
+    copy_a = worker_a.get(session_id)
+    copy_b = worker_b.get(session_id)
+    copy_b['conversation_history'].append({"role": "user", "content": "Turn from worker B"})
+    worker_b.save(session_id, copy_b)
+    copy_a['conversation_history'].append({"role": "user", "content": "Turn from worker A"})
+    try:
+        worker_a.save(session_id, copy_a)
+        raise AssertionError("Stale save overwrote worker B's turn")
+    except SessionConflictError:
+        print("   ✅ Save from a stale copy rejected")
+
+    worker_a.update(session_id, lambda latest: latest['conversation_history'].append(
+        {"role": "user", "content": "Turn from worker A"}))
+    contents = [msg['content'] for msg in worker_b.get(session_id)['conversation_history']]
+    assert contents == ["Humans are political animals.", "Turn from worker B", "Turn from worker A"], contents
+    print("   ✅ update() reapplied worker A's turn on top of worker B's")
+
+    print("\n6. Deleting session...")
+    worker_a.delete(session_id)
+    assert session_id not in worker_b, "Session still visible on worker B"
+    print("   ✅ Session removed for all workers")
+
+    print("\n7. Store interface...")
+    try:
+        SessionStore()
+        raise AssertionError("SessionStore should be abstract")
+    except TypeError:
+        print("   ✅ SessionStore can't be instantiated")
+
+    print("\n" + "=" * 50)
+    print("✅ Session store test complete!")
+
+if __name__ == "__main__":
+    test_sql_session_store()
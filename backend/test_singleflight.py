@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Test single-flight deduplication of concurrent duplicate requests"""
+
+import asyncio
+from metrics import metrics
+from singleflight import SingleFlight
+
+def test_singleflight():
+    """Shared results, shared errors, cancelled leaders and per-key isolation"""
+
+    print("🧪 Testing Single-Flight")
+    print("=" * 50)
+
+    calls = []
+
+    async def vendor_call(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)  # Slow enough for the duplicates to arrive mid-call
+        return f"reply to {value}"
+
+    async def run():
+        flight = SingleFlight('test')
+
+        print("\n1. Concurrent duplicates...")
+        saved_before = metrics.get('singleflight.saved_calls')
+        results = await asyncio.gather(*[flight.do(("chat", 1, "hi"), lambda: vendor_call("hi")) for _ in range(10)])
+        shared = sum(1 for _, was_shared in results if was_shared)
+        saved = metrics.get('singleflight.saved_calls') - saved_before
+        assert len(calls) == 1 and {result for result, _ in results} == {"reply to hi"} and shared == saved == 9, \
+            f"{len(calls)} vendor calls, {shared} shared, {saved} counted as saved"
+        print("   ✅ 10 requests, 1 vendor call, 9 saved")
+
+        print("\n2. Finished flights aren't cached...")
+        await flight.do(("chat", 1, "hi"), lambda: vendor_call("hi"))
+        assert len(calls) == 2 and len(flight) == 0, "Finished flight was reused"
+        print("   ✅ Later request makes a new call")
+
+        print("\n3. Different keys run separately...")
+        await asyncio.gather(flight.do(("chat", 1, "a"), lambda: vendor_call("a")),
+                             flight.do(("chat", 2, "a"), lambda: vendor_call("a")))
+        assert len(calls) == 4, f"{len(calls) - 2} calls for 2 keys"
+        print("   ✅ One call per key")
+
+        print("\n4. Errors reach every waiter...")
+        async def failing():
+            calls.append("fail")
+            await asyncio.sleep(0.05)
+            raise RuntimeError("vendor down")
+        results = await asyncio.gather(*[flight.do("fail", failing) for _ in range(5)], return_exceptions=True)
+        assert calls.count("fail") == 1 and all(isinstance(r, RuntimeError) for r in results), \
+            f"Unexpected results: {results}"
+        print("   ✅ 1 call, 5 errors")
+
+        print("\n5. Leader disconnects mid-call...")
+        leader = asyncio.create_task(flight.do("slow", lambda: vendor_call("slow")))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do("slow", lambda: vendor_call("slow")))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result, was_shared = await follower
+        assert leader.cancelled() and result == "reply to slow" and was_shared and calls.count("slow") == 1, \
+            "Cancelling the leader broke the follower"
+        print("   ✅ Follower still gets the shared result")
+
+    asyncio.run(run())
+    print("\n✅ Single-flight test complete!")
+
+if __name__ == "__main__":
+    test_singleflight()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test sentence splitting and ordered audio for the pipelined TTS endpoint"""
+
+import random
+import asyncio
+from speech_pipeline import SentenceSplitter, pipeline_speech
+
+REPLY = "That's a strong start. Aristotle calls humans political animals! Why do you think he ties that to speech? Consider the polis."
+
+def test_sentence_splitter():
+    """Sentences come out whole regardless of how the stream is chunked"""
+
+    print("🧪 Testing Sentence Splitter")
+    print("=" * 50)
+
+    splitter = SentenceSplitter()
+    sentences = []
+    for i in range(0, len(REPLY), 7):  # Simulate 7-char token chunks
+        sentences.extend(splitter.feed(REPLY[i:i + 7]))
+    sentences.extend(splitter.flush())
+
+    expected = [
+        "That's a strong start.",
+        "Aristotle calls humans political animals!",
+        "Why do you think he ties that to speech?",
+        "Consider the polis."
+    ]
+    assert sentences == expected, f"Got {sentences}"
+    print(f"✅ PASS | Split into {len(sentences)} sentences")
+
+    short = SentenceSplitter().feed("Yes. I agree with that point. ")
+    assert short == ["Yes. I agree with that point."], f"Got {short}"
+    print("✅ PASS | Short fragment merged into the next sentence")
+
+def test_audio_order():
+    """Audio is emitted in sentence order even when TTS finishes out of order"""
+
+    print("\n🧪 Testing Pipelined Audio Order")
+    print("=" * 50)
+
+    async def tokens():
+        for word in REPLY.split(" "):
+            await asyncio.sleep(0.01)
+            yield {'type': 'token', 'text': word + " "}
+        yield {'type': 'done', 'response': REPLY, 'metadata': {}}
+
+    async def fake_tts(sentence: str) -> bytes:
+        await asyncio.sleep(random.uniform(0.01, 0.1))
+        return sentence.encode('utf-8')
+
+    async def run():
+        return [event async for event in pipeline_speech(tokens(), fake_tts)]
+
+    events = asyncio.run(run())
+    audio = [event for event in events if event['type'] == 'audio']
+
+    sentences = [event['text'] for event in events if event['type'] == 'sentence']
+    assert [event['index'] for event in audio] == list(range(4)), f"Audio order: {[event['index'] for event in audio]}"
+    assert [event['audio'].decode('utf-8') for event in audio] == sentences, "Audio doesn't match its sentence"
+    print("✅ PASS | Audio chunks arrived in order")
+
+    assert events[-1]['type'] == 'done' and events[-1]['response'] == REPLY, f"Last event was {events[-1]['type']}"
+    print("✅ PASS | Final metadata event passed through")
+
+if __name__ == "__main__":
+    test_sentence_splitter()
+    test_audio_order()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Test STT backend selection and latency/RTF reporting"""
+
+import os
+import asyncio
+import stt_service
+from stt_service import OpenAISTTBackend, STTBackend, create_stt_backend
+
+class FakeBackend(STTBackend):
+    name = "fake"
+
+    async def _transcribe(self, path, filename):
+        await asyncio.sleep(0.1)
+        return "the author argues", 2.0
+
+def test_stt_service():
+    """Check the backend factory and the timing wrapper"""
+
+    print("🧪 Testing STT Service")
+    print("=" * 50)
+
+    print("\n1. Latency and real-time factor...")
+    result = asyncio.run(FakeBackend().transcribe("clip.ogg", "clip.ogg"))
+    assert result['text'] == "the author argues" and 100 <= result['latency_ms'] < 200 \
+        and 0.04 <= result['rtf'] < 0.1, f"Unexpected result: {result}"
+    print(f"   ✅ {result['latency_ms']:.0f}ms for {result['audio_seconds']}s of audio, RTF {result['rtf']:.3f}")
+
+    class IncompleteBackend(STTBackend):
+        name = "incomplete"
+    try:
+        IncompleteBackend()
+        raise AssertionError("Backend without _transcribe was constructed")
+    except TypeError:
+        print("   ✅ A backend missing _transcribe fails at construction")
+
+    print("\n2. Backend selection...")
+    previous = os.environ.get("STT_BACKEND")
+    try:
+        os.environ["STT_BACKEND"] = "openai"
+        assert isinstance(create_stt_backend(None), OpenAISTTBackend), "openai not selected"
+        print("   ✅ openai is the default")
+        os.environ["STT_BACKEND"] = "local"
+        backend = create_stt_backend(None)
+        if stt_service.WhisperModel is None:
+            assert backend.name == 'openai', f"Got {backend.name} without faster-whisper"
+            print("   ✅ local falls back to openai without faster-whisper")
+        else:
+            assert backend.name == 'local', f"Got {backend.name}"
+            print("   ✅ local selects faster-whisper")
+    finally:
+        if previous is None:
+            os.environ.pop("STT_BACKEND", None)
+        else:
+            os.environ["STT_BACKEND"] = previous
+
+    print("\n" + "=" * 50)
+    print("✅ STT service test complete!")
+
+if __name__ == "__main__":
+    test_stt_service()
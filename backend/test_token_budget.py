@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Test that tutor requests are packed under the prompt token budget"""
+
+from conversation_manager import ConversationManager
+from token_utils import count_message_tokens, token_counter_name
+
+def build_history(exchanges: int, answer_words: int):
+    history = []
+    for i in range(exchanges):
+        history.append({"role": "user", "content": f"Answer {i}: " + "really " * answer_words + "interesting."})
+        history.append({"role": "assistant", "content": f"Question {i}: what does the author mean here?"})
+    return history
+
+def test_token_budget():
+    """Pack a short and a very verbose conversation under a 3000-token budget"""
+
+    print("🧪 Testing Token Budget")
+    print("=" * 50)
+    print(f"\nCounter: {token_counter_name('gpt-4o-mini')}")
+
+    args = ("Tutor prompt", "[Page 1]\nReading text " * 50)
+
+    print("\n1. Short conversation...")
+    manager = ConversationManager()
+    history = build_history(3, 10)
+    messages, breakdown = manager.pack_messages(*args, history, "Next answer", model="gpt-4o-mini", token_budget=3000)
+    assert breakdown['dropped_messages'] == 0 and breakdown['history_messages'] == 6 and breakdown['summary'] == 0, \
+        f"History dropped unnecessarily: {breakdown}"
+    print(f"   ✅ Everything sent ({breakdown['total']} tokens)")
+
+    print("\n2. Verbose student...")
+    manager = ConversationManager()
+    history = build_history(12, 400)
+    messages, breakdown = manager.pack_messages(*args, history, "Next answer", model="gpt-4o-mini", token_budget=3000)
+    actual = sum(count_message_tokens(message, "gpt-4o-mini") for message in messages)
+    assert actual <= 3000 and actual == breakdown['total'], \
+        f"Request is {actual} tokens, breakdown says {breakdown['total']}"
+    print(f"   ✅ Packed under budget ({actual} tokens, {breakdown['dropped_messages']} messages summarized)")
+    assert messages[1]['content'].startswith("[SUMMARY") and messages[2]['role'] == 'user', "Kept history starts mid-exchange"
+    print("   ✅ Summary followed by complete exchanges")
+    print(f"   Breakdown: {breakdown}")
+
+    print("\n3. Budget smaller than the last exchange...")
+    manager = ConversationManager()
+    messages, breakdown = manager.pack_messages(*args, history, "Next answer", model="gpt-4o-mini", token_budget=500)
+    assert breakdown['history_messages'] == 2, f"Kept {breakdown['history_messages']} history messages"
+    print("   ✅ Last exchange always kept")
+
+    print("\n" + "=" * 50)
+    print("✅ Token budget test complete!")
+
+if __name__ == "__main__":
+    test_token_budget()
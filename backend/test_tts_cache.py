@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Test the content-addressed TTS audio cache"""
+
+import os
+import time
+import tempfile
+from tts_cache import TTSCache, speech_cache_key
+
+SETTINGS = {"stability": 0.5, "similarity_boost": 0.5}
+
+def test_tts_cache():
+    """Check key normalization, tier promotion and disk LRU eviction"""
+
+    print("🧪 Testing TTS Cache")
+    print("=" * 50)
+
+    farewell = "Thank you for a good conversation. Let's wrap up here."
+    key = speech_cache_key(farewell, "voice", "model", SETTINGS)
+
+    print("\n1. Cache keys...")
+    assert speech_cache_key("  Thank you for a good\nconversation.  Let's wrap up here.", "voice", "model", SETTINGS) == key, \
+        "Whitespace changed the key"
+    print("   ✅ Whitespace differences share one entry")
+    assert speech_cache_key(farewell, "other_voice", "model", SETTINGS) != key, "Voice ignored in key"
+    assert speech_cache_key(farewell, "voice", "other_model", SETTINGS) != key, "Model ignored in key"
+    assert speech_cache_key(farewell, "voice", "model", {**SETTINGS, "stability": 0.9}) != key, "Settings ignored in key"
+    print("   ✅ Different voice, model or settings get a different entry")
+
+    disk_dir = tempfile.mkdtemp()
+    cache = TTSCache(memory_max_bytes=5000, disk_dir=disk_dir, disk_max_bytes=10000)
+
+    print("\n2. Memory and disk tiers...")
+    cache.set(key, b"a" * 4000)
+    cache.memory.clear()  # Simulate another worker / restart
+    assert cache.get(key) == b"a" * 4000 and key in cache.memory, "Disk tier miss"
+    print("   ✅ Disk hit promoted to memory")
+
+    print("\n3. Overwriting a key...")
+    cache.set(key, b"a" * 3000)
+    assert cache.disk.bytes == 3000, f"Disk accounting counts {cache.disk.bytes} bytes for a 3000-byte file"
+    print("   ✅ Old file's size released")
+
+    print("\n4. Disk LRU eviction...")
+    for i in range(3):
+        time.sleep(0.01)  # Distinct mtimes
+        cache.set(f"{i:064x}", b"b" * 4000)
+    files = os.listdir(disk_dir)
+    assert cache.disk.bytes <= 10000 and f"{key}.mp3" not in files, \
+        f"Disk over budget: {cache.disk.bytes} bytes, {files}"
+    assert cache.disk.bytes == sum(os.path.getsize(os.path.join(disk_dir, name)) for name in files)
+    print(f"   ✅ Oldest audio evicted ({len(files)} files, {cache.disk.bytes} bytes)")
+
+    print("\n" + "=" * 50)
+    print(f"✅ TTS cache test complete! (hit rate {cache.hit_rate()})")
+
+if __name__ == "__main__":
+    test_tts_cache()
@@ -0,0 +1,74 @@
+"""Token counting helpers
+
+Exact counts come from tiktoken when it is installed; otherwise a fast
+characters-per-token estimate is used.
+"""
+import os
+import logging
+from functools import lru_cache
+from typing import Dict, Optional
+
+try:
+    import tiktoken
+except ImportError:  # Optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# OpenAI models average roughly 4 characters of English text per token
+CHARS_PER_TOKEN = 4
+
+# Role and separator tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Prompt (input) tokens a single request may use, per model.
+# PROMPT_TOKEN_BUDGET overrides the budget for every model.
+PROMPT_TOKEN_BUDGETS = {
+    "gpt-4o-mini": 16000,
+}
+DEFAULT_PROMPT_TOKEN_BUDGET = 16000
+
+def estimate_tokens(text: str) -> int:
+    """Fast approximate token count for budgeting and reporting"""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+@lru_cache(maxsize=16)
+def _encoding_for(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use; work offline with the estimate
+        logger.warning(f"tiktoken unavailable for {model}, using estimates: {str(e)}")
+        return None
+
+def token_counter_name(model: Optional[str] = None) -> str:
+    """Which counter count_tokens uses for a model ('tiktoken' or 'estimate')"""
+    return "tiktoken" if model and _encoding_for(model) is not None else "estimate"
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Token count for a model (exact with tiktoken, estimated otherwise)
+
+    Cached because history messages are re-counted on every turn.
+    """
+    if not text:
+        return 0
+    encoding = _encoding_for(model) if model else None
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_message_tokens(message: Dict, model: Optional[str] = None) -> int:
+    return MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get('content') or "", model)
+
+def prompt_token_budget(model: Optional[str] = None) -> int:
+    override = os.getenv("PROMPT_TOKEN_BUDGET")
+    if override:
+        return int(override)
+    return PROMPT_TOKEN_BUDGETS.get(model, DEFAULT_PROMPT_TOKEN_BUDGET)
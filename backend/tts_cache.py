@@ -0,0 +1,44 @@
+"""Content-addressed cache for synthesized speech
+
+Identical utterances (greetings, the auto-end farewell, reprompts) are synthesized
+once. Keys hash everything that affects the audio: voice, model, voice settings
+and the whitespace-normalized text. Audio lives in a small in-memory hot tier
+backed by a size-bounded on-disk LRU shared by all workers on the host.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from typing import Dict
+from caching import DiskCache, LRUCache, TieredCache, normalize_text
+
+
+def speech_cache_key(text: str, voice_id: str, model_id: str, voice_settings: Dict) -> str:
+    """Stable hex digest for one synthesized utterance (also used as the HTTP ETag)"""
+    payload = json.dumps({
+        'voice_id': voice_id,
+        'model_id': model_id,
+        'voice_settings': voice_settings,
+        'text': normalize_text(text)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSCache(TieredCache):
+    """Audio cache: in-memory LRU (bounded by bytes) in front of a disk LRU"""
+
+    def __init__(self, memory_max_bytes: int, disk_dir: str, disk_max_bytes: int):
+        super().__init__(
+            'tts_cache',
+            LRUCache(max_entries=10000, max_bytes=memory_max_bytes),
+            DiskCache(disk_dir, max_bytes=disk_max_bytes, suffix=".mp3")
+        )
+
+
+def create_tts_cache() -> TTSCache:
+    """Build the TTS cache from TTS_CACHE_* environment variables"""
+    return TTSCache(
+        memory_max_bytes=int(os.getenv("TTS_CACHE_MEMORY_MB", "32")) * 1024 * 1024,
+        disk_dir=os.getenv("TTS_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "professr_tts_cache"),
+        disk_max_bytes=int(os.getenv("TTS_CACHE_DISK_MB", "512")) * 1024 * 1024
+    )
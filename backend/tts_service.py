@@ -0,0 +1,180 @@
+"""Text-to-speech through the ElevenLabs API"""
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+import httpx
+from metrics import metrics
+from resilience import elevenlabs
+from tts_cache import create_tts_cache, speech_cache_key
+
+logger = logging.getLogger(__name__)
+
+ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1/text-to-speech"
+ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"
+DEFAULT_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.5
+}
+
+
+class TTSError(Exception):
+    """Raised when the TTS vendor fails or returns unusable audio
+
+    status_code and response are set for HTTP error replies, so transient ones
+    (429, 5xx) are retried by resilience.elevenlabs.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, response=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+class ElevenLabsClient:
+    """Long-lived async ElevenLabs client with a keep-alive connection pool
+
+    Started and closed by the app lifespan in main.py so every request reuses the
+    same pooled connections instead of paying a TCP+TLS handshake per call. Pool
+    limits and timeouts come from the ELEVENLABS_* environment variables; retries
+    and circuit breaking from resilience.elevenlabs.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, max_connections: Optional[int] = None,
+                 max_keepalive_connections: Optional[int] = None, keepalive_expiry: Optional[float] = None,
+                 timeout_seconds: Optional[float] = None, connect_timeout_seconds: Optional[float] = None):
+        self.api_key = api_key or os.getenv("ELEVENLABS_API_KEY")
+        self.limits = httpx.Limits(
+            max_connections=max_connections or int(os.getenv("ELEVENLABS_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=max_keepalive_connections or int(os.getenv("ELEVENLABS_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=keepalive_expiry or float(os.getenv("ELEVENLABS_KEEPALIVE_EXPIRY", "60"))
+        )
+        self.timeout = httpx.Timeout(
+            timeout_seconds or float(os.getenv("ELEVENLABS_TIMEOUT_SECONDS", "30")),
+            connect=connect_timeout_seconds or float(os.getenv("ELEVENLABS_CONNECT_TIMEOUT_SECONDS", "5"))
+        )
+        self._client = None
+        self.requests = 0
+        self.new_connections = 0
+
+        metrics.register_gauge('tts.connection_reuse_ratio', self.connection_reuse_ratio)
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            logger.info(f"Started ElevenLabs client pool ({self.limits.max_connections} max connections)")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _trace(self, event_name: str, info: Dict):
+        """httpcore trace hook: a connect_tcp event means the pool had no idle connection"""
+        if event_name.endswith("connect_tcp.complete"):
+            self.new_connections += 1
+            metrics.incr('tts.new_connections')
+
+    def connection_reuse_ratio(self) -> float:
+        if not self.requests:
+            return 0.0
+        return round(max(0, self.requests - self.new_connections) / self.requests, 3)
+
+    async def synthesize(self, text: str, voice_id: Optional[str] = None,
+                         voice_settings: Optional[Dict] = None) -> bytes:
+        """Convert text to MP3 audio bytes
+
+        Raises TTSError for unusable requests or replies, and
+        resilience.VendorUnavailableError once transient failures outlast the retries.
+        """
+        voice_id = voice_id or os.getenv("ELEVENLABS_VOICE_ID")
+        if not voice_id:
+            raise TTSError("ElevenLabs voice ID not configured")
+
+        # Scripts and tests may call this without the app lifespan
+        await self.start()
+
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.api_key or ""
+        }
+        data = {
+            "text": text,
+            "model_id": ELEVENLABS_MODEL_ID,
+            "voice_settings": voice_settings or DEFAULT_VOICE_SETTINGS
+        }
+
+        try:
+            audio_bytes = await elevenlabs.call(self._post, voice_id, data, headers)
+        except httpx.HTTPError as e:
+            raise TTSError(f"ElevenLabs request failed: {str(e) or type(e).__name__}")
+
+        if len(audio_bytes) < 1000:  # Suspiciously small
+            raise TTSError(f"Audio too small: {len(audio_bytes)} bytes")
+
+        return audio_bytes
+
+    async def _post(self, voice_id: str, data: Dict, headers: Dict) -> bytes:
+        """One request attempt"""
+        started = time.perf_counter()
+        self.requests += 1
+        metrics.incr('tts.requests')
+        try:
+            response = await self._client.post(
+                f"{ELEVENLABS_API_URL}/{voice_id}",
+                json=data,
+                headers=headers,
+                extensions={"trace": self._trace}
+            )
+        except httpx.HTTPError:
+            metrics.incr('tts.errors')
+            raise
+        metrics.observe('tts.request_ms', (time.perf_counter() - started) * 1000)
+
+        if response.status_code != 200:
+            metrics.incr('tts.errors')
+            logger.error(f"ElevenLabs error response: {response.status_code} - {response.text}")
+            raise TTSError(f"ElevenLabs API error: {response.status_code} - {response.text}",
+                           status_code=response.status_code, response=response)
+        return response.content
+
+    def stats(self) -> Dict:
+        return {
+            'started': self._client is not None,
+            'max_connections': self.limits.max_connections,
+            'max_keepalive_connections': self.limits.max_keepalive_connections,
+            'keepalive_expiry': self.limits.keepalive_expiry,
+            'requests': self.requests,
+            'new_connections': self.new_connections,
+            'connection_reuse_ratio': self.connection_reuse_ratio()
+        }
+
+
+tts_client = ElevenLabsClient()
+tts_cache = create_tts_cache()
+
+
+def speech_etag(text: str, voice_id: Optional[str] = None, voice_settings: Optional[Dict] = None) -> str:
+    """Cache key for an utterance with the same defaults synthesize_speech_async applies"""
+    return speech_cache_key(
+        text,
+        voice_id or os.getenv("ELEVENLABS_VOICE_ID") or "",
+        ELEVENLABS_MODEL_ID,
+        voice_settings or DEFAULT_VOICE_SETTINGS
+    )
+
+
+async def synthesize_speech_async(text: str, voice_id: Optional[str] = None,
+                                  voice_settings: Optional[Dict] = None) -> bytes:
+    """Convert text to MP3 audio bytes, reusing cached audio for identical utterances"""
+    key = speech_etag(text, voice_id, voice_settings)
+    # The disk tier does blocking file I/O
+    audio_bytes = await asyncio.to_thread(tts_cache.get, key)
+    if audio_bytes is not None:
+        return audio_bytes
+
+    audio_bytes = await tts_client.synthesize(text, voice_id, voice_settings)
+    await asyncio.to_thread(tts_cache.set, key, audio_bytes)
+    return audio_bytes
@@ -4,6 +4,8 @@ import sys
 from sqlalchemy.orm import Session
 from database import get_db, engine
 from models import Assignment
+from reading_ingest import ingest_assignment
+from lookup_cache import lookup_cache
 
 def update_assignment_pdfs():
     """Update assignments with PDF paths for week1"""
@@ -32,6 +34,14 @@ def update_assignment_pdfs():
             print(f"\nUpdated assignment ID {assignment.id} ({assignment.title}) with:")
             print(f"  - PDF paths: {assignment.pdf_paths}")
             print(f"  - Week number: {assignment.week_number}")
+
+            # Pre-extract the readings so sessions don't run PyPDF2
+            result = ingest_assignment(db, assignment)
+            print(f"  - Ingested pages: {result['pages_written']}")
+
+            # Only clears this process's cache: a running server picks up the change
+            # after a restart or once its lookups expire (LOOKUP_CACHE_TTL_SECONDS)
+            lookup_cache.invalidate()
         else:
             print("\nNo assignments found in database. Please seed the database first.")
             
@@ -14,7 +14,6 @@ interface Session {
   status: string
   final_score: number
   score_category: string
-  transcript: Array<{speaker: string, text: string}>
   ai_feedback: string
   completed_at: string
 }
@@ -37,6 +36,8 @@ function Instructor() {
   const [selectedAssignment, setSelectedAssignment] = useState('')
   const [searchTerm, setSearchTerm] = useState('')
   const [expandedRow, setExpandedRow] = useState<number | null>(null)
+  // Transcripts are fetched on demand when a row is expanded
+  const [transcripts, setTranscripts] = useState<Record<number, Array<{speaker: string, text: string}>>>({})
 
   // Helper functions for formatting feedback (same as in Results.tsx)
   const getScoreEmoji = (category: string) => {
@@ -124,10 +125,17 @@ function Instructor() {
   const loadData = async (classId: number) => {
     setLoading(true)
     try {
-      // Load sessions filtered by class_id
-      const sessionsResponse = await fetch(`${apiUrl}/test-data?class_id=${classId}`)
-      const sessionsData = await sessionsResponse.json()
-      setSessions(sessionsData.sessions)
+      // Load sessions filtered by class_id, one page at a time
+      const allSessions: Session[] = []
+      let cursor: number | null = null
+      do {
+        const cursorParam: string = cursor !== null ? `&cursor=${cursor}` : ''
+        const sessionsResponse = await fetch(`${apiUrl}/test-data?class_id=${classId}&limit=500${cursorParam}`)
+        const sessionsData = await sessionsResponse.json()
+        allSessions.push(...sessionsData.sessions)
+        cursor = sessionsData.next_cursor
+      } while (cursor !== null)
+      setSessions(allSessions)
 
       // Load assignments for filter dropdown filtered by class_id
       const assignmentsResponse = await fetch(`${apiUrl}/assignments?class_id=${classId}`)
@@ -146,6 +154,23 @@ function Instructor() {
     return matchesAssignment && matchesSearch
   })
 
+  const toggleTranscript = async (sessionId: number) => {
+    if (expandedRow === sessionId) {
+      setExpandedRow(null)
+      return
+    }
+    setExpandedRow(sessionId)
+    if (!transcripts[sessionId]) {
+      try {
+        const response = await fetch(`${apiUrl}/sessions/${sessionId}/transcript`)
+        const data = await response.json()
+        setTranscripts(prev => ({...prev, [sessionId]: data.transcript || []}))
+      } catch (error) {
+        setError('Error loading transcript')
+      }
+    }
+  }
+
   const handleDelete = async (session: Session) => {
     try {
       const response = await fetch(`${apiUrl}/sessions/${session.session_id}`, {
@@ -297,9 +322,7 @@ function Instructor() {
                     </TableCell>
                     <TableCell>
                       <Button
-                        onClick={() => setExpandedRow(
-                          expandedRow === session.session_id ? null : session.session_id
-                        )}
+                        onClick={() => toggleTranscript(session.session_id)}
                         className="mr-2"
                         size="sm"
                         variant="default"
@@ -408,7 +431,7 @@ function Instructor() {
                           <div className="flex-1 absolute right-0 top-12 bottom-0 w-[calc(50%-20px)]">
                             <h3 className="mb-4 text-xl font-semibold">Conversation Transcript</h3>
                             <div className="absolute top-[45px] bottom-0 left-0 right-0 overflow-y-auto border border-gray-300 rounded-lg p-5 bg-white">
-                              {session.transcript.map((turn, index) => (
+                              {(transcripts[session.session_id] || []).map((turn, index) => (
                                 <div
                                   key={index}
                                   className={`mb-4 p-2.5 rounded-lg ${
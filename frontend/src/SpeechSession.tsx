@@ -2,6 +2,7 @@ import { useState, useRef, useCallback } from 'react'
 import heatherPhoto from './assets/Heather James photo.png'
 import { Button } from '@/components/ui/button'
 import { Card } from '@/components/ui/card'
+import { playSpokenReply } from '@/lib/speechStream'
 
 interface SpeechSessionProps {
   studentId: number
@@ -116,76 +117,31 @@ function SpeechSession({
           throw new Error('AI session not initialized')
         }
         
-        const aiResponse = await fetch(`${apiUrl}/ai-chat`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json'
-          },
-          body: JSON.stringify({
-            session_id: aiSessionId,
-            message: studentText
-          })
-        })
-        
-        if (!aiResponse.ok) {
-          throw new Error('AI response failed')
-        }
-        
-        const aiData = await aiResponse.json()
-        const aiText = aiData.response
-        const shouldAutoEnd = aiData.auto_end === true
-        
-        // Track if this is an auto-end response
-        setIsAutoEndResponse(shouldAutoEnd)
-        
-        // Add AI response to transcript
-        const finalTranscript = [...newTranscript, { speaker: 'ai' as const, text: aiText }]
-        setTranscript(finalTranscript)
-        setCurrentAiResponse(aiText)
-        
-        // Convert AI response to speech
-        const ttsResponse = await fetch(`${apiUrl}/text-to-speech`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json'
+        // Reply is spoken sentence by sentence while the rest is still being generated
+        const { reply, blockedAudioUrl } = await playSpokenReply(apiUrl, aiSessionId, studentText, {
+          onSentence: (text) => setCurrentAiResponse((prev) => (prev ? `${prev} ${text}` : text)),
+          onReply: (aiData) => {
+            // Track if this is an auto-end response
+            setIsAutoEndResponse(aiData.auto_end === true)
+            // Add AI response to transcript
+            setTranscript([...newTranscript, { speaker: 'ai' as const, text: aiData.response }])
+            setCurrentAiResponse(aiData.response)
           },
-          body: JSON.stringify({ text: aiText })
+          onPlaybackStart: () => setSessionState('ai_speaking')
         })
-        
-        if (!ttsResponse.ok) {
-          throw new Error('Text-to-speech failed')
-        }
-        
-        const audioArrayBuffer = await ttsResponse.arrayBuffer()
-        console.log('Received audio buffer size:', audioArrayBuffer.byteLength)
-        const audioBlob2 = new Blob([audioArrayBuffer], { type: 'audio/mpeg' })
-        const newAudioUrl = URL.createObjectURL(audioBlob2)
-        console.log('Created audio URL:', newAudioUrl)
-        
-        // Auto-play AI response
-        const audio = new Audio(newAudioUrl)
-        setSessionState('ai_speaking')
-        
-        audio.onended = () => {
-          if (shouldAutoEnd) {
-            // AI said farewell - automatically end session
-            console.log('Auto-ending session after farewell message')
-            handleComplete()
-          } else {
-            // Normal flow: Auto-start recording when AI finishes speaking
-            startRecording()
-          }
-          // Don't clear AI response text when audio ends - keep it until next question
-          URL.revokeObjectURL(newAudioUrl)
-        }
-        
-        try {
-          await audio.play()
-        } catch (error) {
-          console.error('Auto-play failed:', error)
+
+        if (blockedAudioUrl) {
           // Fallback: set up for manual play
-          setAudioUrl(newAudioUrl)
+          setSessionState('ai_speaking')
+          setAudioUrl(blockedAudioUrl)
           // Note: isAutoEndResponse state is already set, so manual play will handle auto-end correctly
+        } else if (reply.auto_end === true) {
+          // AI said farewell - automatically end session
+          console.log('Auto-ending session after farewell message')
+          handleComplete()
+        } else {
+          // Normal flow: Auto-start recording when AI finishes speaking
+          startRecording()
         }
         
       } catch (error) {
@@ -276,75 +232,45 @@ function SpeechSession({
       setAiSessionId(sessionData.session_id)
       setSessionInitialized(true)
       
-      // Step 2: Get initial AI greeting
-      const aiResponse = await fetch(`${apiUrl}/ai-chat`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify({
-          session_id: sessionData.session_id,
-          message: 'Hello, I\'m ready to begin discussing today\'s readings.'
-        })
-      })
-      
-      if (!aiResponse.ok) {
-        throw new Error('Failed to get AI response')
+      // Start timer once the greeting arrives
+      const startTimer = () => {
+        intervalRef.current = window.setInterval(() => {
+          setTimeLeft((prev) => {
+            if (prev <= 1) {
+              handleComplete()
+              return 0
+            }
+            return prev - 1
+          })
+        }, 1000)
       }
       
-      const aiData = await aiResponse.json()
-      const aiText = aiData.response
-      
-      setCurrentAiResponse(aiText)
-      
-      // Convert to speech
-      const ttsResponse = await fetch(`${apiUrl}/text-to-speech`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify({ text: aiText })
-      })
-      
-      const audioArrayBuffer = await ttsResponse.arrayBuffer()
-      console.log('Initial audio buffer size:', audioArrayBuffer.byteLength)
-      const audioBlob = new Blob([audioArrayBuffer], { type: 'audio/mpeg' })
-      const newAudioUrl = URL.createObjectURL(audioBlob)
-      console.log('Initial audio URL:', newAudioUrl)
-      
-      // Auto-play initial AI greeting
-      const audio = new Audio(newAudioUrl)
-      setSessionState('ai_speaking')
+      // Step 2: Speak the initial AI greeting as it is generated
+      const { blockedAudioUrl } = await playSpokenReply(
+        apiUrl,
+        sessionData.session_id,
+        'Hello, I\'m ready to begin discussing today\'s readings.',
+        {
+          onSentence: (text) => setCurrentAiResponse((prev) => (prev ? `${prev} ${text}` : text)),
+          onReply: (aiData) => {
+            setCurrentAiResponse(aiData.response)
+            // Add AI greeting to transcript
+            setTranscript([{ speaker: 'ai', text: aiData.response }])
+            startTimer()
+          },
+          onPlaybackStart: () => setSessionState('ai_speaking')
+        }
+      )
       
-      audio.onended = () => {
+      if (blockedAudioUrl) {
+        // Fallback: set up for manual play
+        setSessionState('ai_speaking')
+        setAudioUrl(blockedAudioUrl)
+      } else {
         // Auto-start recording when AI finishes speaking
         startRecording()
-        // Don't clear AI response text when audio ends - keep it until next question
-        URL.revokeObjectURL(newAudioUrl)
       }
       
-      try {
-        await audio.play()
-      } catch (error) {
-        console.error('Auto-play failed:', error)
-        // Fallback: set up for manual play
-        setAudioUrl(newAudioUrl)
-      }
-      
-      // Add AI greeting to transcript
-      setTranscript([{ speaker: 'ai', text: aiText }])
-      
-      // Start timer
-      intervalRef.current = window.setInterval(() => {
-        setTimeLeft((prev) => {
-          if (prev <= 1) {
-            handleComplete()
-            return 0
-          }
-          return prev - 1
-        })
-      }, 1000)
-      
     } catch (error) {
       console.error('Error starting session:', error)
       alert('Error starting session. Please try again.')
@@ -365,16 +291,30 @@ function SpeechSession({
     let evaluation = null
     if (aiSessionId && sessionInitialized) {
       try {
-        const evaluationResponse = await fetch(`${apiUrl}/evaluate-ai-session?session_id=${aiSessionId}`, {
+        // Queue the evaluation, then long-poll until a worker has finished it
+        const jobResponse = await fetch(`${apiUrl}/evaluation-jobs?session_id=${aiSessionId}`, {
           method: 'POST',
           headers: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'Idempotency-Key': aiSessionId
           }
         })
-        
-        if (evaluationResponse.ok) {
-          evaluation = await evaluationResponse.json()
-          console.log('Session evaluated:', evaluation)
+
+        if (jobResponse.ok) {
+          let job = await jobResponse.json()
+          const deadline = Date.now() + 3 * 60 * 1000
+          while (job.status !== 'completed' && job.status !== 'failed' && Date.now() < deadline) {
+            const pollResponse = await fetch(`${apiUrl}/evaluation-jobs/${job.job_id}?wait=20`)
+            if (!pollResponse.ok) break
+            job = await pollResponse.json()
+          }
+
+          if (job.status === 'completed') {
+            evaluation = job.result
+            console.log('Session evaluated:', evaluation)
+          } else {
+            console.error('Evaluation did not complete:', job.error || job.status)
+          }
         }
       } catch (error) {
         console.error('Error evaluating session:', error)
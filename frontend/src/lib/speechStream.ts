@@ -0,0 +1,164 @@
+// Client for POST /ai-chat-speech: the tutor's reply arrives as Server-Sent Events,
+// one MP3 segment per sentence, and playback starts with the first sentence.
+
+export interface ChatReply {
+  response: string
+  auto_end: boolean
+  [key: string]: any
+}
+
+interface SpokenReplyHandlers {
+  onSentence: (text: string) => void  // Each sentence as soon as the LLM finishes it
+  onReply: (reply: ChatReply) => void  // Full reply (same body as /ai-chat), before playback ends
+  onPlaybackStart: () => void
+}
+
+export interface SpokenReplyResult {
+  reply: ChatReply
+  // Set when the browser blocked autoplay: the unplayed audio, for a manual play button
+  blockedAudioUrl: string | null
+}
+
+interface ServerSentEvent {
+  event: string
+  data: any
+}
+
+async function* readServerSentEvents(response: Response): AsyncGenerator<ServerSentEvent> {
+  const reader = response.body!.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) return
+    buffer += value
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let event = 'message'
+      let data = ''
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      if (data) yield { event, data: JSON.parse(data) }
+    }
+  }
+}
+
+function decodeAudio(audioBase64: string, mediaType: string): Blob {
+  const bytes = Uint8Array.from(atob(audioBase64), (char) => char.charCodeAt(0))
+  return new Blob([bytes], { type: mediaType })
+}
+
+// Resolves when the segment finishes (or fails to decode); rejects if the browser refuses to play
+async function playSegment(segment: Blob): Promise<void> {
+  const url = URL.createObjectURL(segment)
+  const audio = new Audio(url)
+  try {
+    await new Promise<void>((resolve, reject) => {
+      audio.onended = () => resolve()
+      audio.onerror = () => resolve()  // Skip a broken segment rather than stall the turn
+      audio.play().catch(reject)
+    })
+  } finally {
+    URL.revokeObjectURL(url)
+  }
+}
+
+/**
+ * Send a student message and speak the tutor's reply sentence by sentence.
+ * Resolves once the whole reply has been played (or autoplay was blocked).
+ * Throws if the request fails, e.g. 503 while the LLM is unavailable.
+ */
+export async function playSpokenReply(
+  apiUrl: string,
+  sessionId: string,
+  message: string,
+  handlers: SpokenReplyHandlers
+): Promise<SpokenReplyResult> {
+  const response = await fetch(`${apiUrl}/ai-chat-speech`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify({ session_id: sessionId, message })
+  })
+
+  if (!response.ok || !response.body) {
+    throw new Error(`AI response failed (${response.status})`)
+  }
+
+  // Segments by sentence index; null when synthesis failed for that sentence
+  const segments: (Blob | null)[] = []
+  let sentenceCount = 0
+  let streamDone = false
+  let wake: (() => void) | null = null
+  const notify = () => {
+    wake?.()
+    wake = null
+  }
+
+  const unplayed: Blob[] = []
+  let blocked = false
+  let started = false
+
+  const playInOrder = async () => {
+    for (let index = 0; ; index++) {
+      while (segments[index] === undefined && !(streamDone && index >= sentenceCount)) {
+        await new Promise<void>((resolve) => { wake = resolve })
+      }
+      if (segments[index] === undefined) return  // Stream finished and every sentence handled
+      const segment = segments[index]
+      if (!segment) continue
+      if (blocked) {
+        unplayed.push(segment)
+        continue
+      }
+      if (!started) {
+        started = true
+        handlers.onPlaybackStart()
+      }
+      try {
+        await playSegment(segment)
+      } catch (error) {
+        console.error('Auto-play failed:', error)
+        blocked = true
+        unplayed.push(segment)
+      }
+    }
+  }
+
+  const playback = playInOrder()
+  let reply: ChatReply | null = null
+  try {
+    for await (const { event, data } of readServerSentEvents(response)) {
+      if (event === 'sentence') {
+        sentenceCount = Math.max(sentenceCount, data.index + 1)
+        handlers.onSentence(data.text)
+      } else if (event === 'audio') {
+        segments[data.index] = decodeAudio(data.audio_base64, data.media_type)
+      } else if (event === 'audio_error') {
+        console.error(`Speech synthesis failed for sentence ${data.index}:`, data.error)
+        segments[data.index] = null
+      } else if (event === 'done') {
+        reply = data as ChatReply
+        handlers.onReply(reply)
+      }
+      notify()
+    }
+  } finally {
+    streamDone = true
+    notify()
+  }
+  await playback
+
+  if (!reply) {
+    throw new Error('AI response stream ended early')
+  }
+
+  const blockedAudioUrl = unplayed.length
+    ? URL.createObjectURL(new Blob(unplayed, { type: 'audio/mpeg' }))  // MP3 frames concatenate
+    : null
+  return { reply, blockedAudioUrl }
+}